@@ -2,7 +2,7 @@
 import os
 from flask import Flask
 from config import config_by_name
-from app.extensions import db, migrate, login_manager
+from app.extensions import db, login_manager, apply_sqlite_pragmas
 
 
 def create_app(config_name=None):
@@ -25,15 +25,33 @@ def create_app(config_name=None):
 
     # --- Initialize extensions ---
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
 
-    # --- User loader for Flask-Login ---
-    from app.models import User
-
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                apply_sqlite_pragmas(engine, app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+    from app import db_routing
+    db_routing.init_app(app)
+
+    from app import api_auth, assets, fragment_cache, instrumentation, metrics, profiler, seat_events
+    api_auth.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+    fragment_cache.init_app(app)
+    assets.init_app(app)
+    seat_events.init_app(app)
+
+    # Migrations are only run from the `flask` CLI — web workers skip Alembic
+    import click
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    from app.cli import register_commands
+    register_commands(app)
 
     # --- Register blueprints ---
     from app.blueprints.main import main_bp
@@ -47,6 +65,7 @@ def create_app(config_name=None):
     from app.blueprints.chatbot import chatbot_bp
     from app.blueprints.seat_api import seat_api_bp
     from app.blueprints.ticket import ticket_bp
+    from app.blueprints.admin import admin_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -59,19 +78,24 @@ def create_app(config_name=None):
     app.register_blueprint(chatbot_bp, url_prefix='/api/chat')
     app.register_blueprint(seat_api_bp)
     app.register_blueprint(ticket_bp)
+    app.register_blueprint(admin_bp, url_prefix='/admin')
 
     # --- CSRF Protection ---
     import secrets
     from flask import session, request as req, abort
     from markupsafe import Markup
 
-    CSRF_EXEMPT_ENDPOINTS = {'chatbot.chat', 'api.create_review', 'api.get_reviews'}
+    CSRF_EXEMPT_ENDPOINTS = {'chatbot.chat', 'chatbot.chat_stream', 'api.create_review', 'api.get_reviews',
+                             'api.create_group_booking', 'api.confirm_group_booking',
+                             'api.issue_token', 'api.refresh_token'}
 
     @app.before_request
     def _csrf_protect():
         if req.method == 'POST':
             if req.endpoint in CSRF_EXEMPT_ENDPOINTS:
                 return  # JSON APIs exempt
+            if api_auth.bearer_token(req):
+                return  # bearer-token clients — browsers never send the header by themselves
             token = session.get('_csrf_token')
             form_token = req.form.get('_csrf_token')
             if not token or token != form_token:
@@ -90,7 +114,9 @@ def create_app(config_name=None):
         return dict(csrf_token=csrf_token)
 
     # --- Create tables if they don't exist (dev convenience) ---
-    with app.app_context():
-        db.create_all()
+    # Production leaves the schema to `flask db upgrade` / `flask init-db`
+    if app.config['AUTO_CREATE_SCHEMA']:
+        with app.app_context():
+            db.create_all()
 
     return app
@@ -0,0 +1,157 @@
+"""Bearer tokens for the JSON API, and a per-worker cache of logged-in users.
+
+API clients (the React frontend, scripts) can authenticate without the
+session cookie:
+
+    POST /api/auth/token    {"email": "...", "password": "..."}
+    POST /api/auth/refresh  {"refresh_token": "..."}
+
+Both answer ``{"access_token", "refresh_token", "token_type": "Bearer",
+"expires_in"}``. A request to ``/api/*`` with ``Authorization: Bearer
+<access token>`` is logged in as that user:
+
+* the access token is signed with ``SECRET_KEY`` and carries the user's id
+  and username, so checking it needs no database query. It is valid for
+  ``API_ACCESS_TOKEN_TTL`` seconds and cannot be revoked before then;
+* the refresh token is valid for ``API_REFRESH_TOKEN_TTL`` seconds. It is
+  checked against the user's row, so a new password revokes it;
+* bearer requests skip the CSRF check, since browsers never add the header
+  on their own. ``/api`` views answer 401 instead of redirecting to the
+  login page, so clients know to refresh.
+
+Session logins load their user through ``users``, a per-worker cache of
+usernames by id (``USER_CACHE_TTL`` seconds, listed in ``/metrics``). Both
+kinds of login give a :class:`LoginUser`: ``id``, ``username`` and
+``is_admin`` cost no query, and the first read of any other attribute
+loads the user's row from the database. Nothing else, and no password
+hash, is kept between requests.
+"""
+import hashlib
+from functools import cached_property
+
+import sqlalchemy as sa
+from flask import current_app
+from flask_login import UserMixin
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+from app.cache import TTLCache
+from app.extensions import db, login_manager
+
+ACCESS_SALT = 'api-access'
+REFRESH_SALT = 'api-refresh'
+
+_users = TTLCache(maxsize=10000, ttl=300, name='users')  # user id -> username
+
+
+class LoginUser(UserMixin):
+    """The logged-in user, as far as a session or access token names them.
+
+    ``id`` and ``username`` are known up front. Any other attribute loads
+    the full row, once per request, the first time it is read.
+    """
+
+    def __init__(self, user_id, username):
+        self.id = user_id
+        self.username = username
+
+    @property
+    def is_admin(self):
+        return self.username in current_app.config['ADMIN_USERS']
+
+    @cached_property
+    def record(self):
+        from app.models import User
+
+        return db.session.get(User, self.id)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.record, name)
+
+
+# ── Session logins ──────────────────────────────────────────────────────
+
+def load_user(user_id):
+    """Flask-Login user loader: the username from this worker's cache, else the database."""
+    from app.models import User
+
+    user_id = int(user_id)
+    username = _users.get(user_id)
+    if username is None:
+        username = db.session.execute(sa.select(User.username).where(User.id == user_id)).scalar()
+        if username is None:
+            return None
+        _users.set(user_id, username)
+    return LoginUser(user_id, username)
+
+
+# ── Bearer tokens ───────────────────────────────────────────────────────
+
+def _serializer(app, salt):
+    return URLSafeTimedSerializer(app.secret_key, salt=salt)
+
+
+def _password_stamp(user):
+    """Changes whenever the password does, revoking refresh tokens issued before."""
+    return hashlib.sha256(user.password_hash.encode()).hexdigest()[:16]
+
+
+def issue_tokens(user):
+    """A fresh access/refresh token pair for ``user``, as the token endpoints return it."""
+    app = current_app
+    return {
+        'access_token': _serializer(app, ACCESS_SALT).dumps({'id': user.id, 'username': user.username}),
+        'refresh_token': _serializer(app, REFRESH_SALT).dumps({'id': user.id, 'stamp': _password_stamp(user)}),
+        'token_type': 'Bearer',
+        'expires_in': app.config['API_ACCESS_TOKEN_TTL'],
+    }
+
+
+def read_access_token(app, token):
+    """``(user id, username)`` from a valid access token, else ``None``."""
+    try:
+        data = _serializer(app, ACCESS_SALT).loads(token, max_age=app.config['API_ACCESS_TOKEN_TTL'])
+    except BadData:  # bad signature, expired or malformed
+        return None
+    return data['id'], data['username']
+
+
+def refresh_user(token):
+    """The user a refresh token belongs to, or ``None`` if it is invalid, expired or revoked."""
+    from app.models import User
+
+    try:
+        data = _serializer(current_app, REFRESH_SALT).loads(
+            token, max_age=current_app.config['API_REFRESH_TOKEN_TTL'])
+    except BadData:
+        return None
+    user = db.session.get(User, data['id'])
+    if user is None or data['stamp'] != _password_stamp(user):
+        return None
+    return user
+
+
+def bearer_token(request):
+    """The bearer token of an ``/api/*`` request, else ``None``."""
+    if not request.path.startswith('/api/'):
+        return None
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
+
+
+def load_user_from_request(request):
+    """Flask-Login request loader: the user of a valid bearer token."""
+    token = bearer_token(request)
+    claims = read_access_token(current_app, token) if token else None
+    return LoginUser(*claims) if claims else None
+
+
+def init_app(app):
+    """Register the user loaders and answer 401 from ``/api`` views."""
+    _users.ttl = app.config['USER_CACHE_TTL']
+    login_manager.user_loader(load_user)
+    login_manager.request_loader(load_user_from_request)
+    login_manager.blueprint_login_views['api'] = None  # no login page redirect — abort(401)
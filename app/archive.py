@@ -0,0 +1,115 @@
+"""Archiving of departed inventory, and lookups that see through it.
+
+Flights, trains and buses only ever grow, so departures that have left are
+moved — with their seat maps — into ``*_archive`` tables that share the
+live tables' columns and ids. Search queries then only scan upcoming
+departures, while bookings keep resolving their ``ref_id`` through
+``get_item`` / ``load_items``, which fall back to the archive.
+
+Archiving is run by the daily schedule roll (``python seed_data.py --roll``).
+"""
+from app.extensions import db
+from app.models import (
+    Flight, Train, Bus, Room, Seat,
+    ArchivedFlight, ArchivedTrain, ArchivedBus, ArchivedSeat,
+)
+
+ARCHIVES = {Flight: ArchivedFlight, Train: ArchivedTrain, Bus: ArchivedBus}
+
+VEHICLE_MODELS = {'flight': Flight, 'train': Train, 'bus': Bus}
+
+REF_MODELS = {**VEHICLE_MODELS, 'hotel': Room}
+
+
+# ── Lookups ──────────────────────────────────────────────────────────────
+
+def get_item(booking_type, ref_id):
+    """The flight/train/bus/room a booking refers to, live or archived."""
+    Model = REF_MODELS.get(booking_type)
+    if Model is None:
+        return None
+    item = db.session.get(Model, ref_id)
+    if item is None and Model in ARCHIVES:
+        item = db.session.get(ARCHIVES[Model], ref_id)
+    return item
+
+
+def load_items(bookings):
+    """Fetch the items many bookings refer to, one query per type and table.
+
+    Returns ``{(booking_type, ref_id): item}``; archived rows are only
+    queried for ids missing from the live table.
+    """
+    from sqlalchemy.orm import joinedload
+
+    ids_by_type = {}
+    for booking in bookings:
+        ids_by_type.setdefault(booking.booking_type, set()).add(booking.ref_id)
+
+    items = {}
+    for btype, ids in ids_by_type.items():
+        Model = REF_MODELS.get(btype)
+        if Model is None:
+            continue
+        query = Model.query.filter(Model.id.in_(ids))
+        if Model is Room:
+            query = query.options(joinedload(Room.hotel))
+        for item in query:
+            items[(btype, item.id)] = item
+
+        missing = [i for i in ids if (btype, i) not in items]
+        if missing and Model in ARCHIVES:
+            Archived = ARCHIVES[Model]
+            for item in Archived.query.filter(Archived.id.in_(missing)):
+                items[(btype, item.id)] = item
+    return items
+
+
+# ── Archiving ────────────────────────────────────────────────────────────
+
+def _move(conn, Source, Target, condition):
+    """Move rows matching ``condition`` from ``Source`` to ``Target``; returns how many.
+
+    On PostgreSQL one statement deletes the rows and inserts exactly those
+    (``WITH moved AS (DELETE ... RETURNING ...) INSERT ... SELECT``). Two
+    statements that each evaluated ``condition`` could delete a row that
+    committed in between without ever archiving it. SQLite can't put a
+    DELETE in a CTE, but it serializes writers: once the INSERT holds the
+    write lock, nothing can change before the DELETE.
+    """
+    cols = [c.name for c in Target.__table__.columns]
+    source_cols = [Source.__table__.c[c] for c in cols]
+    if conn.dialect.name == 'postgresql':
+        moved = db.delete(Source).where(condition).returning(*source_cols).cte('moved')
+        return conn.execute(
+            db.insert(Target).from_select(cols, db.select(*(moved.c[c] for c in cols))).add_cte(moved)
+        ).rowcount
+    rows = conn.execute(
+        db.insert(Target).from_select(cols, db.select(*source_cols).where(condition))
+    ).rowcount
+    conn.execute(db.delete(Source).where(condition))
+    return rows
+
+
+def archive_departed(conn, before):
+    """Move vehicles departed before ``before``, and their seats, to the archive.
+
+    Runs on a Core connection inside the caller's transaction, so a vehicle
+    and its seat map move together. Returns ``{model: (vehicles, seats)}``.
+    """
+    moved = {}
+    for vtype, Model in VEHICLE_MODELS.items():
+        departed = db.select(Model.id).where(Model.departure < before)
+        seats = _move(conn, Seat, ArchivedSeat,
+                      (Seat.vehicle_type == vtype) & Seat.vehicle_id.in_(departed))
+        vehicles = _move(conn, Model, ARCHIVES[Model], Model.departure < before)
+        moved[Model] = (vehicles, seats)
+    return moved
+
+
+def next_id(conn, Model):
+    """First id not used by ``Model`` or its archive."""
+    tables = [Model, ARCHIVES[Model]] if Model in ARCHIVES else [Model]
+    if Model is Seat:
+        tables.append(ArchivedSeat)
+    return max(conn.execute(db.select(db.func.max(t.id))).scalar() or 0 for t in tables) + 1
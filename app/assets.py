@@ -0,0 +1,317 @@
+"""Static asset pipeline — fingerprinted, minified and precompressed files.
+
+``flask build-assets`` reads ``app/static`` and writes ``app/static/dist``:
+
+* CSS and JS are minified (comments and indentation removed);
+* every file is renamed with a hash of its content, ``css/style.css`` →
+  ``dist/css/style.3f9c2a17b0e4.css``, and ``url(...)`` references in CSS
+  are rewritten to the hashed names;
+* text files get ``.gz`` and, with the ``brotli`` package installed,
+  ``.br`` siblings, compressed once at the highest level;
+* PNG/JPEG images are also encoded as WebP and AVIF at each of
+  ``IMAGE_WIDTHS`` up to the original width;
+* ``dist/manifest.json`` maps each source file to its output.
+
+With ``STATIC_HASHED`` on and a manifest present, ``url_for('static',
+filename='css/style.css')`` returns the hashed URL. Files under ``dist/``
+are served with ``Cache-Control: immutable`` for a year, since a new
+build gives changed files new names, and the precompressed variant the
+client accepts is sent as is. ``responsive_image()`` in templates renders
+a ``<picture>`` with the AVIF and WebP ``srcset``s. Without a manifest,
+everything falls back to the plain files.
+
+Run the build on deploy, before starting gunicorn. Old outputs are kept
+so pages rendered by workers that have not restarted yet still load;
+``--clean`` removes them.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import request, send_from_directory, url_for
+from markupsafe import Markup, escape
+
+try:
+    import brotli
+except ImportError:  # optional — gzip only
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+IMAGES = ('.png', '.jpg', '.jpeg')
+IMAGE_WIDTHS = (320, 640, 960, 1280)
+IMAGE_FORMATS = (('avif', {'quality': 55}), ('webp', {'quality': 80, 'method': 6}))
+
+_CSS_TOKEN = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/|\s+|[^"'/\s]+|/''', re.S)
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^') | {''}
+_JS_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete')
+
+
+# ── Minifiers ───────────────────────────────────────────────────────────
+
+def minify_css(text):
+    """Drop comments and collapse whitespace, leaving strings untouched."""
+    out = []
+    for token in _CSS_TOKEN.findall(text):
+        if token.startswith('/*'):
+            continue
+        if token.isspace():
+            if out and not out[-1].endswith(('{', '}', ';', ',', '>', ':', '(', ' ')):
+                out.append(' ')
+            continue
+        if out and out[-1] == ' ' and token[0] in '{};,>)':
+            out.pop()
+        if token[0] == '}' and out and out[-1].endswith(';'):
+            out[-1] = out[-1][:-1]
+        out.append(token)
+    return ''.join(out).strip()
+
+
+def minify_js(text):
+    """Drop comments and indentation; keep line breaks, so semicolon insertion is unchanged.
+
+    A small scanner rather than a regex, so strings, template literals and
+    regex literals containing ``//`` or ``/*`` survive.
+    """
+    out = []
+    i, n = 0, len(text)
+    last = ''  # last significant character or word written
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            space = '\n' if '\n' in text[i:j] else ' '
+            if out and out[-1].isspace():  # a comment was dropped in between
+                out[-1] = '\n' if '\n' in (out[-1], space) else ' '
+            elif out:
+                out.append(space)
+            i = j
+        elif text.startswith('//', i):
+            i = text.find('\n', i)
+            i = n if i == -1 else i
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif c in '\'"`':
+            j = i + 1
+            while j < n and text[j] != c:
+                j += 2 if text[j] == '\\' else 1
+            out.append(text[i:j + 1])
+            i, last = j + 1, c
+        elif c == '/' and (last in _JS_REGEX_AFTER or last in _JS_REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and (in_class or text[j] != '/'):
+                if text[j] == '\\':
+                    j += 1
+                elif text[j] in '[]':
+                    in_class = text[j] == '['
+                j += 1
+            j += 1
+            while j < n and text[j].isalpha():  # flags
+                j += 1
+            out.append(text[i:j])
+            i, last = j, '/'
+        elif c.isalnum() or c in '_$':
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in '_$'):
+                j += 1
+            out.append(text[i:j])
+            i, last = j, text[i:j]
+        else:
+            out.append(c)
+            i, last = i + 1, c
+    return ''.join(out).strip() + '\n'
+
+
+# ── Build ───────────────────────────────────────────────────────────────
+
+def _hashed_name(path, content):
+    stem, ext = posixpath.splitext(path)
+    return posixpath.join(DIST, f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}')
+
+
+def _rewrite_css_urls(source, css, files):
+    """Point ``url()`` references at the hashed copies of the files they name."""
+    here = posixpath.dirname(source)
+    out_dir = posixpath.join(DIST, here)
+
+    def replace(match):
+        quote, ref = match.groups()
+        if ref.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path = ref.partition('?')[0].partition('#')[0]
+        target = files.get(posixpath.normpath(posixpath.join(here, path)))
+        if target is None:
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(target, out_dir)}{quote})'
+
+    return _CSS_URL.sub(replace, css)
+
+
+def _image_variants(static_folder, source):
+    """Encode ``source`` as AVIF and WebP at each width.
+
+    Returns ``{'width': ..., 'height': ..., format: [(path, width), ...]}``.
+    """
+    from io import BytesIO
+    from PIL import Image, features
+
+    with Image.open(os.path.join(static_folder, source)) as image:
+        image.load()
+        variants = {'width': image.width, 'height': image.height}
+        widths = sorted({w for w in IMAGE_WIDTHS if w < image.width} | {image.width})
+        stem = posixpath.splitext(source)[0]
+        for fmt, options in IMAGE_FORMATS:
+            if not features.check(fmt):
+                continue
+            for w in widths:
+                resized = image if w == image.width else image.resize(
+                    (w, round(image.height * w / image.width)), Image.LANCZOS)
+                buffer = BytesIO()
+                resized.save(buffer, fmt.upper(), **options)
+                content = buffer.getvalue()
+                variants.setdefault(fmt, []).append((_write(static_folder, f'{stem}-{w}w.{fmt}', content), w))
+    return variants
+
+
+def _write(static_folder, source, content):
+    """Write ``content`` under its hashed name. Returns that name."""
+    name = _hashed_name(source, content)
+    path = os.path.join(static_folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return name
+
+
+def _compress(static_folder, name):
+    """Write ``.gz`` / ``.br`` siblings where they are smaller. Returns the encodings written."""
+    path = os.path.join(static_folder, name)
+    with open(path, 'rb') as f:
+        content = f.read()
+    encodings = []
+    variants = [('gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', lambda data: brotli.compress(data, quality=11)))
+    for encoding, suffix, compress in variants:
+        packed = compress(content)
+        if len(packed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(packed)
+            encodings.append(encoding)
+    return encodings
+
+
+def build(static_folder, clean=False):
+    """Build ``dist/`` from ``static_folder`` and write its manifest. Returns the manifest."""
+    dist = os.path.join(static_folder, DIST)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    sources = []
+    for root, dirs, names in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != DIST]
+        sources += [os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+                    for name in names]
+    # CSS last, so the files its url()s name already have hashed names
+    sources.sort(key=lambda source: (source.endswith('.css'), source))
+
+    files, images, encodings = {}, {}, {}
+    for source in sources:
+        with open(os.path.join(static_folder, source), 'rb') as f:
+            content = f.read()
+        ext = posixpath.splitext(source)[1].lower()
+        if ext == '.css':
+            content = _rewrite_css_urls(source, minify_css(content.decode()), files).encode()
+        elif ext == '.js':
+            content = minify_js(content.decode()).encode()
+        files[source] = name = _write(static_folder, source, content)
+        if ext in COMPRESSIBLE:
+            encodings[name] = _compress(static_folder, name)
+        elif ext in IMAGES:
+            images[source] = _image_variants(static_folder, source)
+
+    manifest = {'files': files, 'images': images, 'encodings': encodings}
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ── Serving ─────────────────────────────────────────────────────────────
+
+def responsive_image(filename, alt, sizes='100vw', **attrs):
+    """A ``<picture>`` with AVIF/WebP sources for a built image, else a plain ``<img>``."""
+    from flask import current_app
+
+    manifest = current_app.extensions.get('assets') or {}
+    image = manifest.get('images', {}).get(filename)
+    attributes = ''.join(f' {key.rstrip("_")}="{escape(value)}"' for key, value in attrs.items())
+    img = f'<img src="{url_for("static", filename=filename)}" alt="{escape(alt)}"{attributes}'
+    if not image:
+        return Markup(img + '>')
+    sources = ''.join(
+        f'<source type="image/{fmt}" sizes="{escape(sizes)}" srcset="'
+        + ', '.join(f'{url_for("static", filename=name)} {width}w' for name, width in image[fmt])
+        + '">'
+        for fmt, _ in IMAGE_FORMATS if image.get(fmt))
+    return Markup(f'<picture>{sources}{img} width="{image["width"]}" height="{image["height"]}"></picture>')
+
+
+def init_app(app):
+    """Hashed static URLs and far-future caching when a built manifest is present."""
+    manifest = load_manifest(app.static_folder) if app.config['STATIC_HASHED'] else None
+    app.extensions['assets'] = manifest
+    app.jinja_env.globals['responsive_image'] = responsive_image
+    if not manifest:
+        return
+
+    files = manifest['files']
+    encodings = manifest['encodings']
+    plain_static = app.view_functions['static']
+
+    @app.url_defaults
+    def _hashed_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in files:
+            values['filename'] = files[values['filename']]
+
+    def static(filename):
+        if not filename.startswith(DIST + '/') or filename == f'{DIST}/{MANIFEST}':
+            return plain_static(filename=filename)
+        accepted = request.accept_encodings
+        for encoding in encodings.get(filename, ()):
+            if accepted[encoding]:
+                response = send_from_directory(
+                    app.static_folder, filename + ('.br' if encoding == 'br' else '.gz'),
+                    mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename)
+        if filename in encodings:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = static
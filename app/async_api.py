@@ -0,0 +1,412 @@
+"""Async JSON API — search, seat maps and booking on an async SQLAlchemy engine.
+
+Served next to the Flask app by ``asgi.py`` (``uvicorn asgi:app``): paths
+under ``/api/v2/`` are handled here on the event loop, everything else is
+passed to Flask through asgiref's WSGI adapter. While a request waits on
+the database it holds no thread, so one worker can keep thousands of
+requests in flight.
+
+    GET  /api/v2/<flights|trains|buses>/search?origin=&destination=&date=YYYY-MM-DD
+    GET  /api/v2/seats/<flight|train|bus>/<id>
+    GET  /api/v2/seats/<flight|train|bus>/<id>/events   (server-sent events)
+    POST /api/v2/<flights|trains|buses>/<id>/book
+         {"passengers": ["..."], "seat_ids": [1, 2], "travel_class": "3A", "seat_preference": "window"}
+
+It uses the same models as the Flask app and authenticates with the
+Flask session cookie, so a user logged in on the site can book here, or
+with a bearer token from ``POST /api/auth/token`` (app/api_auth.py).
+Booking requires a JSON body — cross-site forms cannot send one.
+Booking follows the site's rules (``booking_service``): at most one seat
+per passenger, a class for trains, and a party without picked seats is
+seated together from the worker's seat index.
+
+The events stream pushes seats booked and released on a vehicle as they
+happen (see app/seat_events.py). Each open stream is a coroutine waiting
+on the worker's channel, so a popular vehicle can have thousands of them.
+
+Needs the async extras: ``pip install "sqlalchemy[asyncio]" aiosqlite
+uvicorn asgiref`` (``asyncpg`` instead of ``aiosqlite`` on PostgreSQL).
+"""
+import asyncio
+import json
+import re
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import sqlalchemy as sa
+
+from app.fares import TRANSPORT_MODELS, departure_window, route_filters
+from app import api_auth, booking_service, seat_events
+from app.booking_service import BookingError, SeatTakenError
+from app.metrics import SEARCHES
+from app.seat_allocation import cached_index, free_seats_query, seat_needs, store_index
+from app.models import Booking, Seat, Train, User
+
+MODE_PLURALS = {'flights': 'flight', 'trains': 'train', 'buses': 'bus'}
+SEARCH_LIMIT = 50
+
+_ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_database_url(url):
+    """Map a sync database URL onto its asyncio driver."""
+    scheme, rest = url.split('://', 1)
+    return f"{_ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def async_engine_options(config, url):
+    """The sync engine's pool settings, with connect arguments the async driver understands.
+
+    psycopg2 takes the statement timeout as a libpq ``options`` string;
+    asyncpg has no such argument and takes server settings instead.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if url.startswith('postgresql+asyncpg') and 'connect_args' in options:
+        options['connect_args'] = {
+            'server_settings': {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS'])},
+        }
+    return options
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class AsyncAPI:
+    """Minimal ASGI app for the ``/api/v2`` routes."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.engine = None
+        self.sessions = None
+        self._serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.routes = [
+            ('GET', re.compile(r'^/api/v2/(flights|trains|buses)/search$'), self.search),
+            ('GET', re.compile(r'^/api/v2/seats/(flight|train|bus)/(\d+)$'), self.seats),
+            ('POST', re.compile(r'^/api/v2/(flights|trains|buses)/(\d+)/book$'), self.book),
+        ]
+        # Routes that write their own (streamed) response
+        self.streams = [
+            ('GET', re.compile(r'^/api/v2/seats/(flight|train|bus)/(\d+)/events$'), self.seat_events),
+        ]
+
+    # ── Engine ──
+
+    def start(self):
+        """Create the async engine — call from inside the worker's event loop."""
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.extensions import apply_sqlite_pragmas
+
+        config = self.flask_app.config
+        url = config.get('ASYNC_DATABASE_URL') or async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(url, **async_engine_options(config, url))
+        if self.engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(self.engine.sync_engine, config['SQLITE_BUSY_TIMEOUT_MS'])
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def check(self):
+        """Open a connection; returns ``(dialect, statement timeout or None)``."""
+        if self.engine is None:
+            self.start()
+        async with self.engine.connect() as conn:
+            await conn.execute(sa.text('SELECT 1'))
+            timeout = None
+            if self.engine.dialect.name == 'postgresql':
+                timeout = (await conn.execute(sa.text('SHOW statement_timeout'))).scalar()
+        return self.engine.dialect.name, timeout
+
+    async def stop(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    # ── ASGI ──
+
+    async def __call__(self, scope, receive, send):
+        if self.engine is None:
+            self.start()
+        for method, pattern, handler in self.streams:
+            match = pattern.match(scope['path'])
+            if match and scope['method'] == method:
+                return await handler(scope, receive, send, *match.groups())
+        try:
+            for method, pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match:
+                    if scope['method'] != method:
+                        raise HTTPError(405, 'Method not allowed')
+                    status, payload = await handler(scope, receive, *match.groups())
+                    break
+            else:
+                raise HTTPError(404, 'Not found')
+        except HTTPError as exc:
+            status, payload = exc.status, {'error': exc.message}
+        await _send_json(send, status, payload)
+
+    def _user_id(self, scope):
+        """The logged-in user's id from a bearer token or the Flask session cookie, or None."""
+        cookies = SimpleCookie()
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                scheme, _, token = value.decode('latin-1').partition(' ')
+                if scheme.lower() == 'bearer':
+                    claims = api_auth.read_access_token(self.flask_app, token.strip())
+                    return claims[0] if claims else None
+            elif name == b'cookie':
+                cookies.load(value.decode('latin-1'))
+        morsel = cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        if morsel is None or self._serializer is None:
+            return None
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            data = self._serializer.loads(morsel.value, max_age=max_age)
+        except Exception:  # bad signature, expired or malformed
+            return None
+        user_id = data.get('_user_id')
+        return int(user_id) if user_id and str(user_id).isdigit() else None
+
+    # ── Handlers ──
+
+    async def search(self, scope, receive, plural):
+        mode = MODE_PLURALS[plural]
+        Model = TRANSPORT_MODELS[mode]
+        args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        origin, destination = args.get('origin', '').strip(), args.get('destination', '').strip()
+        if not origin or not destination:
+            raise HTTPError(400, 'origin and destination are required')
+        SEARCHES.labels(mode).inc()
+
+        filters = route_filters(mode, origin, destination)
+        if args.get('date'):
+            try:
+                day = datetime.strptime(args['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise HTTPError(400, 'date must be YYYY-MM-DD')
+            filters += departure_window(Model, day, day)
+        else:
+            filters.append(Model.departure >= datetime.now())
+
+        async with self.sessions() as session:
+            rows = (await session.execute(
+                sa.select(Model).where(*filters, Model.seats_available > 0)
+                .order_by(Model.departure).limit(SEARCH_LIMIT)
+            )).scalars().all()
+        return 200, {'results': [row.to_dict() for row in rows]}
+
+    async def seats(self, scope, receive, mode, vehicle_id):
+        async with self.sessions() as session:
+            seats = (await session.execute(
+                sa.select(Seat).where(Seat.vehicle_type == mode, Seat.vehicle_id == int(vehicle_id))
+                .order_by(Seat.row, Seat.col)
+            )).scalars().all()
+        booked = sum(1 for s in seats if s.is_booked)
+        return 200, {
+            'vehicle_type': mode,
+            'vehicle_id': int(vehicle_id),
+            'seats': [s.to_dict() for s in seats],
+            'total': len(seats),
+            'booked': booked,
+            'available': len(seats) - booked,
+        }
+
+    async def book(self, scope, receive, plural, vehicle_id):
+        """Book with the same rules as ``booking_service.book_transport``."""
+        user_id = self._user_id(scope)
+        if user_id is None:
+            raise HTTPError(401, 'Login required')
+        data = await _read_json(scope, receive)
+
+        mode = MODE_PLURALS[plural]
+        vehicle_id = int(vehicle_id)
+        preference = data.get('seat_preference')
+        if preference not in (None, 'window', 'lower'):
+            raise HTTPError(400, 'seat_preference must be window or lower')
+        try:
+            Model, seat_ids, booking = booking_service.transport_booking(
+                mode, vehicle_id, user_id, data.get('passengers', []), data.get('seat_ids', []),
+                data.get('travel_class'))
+            if seat_ids:
+                booking_id, total_price = await self._commit(Model, vehicle_id, seat_ids, None, booking)
+            else:
+                passengers = json.loads(booking['passenger_names'])
+                booking_id, total_price = await self._book_seated(Model, vehicle_id, passengers, preference, booking)
+        except BookingError as exc:
+            raise HTTPError(exc.status, exc.message)
+
+        return 201, {
+            'booking_id': booking_id,
+            'status': booking['status'],
+            'total_price': total_price,
+            'checkout_url': f'/payment/{booking_id}',
+        }
+
+    async def _book_seated(self, Model, vehicle_id, passengers, preference, booking):
+        """Seat the party together from this worker's seat index, reloading it once if stale."""
+        mode = booking['booking_type']
+        ages = ()
+        if Model is Train:
+            async with self.sessions() as session:
+                rows = (await session.execute(booking_service.saved_ages_query(booking['user_id']))).all()
+            ages = booking_service.passenger_ages(rows, passengers)
+        needs = seat_needs(mode, booking['num_guests'], preference, ages)
+        for refresh in (False, True):
+            index = None if refresh else cached_index(mode, vehicle_id)
+            if index is None:
+                async with self.sessions() as session:
+                    free = (await session.execute(free_seats_query(mode, vehicle_id))).all()
+                index = store_index(mode, vehicle_id, free)
+            seats = index.allocate(needs) or []
+            try:
+                return await self._commit(Model, vehicle_id, [s.id for s in seats],
+                                          [s.seat_label for s in seats], booking)
+            except SeatTakenError:
+                continue  # booked by another worker: reload the index and try again
+            except BookingError:
+                index.release(seats)
+                raise
+        # Still racing for the same seats — book now, seats can be picked later
+        return await self._commit(Model, vehicle_id, [], None, booking)
+
+    async def _commit(self, Model, vehicle_id, seat_ids, labels, booking):
+        """Decrement, insert and claim in one transaction; returns ``(booking id, total price)``."""
+        mode, num = booking['booking_type'], booking['num_guests']
+        async with self.sessions() as session, session.begin():
+            if await session.get(User, booking['user_id']) is None:
+                raise HTTPError(401, 'Login required')
+            row = (await session.execute(booking_service.inventory_decrement(Model, vehicle_id, num))).first()
+            fare = booking_service.fare_from(Model, row[0], booking['travel_class']) if row else 0
+            if not fare:
+                exists = row is not None or await session.get(Model, vehicle_id) is not None
+                raise booking_service.booking_failure(Model, exists, row is not None, fare)
+
+            if seat_ids and labels is None:
+                labels = (await session.execute(
+                    booking_service.picked_labels_query(mode, vehicle_id, seat_ids))).scalars().all()
+                if len(labels) != len(seat_ids):
+                    raise SeatTakenError()
+            booking_id = (await session.execute(
+                sa.insert(Booking)
+                .values(**booking, total_price=fare * num, seat_numbers=json.dumps(labels) if labels else None)
+                .returning(Booking.id)
+            )).scalar_one()
+            if seat_ids:
+                # Conditional on the seats still being free; any miss rolls the booking back
+                result = await session.execute(booking_service.seat_claim(mode, vehicle_id, seat_ids, booking_id))
+                if result.rowcount != len(seat_ids):
+                    raise SeatTakenError()
+
+        booking_service.seats_booked(mode, vehicle_id, seat_ids)
+        return booking_id, fare * num
+
+    async def seat_events(self, scope, receive, send, mode, vehicle_id):
+        """Stream seat deltas for one vehicle until the client goes away.
+
+        Events: ``seats`` (``{"booked": [ids], "released": [ids]}``) and
+        ``resync`` (deltas were missed, reload the map). A comment line
+        every ``SEAT_EVENTS_KEEPALIVE`` seconds keeps proxies from
+        closing an idle stream.
+        """
+        hub = seat_events.hub
+        keepalive = self.flask_app.config['SEAT_EVENTS_KEEPALIVE']
+        loop = asyncio.get_running_loop()
+        key, seq = seat_events.subscribe(mode, int(vehicle_id))
+        last_id = dict(scope.get('headers', [])).get(b'last-event-id')
+        pending = [b'retry: 3000\n\n']
+        if last_id is not None:
+            resumed = hub.parse_id(key, last_id.decode('latin-1'))
+            if resumed is None:
+                pending.append(seat_events.frame('resync', {}))
+            else:
+                seq = resumed
+        disconnected = asyncio.ensure_future(_disconnected(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),  # nginx: pass events through unbuffered
+            ]})
+            while True:
+                frames, seq = hub.since(key, seq)
+                pending += frames if frames is not None else [seat_events.frame('resync', {})]
+                if pending:
+                    await send({'type': 'http.response.body', 'body': b''.join(pending), 'more_body': True})
+                    pending = []
+                    continue
+                waiter = hub.wait(key, seq, loop)
+                if waiter is None:
+                    continue
+                done, _ = await asyncio.wait({waiter, disconnected}, timeout=keepalive,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    break
+                if not done:
+                    pending.append(b': keepalive\n\n')
+        except OSError:
+            pass  # client went away mid-write
+        finally:
+            disconnected.cancel()
+            hub.leave(key)
+
+
+# ── ASGI plumbing ──
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _read_json(scope, receive):
+    content_type = dict(scope.get('headers', [])).get(b'content-type', b'')
+    if not content_type.startswith(b'application/json'):
+        raise HTTPError(415, 'Expected an application/json body')
+    body, more = b'', True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, 'Invalid JSON')
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'Expected a JSON object')
+    return data
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def make_asgi_app(flask_app, prefix='/api/v2/'):
+    """ASGI app: ``prefix`` routes go to :class:`AsyncAPI`, the rest to Flask."""
+    from asgiref.wsgi import WsgiToAsgi
+
+    api = AsyncAPI(flask_app)
+    wsgi = WsgiToAsgi(flask_app)
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    api.start()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await api.stop()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        elif scope['type'] == 'http' and scope['path'].startswith(prefix):
+            await api(scope, receive, send)
+        else:
+            await wsgi(scope, receive, send)
+
+    app.api = api
+    return app
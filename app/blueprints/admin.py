@@ -0,0 +1,41 @@
+"""Admin blueprint — captured request profiles (app/profiler.py)."""
+import os
+import re
+from functools import wraps
+from flask import Blueprint, abort, current_app, render_template, send_from_directory
+from flask_login import current_user, login_required
+
+admin_bp = Blueprint('admin', __name__)
+
+_CAPTURE_FILE = re.compile(r'^[\w-]+\.(collapsed|speedscope\.json)$')
+
+
+def admin_required(view):
+    """Logged in and listed in ``ADMIN_USERS``."""
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if not current_user.is_admin:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/profiles')
+@admin_required
+def profiles():
+    """The slowest captured requests, across every worker."""
+    from app.profiler import list_captures
+
+    captures = list_captures(current_app.config['PROFILE_DIR'], limit=100)
+    return render_template('admin/profiles.html', captures=captures)
+
+
+@admin_bp.route('/profiles/<folder>/<filename>')
+@admin_required
+def profile_file(folder, filename):
+    """Download a capture's collapsed stacks or speedscope profile."""
+    if not _CAPTURE_FILE.match(filename) or folder in ('.', '..'):
+        abort(404)
+    return send_from_directory(os.path.join(current_app.config['PROFILE_DIR'], folder),
+                               filename, as_attachment=True)
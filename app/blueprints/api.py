@@ -1,23 +1,148 @@
-"""API blueprint — JSON endpoints for autocomplete, reviews, and fare calendar."""
-from flask import Blueprint, jsonify, request
+"""API blueprint — JSON endpoints for autocomplete, reviews, fare calendar and group bookings."""
+import hashlib
+import json
+from functools import lru_cache
+
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
-from app.city_lookup import search_cities
+from app.db_routing import read_replica
+from app.city_lookup import FULL_LIST_MAX_PREFIX, city_candidates, search_cities
 
 api_bp = Blueprint('api', __name__)
 
 
+@lru_cache(maxsize=2048)
+def _cities_body(query, full):
+    """JSON body and ETag of one autocomplete answer, memoized — the gazetteer is static."""
+    if full and len(query) <= FULL_LIST_MAX_PREFIX:
+        results = [{'city': city, 'code': code} for city, code in city_candidates(query)]
+    else:
+        results = search_cities(query)
+    body = json.dumps(results, ensure_ascii=False, separators=(',', ':'))
+    return body, hashlib.sha1(body.encode()).hexdigest()[:16]
+
+
 @api_bp.route('/cities', methods=['GET'])
 def cities_autocomplete():
     """Return city suggestions for autocomplete.
 
-    GET /api/cities?q=ahm  →  [{"city": "Ahmedabad", "code": "AMD"}, ...]
+    GET /api/cities?q=ahm         →  [{"city": "Ahmedabad", "code": "AMD"}, ...]  (top 8, one per code)
+    GET /api/cities?q=a&full=1    →  every city or alias matching a 1-2 letter prefix
+
+    The ``full`` list lets the browser filter longer prefixes itself.
+    Answers carry an ETag and may be cached for ``AUTOCOMPLETE_MAX_AGE``.
+    """
+    query = request.args.get('q', '').strip().lower()
+    body, etag = _cities_body(query, request.args.get('full') == '1')
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['AUTOCOMPLETE_MAX_AGE']
+    return response.make_conditional(request)
+
+
+# ── Tokens ──
+# Bearer tokens for API clients that do not keep the session cookie
+# (app/api_auth.py): a short-lived access token and a refresh token.
+
+def _token_response(user):
+    from app.api_auth import issue_tokens
+
+    response = jsonify(issue_tokens(user))
+    response.cache_control.no_store = True
+    return response
+
+
+@api_bp.route('/auth/token', methods=['POST'])
+def issue_token():
+    """Exchange an email and password for an access and a refresh token.
+
+    POST /api/auth/token  {"email": "...", "password": "..."}
     """
-    query = request.args.get('q', '').strip()
-    results = search_cities(query)
-    return jsonify(results)
+    from app.models import User
+
+    if not request.is_json:
+        return jsonify({'error': 'Expected an application/json body'}), 415
+    data = request.get_json(silent=True) or {}
+    user = User.query.filter_by(email=str(data.get('email', '')).strip()).first()
+    if user is None or not user.check_password(str(data.get('password', ''))):
+        return jsonify({'error': 'Invalid email or password'}), 401
+    return _token_response(user)
+
+
+@api_bp.route('/auth/refresh', methods=['POST'])
+def refresh_token():
+    """Trade a refresh token for a new token pair.
+
+    POST /api/auth/refresh  {"refresh_token": "..."}
+    """
+    from app.api_auth import refresh_user
+
+    if not request.is_json:
+        return jsonify({'error': 'Expected an application/json body'}), 415
+    data = request.get_json(silent=True) or {}
+    user = refresh_user(str(data.get('refresh_token', '')))
+    if user is None:
+        return jsonify({'error': 'Invalid or expired refresh token'}), 401
+    return _token_response(user)
 
 
 # ── Reviews ──
+# Each new review bumps a RatingSummary row for the item (count, sum and
+# star histogram) and the denormalized rating columns on the reviewed
+# flight/train/bus/hotel, so reads never aggregate the reviews table.
+
+REVIEW_PAGE_SIZE = 20
+REVIEW_PAGE_MAX = 100
+
+
+def _record_rating(booking_type, ref_id, rating):
+    """Add one rating to the item's summary and its denormalized columns."""
+    from sqlalchemy.exc import IntegrityError
+    from app.archive import ARCHIVES
+    from app.extensions import db
+    from app.models import RatingSummary, Flight, Train, Bus, Hotel, Room
+
+    star_col = f'stars_{rating}'
+    bump = {
+        'rating_count': RatingSummary.rating_count + 1,
+        'rating_sum': RatingSummary.rating_sum + rating,
+        star_col: getattr(RatingSummary, star_col) + 1,
+    }
+    item_filter = (RatingSummary.booking_type == booking_type, RatingSummary.ref_id == ref_id)
+    result = db.session.execute(db.update(RatingSummary).where(*item_filter).values(**bump))
+    if result.rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(RatingSummary(booking_type=booking_type, ref_id=ref_id,
+                                             rating_count=1, rating_sum=rating, **{star_col: 1}))
+        except IntegrityError:
+            # Another request created the row first — fall back to the update
+            db.session.execute(db.update(RatingSummary).where(*item_filter).values(**bump))
+
+    # Hotel reviews reference a room; the rating rolls up to its hotel
+    if booking_type == 'hotel':
+        Model = Hotel
+        target = db.select(Room.hotel_id).where(Room.id == ref_id).scalar_subquery()
+    else:
+        Model = {'flight': Flight, 'train': Train, 'bus': Bus}[booking_type]
+        target = ref_id
+    result = db.session.execute(
+        db.update(Model).where(Model.id == target).values(
+            rating_count=Model.rating_count + 1,
+            rating_sum=Model.rating_sum + rating,
+        )
+    )
+    # Reviews usually arrive after the trip, once the departure is archived
+    if result.rowcount == 0 and Model in ARCHIVES:
+        Archived = ARCHIVES[Model]
+        db.session.execute(
+            db.update(Archived).where(Archived.id == target).values(
+                rating_count=Archived.rating_count + 1,
+                rating_sum=Archived.rating_sum + rating,
+            )
+        )
+
 
 @api_bp.route('/reviews', methods=['POST'])
 @login_required
@@ -34,6 +159,10 @@ def create_review():
 
     if not booking_type or not ref_id or not rating:
         return jsonify({'error': 'booking_type, ref_id, and rating are required'}), 400
+    if booking_type not in ('flight', 'train', 'bus', 'hotel'):
+        return jsonify({'error': 'booking_type must be flight, train, bus, or hotel'}), 400
+    if not isinstance(ref_id, int):
+        return jsonify({'error': 'ref_id must be an integer'}), 400
     if not isinstance(rating, int) or rating < 1 or rating > 5:
         return jsonify({'error': 'rating must be 1-5'}), 400
 
@@ -51,50 +180,78 @@ def create_review():
         comment=comment,
     )
     db.session.add(review)
+    _record_rating(booking_type, ref_id, rating)
     db.session.commit()
-    return jsonify(review.to_dict()), 201
+    return jsonify(review.to_dict(username=current_user.username)), 201
 
 
 @api_bp.route('/reviews', methods=['GET'])
+@read_replica
 def get_reviews():
-    """Get reviews for a specific item.
+    """Get reviews for a specific item, newest first, with keyset pagination.
 
-    GET /api/reviews?type=flight&ref_id=42
+    GET /api/reviews?type=flight&ref_id=42[&limit=20][&cursor=<next_cursor>]
     """
-    from app.models import Review
-    from sqlalchemy import func
+    import base64
+    from datetime import datetime
+    from app.extensions import db
+    from app.models import Review, RatingSummary, User
 
     booking_type = request.args.get('type', '').strip()
     ref_id = request.args.get('ref_id', type=int)
+    limit = min(max(request.args.get('limit', REVIEW_PAGE_SIZE, type=int), 1), REVIEW_PAGE_MAX)
+    cursor = request.args.get('cursor', '').strip()
 
     if not booking_type or ref_id is None:
         return jsonify({'error': 'type and ref_id are required'}), 400
 
-    reviews = Review.query.filter_by(booking_type=booking_type, ref_id=ref_id)\
-        .order_by(Review.created_at.desc()).all()
-
-    avg_q = Review.query.filter_by(booking_type=booking_type, ref_id=ref_id)\
-        .with_entities(func.avg(Review.rating)).scalar()
+    query = db.session.query(Review, User.username)\
+        .join(User, User.id == Review.user_id)\
+        .filter(Review.booking_type == booking_type, Review.ref_id == ref_id)
+
+    if cursor:
+        # Cursor encodes (created_at, id) of the last review on the previous page
+        try:
+            created_str, id_str = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('_', 1)
+            last_created, last_id = datetime.fromisoformat(created_str), int(id_str)
+        except ValueError:
+            return jsonify({'error': 'invalid cursor'}), 400
+        query = query.filter(db.or_(
+            Review.created_at < last_created,
+            db.and_(Review.created_at == last_created, Review.id < last_id),
+        ))
+
+    rows = query.order_by(Review.created_at.desc(), Review.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = base64.urlsafe_b64encode(f'{last.created_at.isoformat()}_{last.id}'.encode()).decode()
+
+    summary = RatingSummary.query.filter_by(booking_type=booking_type, ref_id=ref_id).first()
 
     return jsonify({
-        'reviews': [r.to_dict() for r in reviews],
-        'count': len(reviews),
-        'avg_rating': round(float(avg_q), 1) if avg_q else None,
+        'reviews': [review.to_dict(username=username) for review, username in rows],
+        'count': summary.rating_count if summary else 0,
+        'avg_rating': summary.avg_rating() if summary else None,
+        'histogram': summary.histogram() if summary else {star: 0 for star in range(1, 6)},
+        'next_cursor': next_cursor,
     })
 
 
 # ── Fare Calendar ──
 
 @api_bp.route('/calendar', methods=['GET'])
+@read_replica
 def fare_calendar():
     """Return cheapest fare per day for a route+month.
 
     GET /api/calendar?type=flight&origin=DEL&destination=BOM&month=2026-03
     """
     from datetime import datetime, timedelta
-    from sqlalchemy import func
-    from app.models import Flight, Train, Bus
     from app.city_lookup import resolve_city_to_iata
+    from app.fares import TRANSPORT_MODELS, fare_calendar as calendar_days
 
     btype = request.args.get('type', 'flight').strip().lower()
     origin_raw = request.args.get('origin', '').strip()
@@ -118,41 +275,98 @@ def fare_calendar():
     else:
         month_end = month_start.replace(month=month_start.month + 1, day=1) - timedelta(days=1)
 
-    # Select model
-    model_map = {'flight': Flight, 'train': Train, 'bus': Bus}
-    Model = model_map.get(btype)
-    if not Model:
+    if btype not in TRANSPORT_MODELS:
         return jsonify({'error': 'type must be flight, train, or bus'}), 400
 
-    # Flights use IATA codes; trains/buses store full station/city names
-    if btype == 'flight':
-        origin_filter = func.upper(Model.origin) == origin
-        dest_filter = func.upper(Model.destination) == destination
-    else:
-        # Fuzzy match on city name for trains and buses
-        origin_filter = func.lower(Model.origin).contains(origin_raw.lower())
-        dest_filter = func.lower(Model.destination).contains(dest_raw.lower())
-
-    results = Model.query.filter(
-        origin_filter,
-        dest_filter,
-        func.date(Model.departure) >= month_start,
-        func.date(Model.departure) <= month_end,
-    ).all()
-
-    # Group by day
-    days = {}
-    for item in results:
-        day = item.departure.date().isoformat()
-        if day not in days:
-            days[day] = {'date': day, 'min_price': item.price, 'count': 0}
-        days[day]['min_price'] = min(days[day]['min_price'], item.price)
-        days[day]['count'] += 1
+    days = calendar_days(btype, origin_raw, dest_raw, month_start, month_end)
 
     return jsonify({
         'origin': origin,
         'destination': destination,
         'month': month_str,
         'type': btype,
-        'days': sorted(days.values(), key=lambda d: d['date']),
+        'days': days,
     })
+
+
+# ── Group Bookings ──
+# For travel agents: many passengers across several vehicles and rooms,
+# reserved all-or-nothing in one transaction under one group PNR, with
+# seats assigned together (app/booking_service.book_group).
+
+def _group_summary(group_pnr, bookings):
+    return {
+        'group_pnr': group_pnr,
+        'status': 'Confirmed' if all(b.status == 'Confirmed' for b in bookings) else 'Pending',
+        'total_price': sum(b.total_price for b in bookings),
+        'passengers': sum(b.num_guests or 0 for b in bookings),
+        'bookings': [dict(b.to_dict(), seat_numbers=b.get_seat_labels()) for b in bookings],
+    }
+
+
+def _group_bookings(group_pnr):
+    from app.models import Booking
+
+    return Booking.query.filter_by(group_pnr=group_pnr.upper(), user_id=current_user.id)\
+        .order_by(Booking.id).all()
+
+
+@api_bp.route('/bookings/group', methods=['POST'])
+@login_required
+def create_group_booking():
+    """Reserve every item of a group in one transaction.
+
+    POST /api/bookings/group  {"items": [{"type": "flight", "id": 7,
+    "passengers": ["Asha", {"name": "Ravi", "age": 67}]}, ...]}
+    """
+    from app.booking_service import BookingError, book_group, parse_group_items
+    from app.models import Booking
+
+    # A JSON body is required — cross-site forms cannot send one
+    if not request.is_json:
+        return jsonify({'error': 'Expected an application/json body'}), 415
+    try:
+        items = parse_group_items(
+            request.get_json(silent=True) or {},
+            current_app.config['GROUP_BOOKING_MAX_ITEMS'],
+            current_app.config['GROUP_BOOKING_MAX_PASSENGERS'],
+        )
+        group_pnr, booking_ids = book_group(current_user.id, items)
+    except BookingError as exc:
+        return jsonify({'error': exc.message}), exc.status
+
+    by_id = {b.id: b for b in Booking.query.filter(Booking.id.in_(booking_ids))}
+    return jsonify(_group_summary(group_pnr, [by_id[i] for i in booking_ids])), 201
+
+
+@api_bp.route('/bookings/group/<group_pnr>', methods=['GET'])
+@login_required
+def get_group_booking(group_pnr):
+    """Return a group booking's items, seats and total."""
+    bookings = _group_bookings(group_pnr)
+    if not bookings:
+        return jsonify({'error': 'Group booking not found'}), 404
+    return jsonify(_group_summary(bookings[0].group_pnr, bookings))
+
+
+@api_bp.route('/bookings/group/<group_pnr>/confirm', methods=['POST'])
+@login_required
+def confirm_group_booking(group_pnr):
+    """Mock payment for a whole group — confirms every pending item."""
+    from app.blueprints.payment import _generate_pnr
+    from app.extensions import db
+    from app.metrics import CONFIRMATIONS
+
+    if not request.is_json:
+        return jsonify({'error': 'Expected an application/json body'}), 415
+    bookings = _group_bookings(group_pnr)
+    if not bookings:
+        return jsonify({'error': 'Group booking not found'}), 404
+    confirmed = [b for b in bookings if b.status == 'Pending']
+    for booking in confirmed:
+        booking.status = 'Confirmed'
+        booking.pnr = _generate_pnr()
+    db.session.commit()
+    for booking in confirmed:
+        CONFIRMATIONS.labels(booking.booking_type).inc()
+    return jsonify(_group_summary(bookings[0].group_pnr, bookings))
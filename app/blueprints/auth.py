@@ -4,7 +4,8 @@ import time
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from app.extensions import db
-from app.models import User, Booking, Flight, Train, Bus, Hotel, Room
+from app.archive import load_items
+from app.models import User, Booking
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -92,6 +93,8 @@ def profile():
     """Return user profile with booking history and travel stats."""
     bookings = Booking.query.filter_by(user_id=current_user.id)\
         .order_by(Booking.created_at.desc()).all()
+    # One query per booking type; departed items resolve from the archive
+    items = load_items(bookings)
 
     # --- Compute Travel Stats ---
     confirmed = [b for b in bookings if b.status == 'Confirmed']
@@ -103,19 +106,19 @@ def profile():
     for b in confirmed:
         city = None
         if b.booking_type == 'flight':
-            item = Flight.query.get(b.ref_id)
+            item = items.get(('flight', b.ref_id))
             if item:
                 city = item.destination
         elif b.booking_type == 'train':
-            item = Train.query.get(b.ref_id)
+            item = items.get(('train', b.ref_id))
             if item:
                 city = item.destination
         elif b.booking_type == 'bus':
-            item = Bus.query.get(b.ref_id)
+            item = items.get(('bus', b.ref_id))
             if item:
                 city = item.destination
         elif b.booking_type == 'hotel':
-            room = Room.query.get(b.ref_id)
+            room = items.get(('hotel', b.ref_id))
             if room:
                 city = room.hotel.city
         if city:
@@ -139,7 +142,7 @@ def profile():
     for b in bookings:
         detail = {}
         if b.booking_type == 'flight':
-            item = Flight.query.get(b.ref_id)
+            item = items.get(('flight', b.ref_id))
             if item:
                 detail = {
                     'label': f'{item.airline} {item.flight_number}',
@@ -147,7 +150,7 @@ def profile():
                     'date': item.departure.isoformat(),
                 }
         elif b.booking_type == 'train':
-            item = Train.query.get(b.ref_id)
+            item = items.get(('train', b.ref_id))
             if item:
                 detail = {
                     'label': f'{item.name} ({item.train_number})',
@@ -155,7 +158,7 @@ def profile():
                     'date': item.departure.isoformat(),
                 }
         elif b.booking_type == 'bus':
-            item = Bus.query.get(b.ref_id)
+            item = items.get(('bus', b.ref_id))
             if item:
                 detail = {
                     'label': item.operator,
@@ -163,7 +166,7 @@ def profile():
                     'date': item.departure.isoformat(),
                 }
         elif b.booking_type == 'hotel':
-            room = Room.query.get(b.ref_id)
+            room = items.get(('hotel', b.ref_id))
             if room:
                 detail = {
                     'label': f'{room.hotel.name} — {room.room_type}',
@@ -187,29 +190,13 @@ def cancel_booking(booking_id):
         flash('Unauthorized action.', 'error')
         return redirect(url_for('auth.profile'))
 
-    if booking.status == 'Cancelled':
-        flash('This booking is already cancelled.', 'error')
+    # Status flip and inventory restore are atomic UPDATEs — see booking_service
+    from app.booking_service import BookingError, cancel_booking
+    try:
+        cancel_booking(booking.id)
+    except BookingError as exc:
+        flash(exc.message, 'error')
         return redirect(url_for('auth.profile'))
-        
-    booking.status = 'Cancelled'
-    # Restore seat / room availability
-    if booking.booking_type == 'flight':
-        flight = Flight.query.get(booking.ref_id)
-        if flight:
-            flight.seats_available += booking.num_guests
-    elif booking.booking_type == 'train':
-        train = Train.query.get(booking.ref_id)
-        if train:
-            train.seats_available += booking.num_guests
-    elif booking.booking_type == 'bus':
-        bus = Bus.query.get(booking.ref_id)
-        if bus:
-            bus.seats_available += booking.num_guests
-    elif booking.booking_type == 'hotel':
-        room = Room.query.get(booking.ref_id)
-        if room:
-            room.rooms_available += 1
-
-    db.session.commit()
+
     flash('Booking cancelled successfully.', 'success')
     return redirect(url_for('auth.profile'))
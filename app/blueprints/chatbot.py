@@ -1,10 +1,17 @@
 """Chatbot blueprint — smart rule-based travel assistant.
 
 Uses scored keyword matching so specific intents (destinations) always
-beat generic ones (greetings) even when both keywords appear.
+beat generic ones (greetings) even when both keywords appear. Questions
+naming a travel mode and a city are answered from live inventory.
 """
+import json
 import random
-from flask import Blueprint, jsonify, request
+import re
+from datetime import date, timedelta
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from app.cache import TTLCache
+from app.city_lookup import find_cities
+from app.fares import cheapest_departures, cheapest_hotels, fare_of
 
 chatbot_bp = Blueprint('chatbot', __name__)
 
@@ -386,33 +393,255 @@ KEYWORDS = {
 }
 
 
-def _match_intent(message):
+# ── Keyword Index ───────────────────────────────────────────────────────
+# KEYWORDS is compiled once at import into a word trie, so matching costs
+# one pass over the message no matter how large the knowledge base grows.
+# Keywords match whole words only ('hi' no longer fires on 'this'); the
+# last word of a keyword also matches longer words that start with it when
+# it is at least _MIN_STEM letters long ('cheap' → 'cheapest').
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_MIN_STEM = 4
+_HITS = None  # trie key holding the (rank, category, keyword) entries that end at a node
+
+
+def _compile_keywords(table):
+    """Build a word trie from a KEYWORDS-style table."""
+    trie = {}
+    for rank, (category, config) in enumerate(table.items()):
+        for kw in config['keywords']:
+            node = trie
+            for word in _WORD_RE.findall(kw.lower()):
+                node = node.setdefault(word, {})
+            node.setdefault(_HITS, []).append((rank, category, kw))
+    return trie
+
+
+def _stems(token):
+    """The token itself, then each prefix of it long enough to count as a stem."""
+    yield token
+    for end in range(len(token) - 1, _MIN_STEM - 1, -1):
+        yield token[:end]
+
+
+def _find_keywords(message, trie):
+    """Return every (rank, category, keyword) entry found in the message."""
+    tokens = _WORD_RE.findall(message.lower())
+    found = set()
+    for start in range(len(tokens)):
+        node = trie
+        for token in tokens[start:]:
+            for stem in _stems(token):
+                child = node.get(stem)
+                if child and _HITS in child:
+                    found.update(child[_HITS])
+            node = node.get(token)
+            if node is None:
+                break
+    return found
+
+
+_KEYWORD_TRIE = _compile_keywords(KEYWORDS)
+
+
+def _match_intent(message, table=KEYWORDS, trie=_KEYWORD_TRIE):
     """Match user message to the best intent using weighted scoring.
 
     Each keyword match adds the category's weight to its score.
     The category with the highest total score wins. If two categories
-    tie, the one with more keyword matches wins. This ensures
-    'destination_delhi' (weight 10) beats 'greet' (weight 1) even if
-    'help' appears alongside 'delhi' in the message.
+    tie, the one with more keyword matches wins, then the one listed
+    first in KEYWORDS. This ensures 'destination_delhi' (weight 10)
+    beats 'greet' (weight 1) even if 'help' appears alongside 'delhi'.
     """
-    msg = message.lower().strip()
-    scores = {}  # category -> (total_weight, match_count)
-
-    for category, config in KEYWORDS.items():
-        weight = config['weight']
-        match_count = 0
-        for kw in config['keywords']:
-            if kw in msg:
-                match_count += 1
-        if match_count > 0:
-            scores[category] = (weight * match_count, match_count)
+    scores = {}  # category -> [match_count, rank]
+    for rank, category, _kw in _find_keywords(message, trie):
+        scores.setdefault(category, [0, rank])[0] += 1
 
     if not scores:
         return 'fallback'
 
-    # Sort by total score (desc), then by match count (desc)
-    best = max(scores.items(), key=lambda x: (x[1][0], x[1][1]))
-    return best[0]
+    # Highest total score, then most matches, then earliest in KEYWORDS
+    return max(scores, key=lambda c: (
+        table[c]['weight'] * scores[c][0], scores[c][0], -scores[c][1],
+    ))
+
+
+# ── Live Inventory Answers ──────────────────────────────────────────────
+# Questions that name a travel mode and a city ("cheapest flight to Goa
+# this weekend") are answered from the fare layer instead of RESPONSES.
+# Answers are memoised per parsed query, so popular questions only hit
+# the database once every LIVE_MEMO_TTL seconds per worker.
+
+MODE_KEYWORDS = {
+    'flight': {'weight': 1, 'keywords': ['flight', 'fly', 'flying', 'plane', 'airfare', 'airline']},
+    'train':  {'weight': 1, 'keywords': ['train', 'rail', 'railway', 'rajdhani', 'shatabdi']},
+    'bus':    {'weight': 1, 'keywords': ['bus', 'buses', 'coach', 'volvo']},
+    'hotel':  {'weight': 1, 'keywords': ['hotel', 'stay', 'room', 'resort', 'accommodation']},
+}
+_MODE_TRIE = _compile_keywords(MODE_KEYWORDS)
+
+MODE_ICONS = {'flight': '✈️', 'train': '🚆', 'bus': '🚌', 'hotel': '🏨'}
+MODE_PLURALS = {'flight': 'flights', 'train': 'trains', 'bus': 'buses', 'hotel': 'hotels'}
+LIVE_MEMO_TTL = 60
+_LIVE_MEMO = TTLCache(maxsize=512, ttl=LIVE_MEMO_TTL, name='chat_live')
+
+_WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_ISO_DATE_RE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+_FROM_RE = re.compile(r'\bfrom\s*$')
+_TO_RE = re.compile(r'\b(to|in|at|for)\s*$')
+
+
+def _parse_dates(msg, today):
+    """Return (date_from, date_to, label) for the travel dates in a message."""
+    iso = _ISO_DATE_RE.search(msg)
+    if iso:
+        try:
+            day = date.fromisoformat(iso.group(1))
+            return day, day, f'on {day:%a %d %b}'
+        except ValueError:
+            pass
+
+    words = set(_WORD_RE.findall(msg))
+    if 'today' in words or 'tonight' in words:
+        return today, today, 'today'
+    if 'tomorrow' in words:
+        day = today + timedelta(days=1)
+        return day, day, 'tomorrow'
+    if 'weekend' in words:
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if today.weekday() == 6:
+            saturday = today - timedelta(days=1)
+        if 'next weekend' in msg:
+            saturday += timedelta(days=7)
+        return max(saturday, today), saturday + timedelta(days=1), \
+            'next weekend' if 'next weekend' in msg else 'this weekend'
+    if 'next week' in msg:
+        monday = today + timedelta(days=7 - today.weekday())
+        return monday, monday + timedelta(days=6), 'next week'
+    for i, name in enumerate(_WEEKDAYS):
+        if name in words:
+            day = today + timedelta(days=(i - today.weekday()) % 7)
+            return day, day, f'on {day:%a %d %b}'
+    return today, today + timedelta(days=6), 'in the next 7 days'
+
+
+def _parse_route(msg):
+    """Return (origin, destination) city names mentioned in a message.
+
+    'from X' marks the origin and 'to/in/at/for X' the destination; an
+    unmarked single city is taken as the destination.
+    """
+    origin = destination = None
+    unmarked = []
+    for start, city, _code in find_cities(msg):
+        before = msg[:start]
+        if origin is None and _FROM_RE.search(before):
+            origin = city
+        elif destination is None and _TO_RE.search(before):
+            destination = city
+        else:
+            unmarked.append(city)
+
+    for city in unmarked:
+        if destination is None and (origin is not None or len(unmarked) == 1):
+            destination = city
+        elif origin is None:
+            origin = city
+        elif destination is None:
+            destination = city
+    return origin, destination
+
+
+def _parse_live_query(message, today=None):
+    """Turn a message into a hashable live-inventory query, or None.
+
+    The tuple is (mode, origin, destination, date_from, date_to, label).
+    """
+    msg = message.lower()
+    mode = _match_intent(msg, MODE_KEYWORDS, _MODE_TRIE)
+    if mode == 'fallback':
+        return None
+    origin, destination = _parse_route(msg)
+    if origin is None and destination is None:
+        return None
+    date_from, date_to, label = _parse_dates(msg, today or date.today())
+    if mode == 'hotel':
+        return ('hotel', None, destination or origin, None, None, '')
+    return (mode, origin, destination, date_from, date_to, label)
+
+
+def _live_title(query):
+    """Heading line for a live answer — needs no database access."""
+    mode, origin, destination, _date_from, _date_to, label = query
+    icon = MODE_ICONS[mode]
+    if mode == 'hotel':
+        return f'{icon} **Cheapest hotels in {destination}:**'
+    if origin and destination:
+        route = f'{origin} → {destination}'
+    elif origin:
+        route = f'from {origin}'
+    else:
+        route = f'to {destination}'
+    return f'{icon} **Cheapest {MODE_PLURALS[mode]} {route} {label}:**'
+
+
+def _live_results(query):
+    """Look up a parsed live query in the fare layer and return result cards."""
+    mode, origin, destination, date_from, date_to, _label = query
+
+    if mode == 'hotel':
+        return [{
+            'type': 'hotel',
+            'id': hotel.id,
+            'title': hotel.name,
+            'subtitle': f'{hotel.city} · {hotel.star_rating}★',
+            'price': price,
+            'url': url_for('hotels.detail', hotel_id=hotel.id),
+        } for hotel, price in cheapest_hotels(destination)]
+
+    results = []
+    for item in cheapest_departures(mode, origin, destination, date_from, date_to):
+        if mode == 'flight':
+            title = f'{item.airline} {item.flight_number}'
+        elif mode == 'train':
+            title = f'{item.name} ({item.train_number})'
+        else:
+            title = f'{item.operator} ({item.bus_type})'
+        results.append({
+            'type': mode,
+            'id': item.id,
+            'title': title,
+            'subtitle': f'{item.origin} → {item.destination} · {item.departure:%a %d %b, %H:%M}',
+            'price': fare_of(item),
+            'url': url_for(f'{MODE_PLURALS[mode]}.detail', **{f'{mode}_id': item.id}),
+        })
+    return results
+
+
+def _live_lines(query, results):
+    """Body lines of a live answer, one per result card."""
+    if not results:
+        if query[0] == 'hotel':
+            return ['😕 No rooms left right now — try a nearby city!']
+        return ['😕 Nothing with seats left — check the **Fare Calendar** for other dates!']
+    if query[0] == 'hotel':
+        return [f"• **₹{r['price']:,.0f}**/night — {r['title']} ({r['subtitle']})" for r in results]
+    return [f"• **₹{r['price']:,.0f}** — {r['title']}, {r['subtitle']}" for r in results]
+
+
+def _live_intent(query):
+    """Intent name reported for a live query."""
+    return 'live_hotel' if query[0] == 'hotel' else 'live_fare'
+
+
+def _get_live_results(query):
+    """Memoised _live_results — popular questions skip the database."""
+    return _LIVE_MEMO.get_or_set(query, lambda: _live_results(query))
+
+
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
 
 
 @chatbot_bp.route('', methods=['POST'])
@@ -424,6 +653,15 @@ def chat():
     if not message:
         return jsonify({'error': 'message is required'}), 400
 
+    live_query = _parse_live_query(message)
+    if live_query:
+        results = _get_live_results(live_query)
+        return jsonify({
+            'reply': '\n'.join([_live_title(live_query)] + _live_lines(live_query, results)),
+            'intent': _live_intent(live_query),
+            'results': results,
+        })
+
     intent = _match_intent(message)
     reply = random.choice(RESPONSES[intent])
 
@@ -431,3 +669,36 @@ def chat():
         'reply': reply,
         'intent': intent,
     })
+
+
+@chatbot_bp.route('/stream', methods=['POST'])
+def chat_stream():
+    """Stream the reply as Server-Sent Events.
+
+    Events, in order: ``intent`` (sent before any lookup), ``chunk`` with
+    incremental text, ``results`` with cards for live answers, ``done``.
+    """
+    data = request.get_json(silent=True) or {}
+    message = data.get('message', '').strip()
+
+    if not message:
+        return jsonify({'error': 'message is required'}), 400
+
+    live_query = _parse_live_query(message)
+    intent = _live_intent(live_query) if live_query else _match_intent(message)
+
+    def generate():
+        yield _sse('intent', {'intent': intent})
+        if live_query:
+            yield _sse('chunk', {'text': _live_title(live_query)})
+            results = _get_live_results(live_query)
+            for line in _live_lines(live_query, results):
+                yield _sse('chunk', {'text': '\n' + line})
+            yield _sse('results', results)
+        else:
+            for line in random.choice(RESPONSES[intent]).splitlines(keepends=True):
+                yield _sse('chunk', {'text': line})
+        yield _sse('done', {})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
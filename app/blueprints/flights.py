@@ -1,11 +1,10 @@
 """Flights blueprint — search, detail, and booking (JSON API)."""
-import json
 import time
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from sqlalchemy import func
-from app.extensions import db
-from app.models import Flight, Booking, Seat
+from app.db_routing import read_replica
+from app.models import Flight
 
 flights_bp = Blueprint('flights', __name__)
 
@@ -15,20 +14,24 @@ def search_page():
     return render_template('flights/search.html')
 
 @flights_bp.route('/search', methods=['GET'])
+@read_replica
 def search():
     """Search flights by origin, destination, and optional filters."""
     from datetime import datetime, timedelta
+    from app.fares import departure_window
     from app.city_lookup import resolve_city_to_iata
+    from app.metrics import SEARCHES
 
     origin_raw = request.args.get('origin', '').strip()
     destination_raw = request.args.get('destination', '').strip()
     date = request.args.get('date', '')
-    sort_by = request.args.get('sort', 'price')  # price or departure
+    sort_by = request.args.get('sort', 'price')  # price, departure, or rating
     airline_filter = request.args.get('airline', '')
 
     if not origin_raw or not destination_raw:
         flash('Please enter both origin and destination.', 'error')
         return redirect(url_for('flights.search_page'))
+    SEARCHES.labels('flight').inc()
 
     # Resolve city names → IATA codes
     origin = resolve_city_to_iata(origin_raw)
@@ -55,17 +58,14 @@ def search():
             return redirect(url_for('flights.search_page'))
 
         # Exact date search first
-        query = base_query.filter(func.date(Flight.departure) == search_date)
+        query = base_query.filter(*departure_window(Flight, search_date, search_date))
         flights = query.all()
 
         # Flexible fallback: widen to ±3 days if no exact match
         if not flights:
             date_from = search_date - timedelta(days=3)
             date_to = search_date + timedelta(days=3)
-            query = base_query.filter(
-                func.date(Flight.departure) >= date_from,
-                func.date(Flight.departure) <= date_to,
-            )
+            query = base_query.filter(*departure_window(Flight, date_from, date_to))
             flights = query.all()
             if flights:
                 flexible = True
@@ -76,6 +76,8 @@ def search():
     # Sort
     if sort_by == 'departure':
         flights.sort(key=lambda f: f.departure)
+    elif sort_by == 'rating':
+        flights.sort(key=lambda f: (f.rating_count == 0, -(f.avg_rating() or 0), f.price))
     else:
         flights.sort(key=lambda f: f.price)
 
@@ -98,59 +100,22 @@ def detail(flight_id):
 @login_required
 def book(flight_id):
     """Create a flight booking."""
-    flight = Flight.query.get_or_404(flight_id)
-    
+    from app.booking_service import BookingError, book_transport
+
     passenger_names = request.form.getlist('passenger_names[]')
     passenger_names = [n.strip() for n in passenger_names if n.strip()]
-    num_passengers = len(passenger_names) if passenger_names else 1
-
-    total_price = flight.price * num_passengers
-
-    # Atomic seat decrement to prevent race conditions
-    result = db.session.execute(
-        db.update(Flight)
-        .where(Flight.id == flight.id, Flight.seats_available >= num_passengers)
-        .values(seats_available=Flight.seats_available - num_passengers)
-    )
-    if result.rowcount == 0:
-        db.session.rollback()
-        flash('Not enough seats available.', 'error')
-        return redirect(url_for('flights.detail', flight_id=flight.id))
-
-    # Handle seat selection
-    seat_ids = request.form.getlist('seat_ids[]')
-    seat_labels = []
-    if seat_ids:
-        seats = Seat.query.filter(
-            Seat.id.in_([int(sid) for sid in seat_ids]),
-            Seat.vehicle_type == 'flight',
-            Seat.vehicle_id == flight.id,
-            Seat.is_booked == False
-        ).all()
-        seat_labels = [s.seat_label for s in seats]
-
-    booking = Booking(
-        user_id=current_user.id,
-        booking_type='flight',
-        ref_id=flight.id,
-        passenger_names=json.dumps(passenger_names),
-        num_guests=num_passengers,
-        total_price=total_price,
-        status='Pending',
-        seat_numbers=json.dumps(seat_labels) if seat_labels else None,
-    )
-    db.session.add(booking)
-    db.session.flush()
-
-    # Mark seats as booked
-    if seat_ids:
-        Seat.query.filter(
-            Seat.id.in_([int(sid) for sid in seat_ids]),
-            Seat.vehicle_type == 'flight',
-            Seat.vehicle_id == flight.id,
-        ).update({Seat.is_booked: True, Seat.booking_id: booking.id}, synchronize_session=False)
 
-    db.session.commit()
+    try:
+        booking_id = book_transport(
+            'flight', flight_id, current_user.id, passenger_names,
+            seat_ids=request.form.getlist('seat_ids[]'),
+            preference=request.form.get('seat_preference') or None,
+        )
+    except BookingError as exc:
+        if exc.status == 404:
+            abort(404)
+        flash(exc.message, 'error')
+        return redirect(url_for('flights.detail', flight_id=flight_id))
 
     flash('Booking created! Please complete payment.', 'success')
-    return redirect(url_for('payment.checkout', booking_id=booking.id))
+    return redirect(url_for('payment.checkout', booking_id=booking_id))
@@ -18,14 +18,18 @@ def search_page():
 @hotels_bp.route('/search', methods=['GET'])
 def search():
     """Search hotels by city with check-in/check-out dates."""
+    from app.metrics import SEARCHES
+
     city = request.args.get('city', '').strip()
     check_in = request.args.get('check_in', '')
     check_out = request.args.get('check_out', '')
     star_filter = request.args.get('stars', '')
+    sort_by = request.args.get('sort', 'stars')  # stars or rating
 
     if not city:
         flash('Please enter a city to search for hotels.', 'error')
         return redirect(url_for('hotels.search_page'))
+    SEARCHES.labels('hotel').inc()
 
     query = Hotel.query.filter(
         func.lower(Hotel.city).contains(city.lower())
@@ -42,10 +46,15 @@ def search():
         Hotel.rooms.any(Room.rooms_available > 0)
     )
 
-    hotels = query.order_by(Hotel.star_rating.desc()).all()
+    if sort_by == 'rating':
+        query = query.order_by(*Hotel.rating_order(), Hotel.star_rating.desc())
+    else:
+        query = query.order_by(Hotel.star_rating.desc())
+    hotels = query.all()
 
     query_params = {
         'city': city, 'check_in': check_in, 'check_out': check_out, 'stars': star_filter,
+        'sort': sort_by,
     }
     
     return render_template('hotels/results.html', hotels=hotels, query=query_params)
@@ -132,6 +141,8 @@ def book(hotel_id):
     )
     db.session.add(booking)
     db.session.commit()
+    from app.metrics import BOOKINGS_CREATED
+    BOOKINGS_CREATED.labels('hotel').inc()
 
     flash('Booking created! Please complete payment.', 'success')
     return redirect(url_for('payment.checkout', booking_id=booking.id))
@@ -5,7 +5,8 @@ import time
 from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.extensions import db
-from app.models import Booking, Flight, Train, Bus, Room
+from app.archive import get_item
+from app.models import Booking
 
 payment_bp = Blueprint('payment', __name__)
 
@@ -52,6 +53,8 @@ def confirm(booking_id):
     booking.status = 'Confirmed'
     booking.pnr = _generate_pnr()
     db.session.commit()
+    from app.metrics import CONFIRMATIONS
+    CONFIRMATIONS.labels(booking.booking_type).inc()
 
     # --- Mock Email Confirmation ---
     item_detail = _get_item_detail(booking)
@@ -88,7 +91,7 @@ def _get_item_detail(booking):
     """Fetch reference item details for a booking."""
     detail = {}
     if booking.booking_type == 'flight':
-        item = Flight.query.get(booking.ref_id)
+        item = get_item('flight', booking.ref_id)
         if item:
             detail = {
                 'label': f'{item.airline} {item.flight_number}',
@@ -98,7 +101,7 @@ def _get_item_detail(booking):
                 'duration': item.duration_str(),
             }
     elif booking.booking_type == 'train':
-        item = Train.query.get(booking.ref_id)
+        item = get_item('train', booking.ref_id)
         if item:
             detail = {
                 'label': f'{item.name} ({item.train_number})',
@@ -109,7 +112,7 @@ def _get_item_detail(booking):
                 'class': booking.travel_class,
             }
     elif booking.booking_type == 'bus':
-        item = Bus.query.get(booking.ref_id)
+        item = get_item('bus', booking.ref_id)
         if item:
             detail = {
                 'label': f'{item.operator} ({item.bus_type})',
@@ -119,7 +122,7 @@ def _get_item_detail(booking):
                 'duration': item.duration_str(),
             }
     elif booking.booking_type == 'hotel':
-        room = Room.query.get(booking.ref_id)
+        room = get_item('hotel', booking.ref_id)
         if room:
             detail = {
                 'label': f'{room.hotel.name} — {room.room_type}',
@@ -1,13 +1,15 @@
-"""Seat map API — returns seat availability for a given vehicle."""
+"""Seat map API — seat availability for a vehicle, and seats-together suggestions."""
 import json
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.extensions import db
+from app.db_routing import read_replica
 from app.models import Seat
 
 seat_api_bp = Blueprint('seat_api', __name__)
 
 
 @seat_api_bp.route('/api/seats/<vehicle_type>/<int:vehicle_id>', methods=['GET'])
+@read_replica(max_lag_key='SEAT_MAP_MAX_LAG')
 def get_seats(vehicle_type, vehicle_id):
     """Return all seats for a vehicle with their booking status."""
     if vehicle_type not in ('flight', 'bus', 'train'):
@@ -26,3 +28,31 @@ def get_seats(vehicle_type, vehicle_id):
         'booked': sum(1 for s in seats if s.is_booked),
         'available': sum(1 for s in seats if not s.is_booked),
     })
+
+
+@seat_api_bp.route('/api/seats/<vehicle_type>/<int:vehicle_id>/suggest', methods=['GET'])
+def suggest_seats(vehicle_type, vehicle_id):
+    """Suggest free seats that keep a party together (nothing is reserved).
+
+    GET /api/seats/train/12/suggest?count=4&preference=lower
+    """
+    from app.fares import TRANSPORT_MODELS
+    from app.seat_allocation import cached_index, seat_index, seat_needs
+
+    if vehicle_type not in ('flight', 'bus', 'train'):
+        return jsonify({'error': 'Invalid vehicle type'}), 400
+    count = request.args.get('count', 1, type=int)
+    if not 1 <= count <= 50:
+        return jsonify({'error': 'count must be 1-50'}), 400
+    if (cached_index(vehicle_type, vehicle_id) is None
+            and db.session.get(TRANSPORT_MODELS[vehicle_type], vehicle_id) is None):
+        return jsonify({'error': 'Vehicle not found'}), 404
+
+    needs = seat_needs(vehicle_type, count, request.args.get('preference'))
+    seats = seat_index(vehicle_type, vehicle_id).allocate(needs, reserve=False)
+    return jsonify({
+        'vehicle_type': vehicle_type,
+        'vehicle_id': vehicle_id,
+        'seats': [{'id': s.id, 'seat_label': s.seat_label, 'row': s.row, 'col': s.col}
+                  for s in seats or []],
+    })
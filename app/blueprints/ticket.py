@@ -1,89 +1,43 @@
-"""Ticket blueprint — printable ticket with QR code verification."""
+"""Ticket blueprint — printable ticket, PDF export, and QR code verification."""
 import io
-import json
-import qrcode
-from flask import Blueprint, render_template, request, send_file, abort, url_for
+from flask import (Blueprint, Response, render_template, request, send_file, abort,
+                   url_for, current_app, flash, redirect)
 from flask_login import login_required, current_user
-from app.models import Booking, Flight, Train, Bus, Room
+from app.models import Booking
+from app.ticket_render import (
+    qr_png, load_booking_details, render_ticket_html,
+    html_to_ticket, render_tickets, ticket_filename, ticket_format, stream_zip,
+)
 
 ticket_bp = Blueprint('ticket', __name__)
 
 
 def _get_booking_details(booking):
     """Build a detail dict for the ticket template."""
-    detail = {
-        'type': booking.booking_type.capitalize(),
-        'pnr': booking.pnr,
-        'passengers': json.loads(booking.passenger_names) if booking.passenger_names else [],
-        'num_guests': booking.num_guests,
-        'total_price': booking.total_price,
-        'seats': json.loads(booking.seat_numbers) if booking.seat_numbers else [],
-        'travel_class': booking.travel_class or '',
-        'status': booking.status,
-        'booked_at': booking.created_at,
-    }
-
-    if booking.booking_type == 'flight':
-        item = Flight.query.get(booking.ref_id)
-        if item:
-            detail.update({
-                'label': f'{item.airline} {item.flight_number}',
-                'origin': item.origin,
-                'destination': item.destination,
-                'departure': item.departure,
-                'arrival': item.arrival,
-                'duration': item.duration_str(),
-                'icon': 'fa-plane',
-            })
-    elif booking.booking_type == 'train':
-        item = Train.query.get(booking.ref_id)
-        if item:
-            detail.update({
-                'label': f'{item.name} #{item.train_number}',
-                'origin': item.origin,
-                'destination': item.destination,
-                'departure': item.departure,
-                'arrival': item.arrival,
-                'duration': item.duration_str(),
-                'icon': 'fa-train',
-            })
-    elif booking.booking_type == 'bus':
-        item = Bus.query.get(booking.ref_id)
-        if item:
-            detail.update({
-                'label': f'{item.operator} ({item.bus_type})',
-                'origin': item.origin,
-                'destination': item.destination,
-                'departure': item.departure,
-                'arrival': item.arrival,
-                'duration': item.duration_str(),
-                'icon': 'fa-bus',
-            })
-    elif booking.booking_type == 'hotel':
-        room = Room.query.get(booking.ref_id)
-        if room:
-            detail.update({
-                'label': f'{room.hotel.name} — {room.room_type}',
-                'origin': room.hotel.city,
-                'destination': '',
-                'departure': booking.check_in,
-                'arrival': booking.check_out,
-                'duration': '',
-                'icon': 'fa-hotel',
-            })
-
-    return detail
+    return load_booking_details([booking])[booking.id]
 
 
-@ticket_bp.route('/ticket/<int:booking_id>')
-@login_required
-def view_ticket(booking_id):
-    """Render a printable ticket page."""
+def _get_own_booking(booking_id):
+    """Fetch a booking of the current user, or abort."""
     booking = Booking.query.get_or_404(booking_id)
     if booking.user_id != current_user.id:
         abort(403)
+    return booking
+
+
+def _get_own_confirmed_booking(booking_id):
+    """Fetch a booking the current user may print, or abort."""
+    booking = _get_own_booking(booking_id)
     if booking.status != 'Confirmed':
         abort(400, 'Booking is not confirmed yet.')
+    return booking
+
+
+@ticket_bp.route('/ticket/<int:booking_id>')
+@login_required
+def view_ticket(booking_id):
+    """Render a printable ticket page."""
+    booking = _get_own_confirmed_booking(booking_id)
 
     detail = _get_booking_details(booking)
     qr_url = url_for('ticket.qr_code', booking_id=booking.id, _external=True)
@@ -93,10 +47,68 @@ def view_ticket(booking_id):
                            user=current_user)
 
 
+@ticket_bp.route('/ticket/<int:booking_id>/pdf')
+@login_required
+def download_ticket(booking_id):
+    """Render a single ticket server-side and send it as a download."""
+    booking = _get_own_booking(booking_id)
+    if booking.status != 'Confirmed':
+        flash('Booking is not confirmed yet.', 'error')
+        return redirect(url_for('auth.profile'))
+
+    detail = _get_booking_details(booking)
+    html = render_ticket_html(booking, detail, current_user)
+    data = html_to_ticket(html)
+
+    return send_file(io.BytesIO(data), mimetype=ticket_format()[1],
+                     as_attachment=True, download_name=ticket_filename(booking))
+
+
+@ticket_bp.route('/tickets/batch', methods=['POST'])
+@login_required
+def batch_tickets():
+    """Render many confirmed tickets and stream them back as a zip archive.
+
+    POST /tickets/batch  with form field booking_ids[] (repeated)
+    """
+    try:
+        booking_ids = {int(bid) for bid in request.form.getlist('booking_ids[]')}
+    except ValueError:
+        booking_ids = None
+
+    limit = current_app.config['TICKET_BATCH_LIMIT']
+    if not booking_ids:
+        flash('Select at least one booking to export.', 'error')
+        return redirect(url_for('auth.profile'))
+    if len(booking_ids) > limit:
+        flash(f'At most {limit} tickets can be exported at once.', 'error')
+        return redirect(url_for('auth.profile'))
+
+    bookings = Booking.query.filter(
+        Booking.id.in_(booking_ids),
+        Booking.user_id == current_user.id,
+        Booking.status == 'Confirmed',
+    ).order_by(Booking.id).all()
+    if not bookings:
+        flash('None of the selected bookings are confirmed yet.', 'error')
+        return redirect(url_for('auth.profile'))
+
+    details = load_booking_details(bookings)
+    template = current_app.jinja_env.get_template('ticket/ticket.html')
+    htmls = [render_ticket_html(b, details[b.id], current_user, template) for b in bookings]
+    names = [ticket_filename(b) for b in bookings]
+
+    return Response(
+        stream_zip(zip(names, render_tickets(htmls))),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=tickets.zip'},
+    )
+
+
 @ticket_bp.route('/ticket/<int:booking_id>/qr')
 @login_required
 def qr_code(booking_id):
-    """Generate and serve a QR code PNG for booking verification."""
+    """Serve a QR code PNG for booking verification."""
     booking = Booking.query.get_or_404(booking_id)
     if booking.user_id != current_user.id:
         abort(403)
@@ -104,17 +116,8 @@ def qr_code(booking_id):
     # The QR encodes a verification URL
     verify_url = url_for('ticket.verify', pnr=booking.pnr, _external=True)
 
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_M,
-                        box_size=8, border=2)
-    qr.add_data(verify_url)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color='#1e1b4b', back_color='white')
-    buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    buf.seek(0)
-
-    return send_file(buf, mimetype='image/png', download_name=f'ticket_{booking.pnr}.png')
+    return send_file(io.BytesIO(qr_png(verify_url)), mimetype='image/png',
+                     download_name=f'ticket_{booking.pnr}.png')
 
 
 @ticket_bp.route('/verify/<pnr>')
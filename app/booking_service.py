@@ -0,0 +1,568 @@
+"""Transport booking — inventory, seat claim and booking row in one transaction.
+
+``book_transport`` is the single booking path for flights, trains and
+buses. It never reads the vehicle first: the inventory decrement returns
+the fare it needs, and the database enforces every check.
+
+* PostgreSQL: one statement. Data-modifying CTEs decrement the inventory,
+  lock and claim the chosen seats and insert the booking, so a booking is
+  one round trip plus the commit.
+* SQLite: decrement ``RETURNING`` the fare, insert the booking, claim the
+  seats — two or three statements in one short write transaction, with
+  no reads in between.
+
+A booking fails as a whole: if any chosen seat is already taken, nothing
+is decremented, claimed or inserted. When no seats were picked, the party
+is seated together by ``app.seat_allocation``.
+
+The async API (``app.async_api``) books through the same validation,
+fare, seat-claim and bookkeeping helpers (see "Shared rules").
+
+``book_group`` books many vehicles and rooms for a travel agent in one
+transaction under one group PNR, assigning seats itself.
+``cancel_booking`` gives seats and rooms back atomically.
+
+After each commit, seats booked or freed are published to open seat maps
+(``app.seat_events``).
+"""
+import json
+import random
+import string
+from datetime import date, datetime, timezone
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app import seat_events
+from app.extensions import db
+from app.fares import TRANSPORT_MODELS
+from app.metrics import BOOKINGS_CREATED, CANCELLATIONS
+from app.models import Booking, Passenger, Room, Seat, Train
+from app.seat_allocation import FreeBlockIndex, cached_index, load_free_seats, seat_index, seat_needs
+
+
+class BookingError(Exception):
+    """A booking that could not be made; ``status`` is the matching HTTP code."""
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class SeatTakenError(BookingError):
+    """A seat to be claimed was booked by someone else first."""
+
+    def __init__(self, message='Some selected seats were just taken.'):
+        super().__init__(message, 409)
+
+
+def book_transport(mode, vehicle_id, user_id, passenger_names, seat_ids=(), travel_class=None,
+                   preference=None):
+    """Book ``vehicle_id`` for ``user_id`` and commit; returns the new booking id.
+
+    ``passenger_names`` is the cleaned list of names (one guest when empty),
+    ``seat_ids`` the seats picked on the seat map and ``travel_class`` the
+    train class. Without ``seat_ids`` the party is seated together,
+    honouring ``preference`` (``'window'`` / ``'lower'``); on trains, seniors
+    among the user's saved passengers get lower berths. Raises
+    :class:`BookingError` — after rolling back — when the vehicle does not
+    exist, is sold out, the class is invalid, more seats were picked than
+    there are passengers or a chosen seat was just taken.
+    """
+    Model, seat_ids, booking = transport_booking(mode, vehicle_id, user_id, passenger_names,
+                                                 seat_ids, travel_class)
+    if seat_ids:
+        return _commit(Model, vehicle_id, seat_ids, None, booking)
+
+    ages = _saved_ages(user_id, passenger_names) if Model is Train else ()
+    needs = seat_needs(mode, booking['num_guests'], preference, ages)
+    for refresh in (False, True):
+        index = seat_index(mode, vehicle_id, refresh=refresh)
+        seats = index.allocate(needs) or []
+        try:
+            return _commit(Model, vehicle_id, [s.id for s in seats], [s.seat_label for s in seats], booking)
+        except SeatTakenError:
+            continue  # booked by another worker: reload the index and try again
+        except BookingError:
+            index.release(seats)
+            raise
+    # Still racing for the same seats — book now, seats can be picked later
+    return _commit(Model, vehicle_id, [], None, booking)
+
+
+def _commit(Model, vehicle_id, seat_ids, labels, booking):
+    """Run the booking statements for this dialect and commit."""
+    # The statements below are Selects with DML inside, which the routing
+    # session cannot see — pin the session to the primary explicitly.
+    db.session.info['wrote'] = True
+    try:
+        if db.session.get_bind().dialect.name == 'postgresql':
+            booking_id = _book_single_statement(Model, vehicle_id, seat_ids, labels, booking)
+        else:
+            booking_id = _book_in_steps(Model, vehicle_id, seat_ids, labels, booking)
+    except BookingError:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    seats_booked(booking['booking_type'], vehicle_id, seat_ids)
+    return booking_id
+
+
+def _saved_ages(user_id, passenger_names):
+    """Ages of passengers the user has saved profiles for, by name; else None."""
+    return passenger_ages(db.session.execute(saved_ages_query(user_id)).all(), passenger_names)
+
+
+# ── Shared rules ─────────────────────────────────────────────────────────
+# Statements and checks used by book_transport, book_group and the async
+# API (app/async_api.py), so every booking path validates, prices and
+# claims seats the same way.
+
+def _is_seat_id(value):
+    """An int, or the decimal string a form posts for one."""
+    if isinstance(value, str):
+        return value.isascii() and value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def transport_booking(mode, vehicle_id, user_id, passenger_names, seat_ids=(), travel_class=None):
+    """Validate a transport booking request.
+
+    ``passenger_names`` and ``seat_ids`` are lists, as a form's ``getlist``
+    or a JSON body gives them; seat ids are ints or their decimal strings.
+    Returns ``(Model, seat_ids, booking)``: the sorted, unique seat ids and
+    the new booking's column values, except its price and seat numbers.
+    Raises :class:`BookingError` (400) for a malformed passenger or seat
+    list, more seats than passengers, or a train booking without a class.
+    """
+    Model = TRANSPORT_MODELS[mode]
+    if not isinstance(passenger_names, list) or not all(isinstance(n, str) for n in passenger_names):
+        raise BookingError('Passengers must be a list of names.', 400)
+    passenger_names = [n.strip() for n in passenger_names if n.strip()]
+    if not isinstance(seat_ids, (list, tuple)) or not all(_is_seat_id(sid) for sid in seat_ids):
+        raise BookingError('Seat ids must be a list of integers.', 400)
+    seat_ids = sorted({int(sid) for sid in seat_ids})
+    num_guests = len(passenger_names) or 1
+    if len(seat_ids) > num_guests:
+        raise BookingError('Select at most one seat per passenger.', 400)
+    if Model is not Train:
+        travel_class = None
+    elif not travel_class:
+        raise BookingError('Invalid class selected.', 400)
+
+    return Model, seat_ids, {
+        'user_id': user_id,
+        'booking_type': mode,
+        'ref_id': vehicle_id,
+        'passenger_names': json.dumps(passenger_names),
+        'num_guests': num_guests,
+        'travel_class': travel_class,
+        'status': 'Pending',
+        'created_at': datetime.now(timezone.utc),
+    }
+
+
+def inventory_decrement(Model, vehicle_id, num):
+    """Take ``num`` seats off the vehicle, returning the price (or train classes) to fare it with."""
+    return (
+        sa.update(Model)
+        .where(Model.id == vehicle_id, Model.seats_available >= num)
+        .values(seats_available=Model.seats_available - num)
+        .returning(Model.classes if Model is Train else Model.price)
+    )
+
+
+def fare_from(Model, value, travel_class):
+    """Per-passenger fare from the price (or train classes JSON) the decrement returned."""
+    if Model is Train:
+        return json.loads(value or '{}').get(travel_class) or 0
+    return value or 0
+
+
+def booking_failure(Model, exists, claimed_inventory, fare):
+    """Why a booking produced no row, given whether the vehicle exists at all."""
+    if not claimed_inventory:
+        if not exists:
+            return BookingError(f'{Model.__name__} not found.', 404)
+        return BookingError('Not enough seats available.')
+    if not fare:
+        return BookingError('Invalid class selected.', 400)
+    return SeatTakenError()
+
+
+def picked_labels_query(mode, vehicle_id, seat_ids):
+    """Labels of the picked seats that are still free, in seat-map order."""
+    return sa.select(Seat.seat_label).where(*_seat_filter(mode, vehicle_id, seat_ids)).order_by(Seat.row, Seat.col)
+
+
+def seat_claim(mode, vehicle_id, seat_ids, booking_id):
+    """Book the given seats if they are all still free; check ``rowcount`` against ``len(seat_ids)``."""
+    return (
+        sa.update(Seat).where(*_seat_filter(mode, vehicle_id, seat_ids))
+        .values(is_booked=True, booking_id=booking_id)
+    )
+
+
+def saved_ages_query(user_id):
+    """The user's saved passengers as ``(name, age)`` rows."""
+    return sa.select(Passenger.name, Passenger.age).where(Passenger.user_id == user_id)
+
+
+def passenger_ages(rows, passenger_names):
+    """Ages from the user's saved passengers (``saved_ages_query`` rows), by name; else None."""
+    ages = {name.strip().lower(): age for name, age in rows}
+    return [ages.get(name.lower()) for name in passenger_names]
+
+
+def seats_booked(mode, vehicle_id, seat_ids):
+    """After a booking commits: count it, drop its seats from this worker's index and tell seat maps."""
+    BOOKINGS_CREATED.labels(mode).inc()
+    index = cached_index(mode, vehicle_id)
+    if index is not None:
+        index.take(seat_ids)
+    seat_events.publish(mode, vehicle_id, booked=seat_ids)
+
+
+def _failure(Model, vehicle_id, claimed_inventory, fare):
+    """Work out why a booking statement produced no booking."""
+    exists = claimed_inventory or db.session.execute(
+        sa.select(Model.id).where(Model.id == vehicle_id)).first() is not None
+    return booking_failure(Model, exists, claimed_inventory, fare)
+
+
+def _seat_filter(mode, vehicle_id, seat_ids):
+    return (Seat.id.in_(seat_ids), Seat.vehicle_type == mode,
+            Seat.vehicle_id == vehicle_id, Seat.is_booked == False)  # noqa: E712
+
+
+# ── Fares ────────────────────────────────────────────────────────────────
+
+def _pg_fare(Model, travel_class):
+    """Per-passenger fare as a PostgreSQL expression, returned by the decrement."""
+    if Model is not Train:
+        return Model.price
+    classes = sa.cast(Model.classes, postgresql.JSONB)
+    return sa.cast(classes[travel_class].astext, sa.Float)
+
+
+# ── PostgreSQL: one statement ────────────────────────────────────────────
+
+def _book_single_statement(Model, vehicle_id, seat_ids, labels, booking):
+    mode, num = booking['booking_type'], booking['num_guests']
+
+    inventory = (
+        sa.update(Model)
+        .where(Model.id == vehicle_id, Model.seats_available >= num)
+        .values(seats_available=Model.seats_available - num)
+        .returning(_pg_fare(Model, booking['travel_class']).label('fare'))
+        .cte('inventory')
+    )
+    picked = (
+        sa.select(Seat.id, Seat.seat_label, Seat.row, Seat.col)
+        .where(*_seat_filter(mode, vehicle_id, seat_ids or [-1]), sa.exists(sa.select(inventory.c.fare)))
+        .with_for_update(of=Seat)
+        .cte('picked')
+    )
+    if labels is not None:
+        seat_numbers = sa.literal(json.dumps(labels))
+    elif seat_ids:
+        seat_numbers = sa.select(sa.cast(
+            sa.func.json_agg(postgresql.aggregate_order_by(picked.c.seat_label, picked.c.row, picked.c.col)),
+            sa.Text,
+        )).scalar_subquery()
+    else:
+        seat_numbers = sa.null()
+    num_picked = sa.select(sa.func.count()).select_from(picked).scalar_subquery()
+
+    columns = list(booking) + ['total_price', 'seat_numbers']
+    inserted = (
+        sa.insert(Booking)
+        .from_select(columns, sa.select(
+            *(sa.literal(value, Booking.__table__.c[key].type) for key, value in booking.items()),
+            inventory.c.fare * num,
+            seat_numbers,
+        ).where(inventory.c.fare > 0, num_picked == len(seat_ids)))
+        .returning(Booking.id)
+        .cte('inserted')
+    )
+    claimed = (
+        sa.update(Seat)
+        .where(Seat.id.in_(sa.select(picked.c.id)), sa.exists(sa.select(inserted.c.id)))
+        .values(is_booked=True, booking_id=sa.select(inserted.c.id).scalar_subquery())
+        .returning(Seat.id)
+        .cte('claimed')
+    )
+    row = db.session.execute(sa.select(
+        sa.select(inserted.c.id).scalar_subquery(),
+        sa.select(sa.func.count()).select_from(inventory).scalar_subquery(),
+        sa.select(inventory.c.fare).scalar_subquery(),
+        sa.select(sa.func.count()).select_from(claimed).scalar_subquery(),
+    )).one()
+
+    booking_id, claimed_inventory, fare, _ = row
+    if booking_id is None:
+        # The inventory CTE may have run even though the insert did not;
+        # book_transport rolls it back.
+        raise _failure(Model, vehicle_id, claimed_inventory, fare)
+    return booking_id
+
+
+# ── SQLite: a short write transaction ────────────────────────────────────
+
+def _book_in_steps(Model, vehicle_id, seat_ids, labels, booking):
+    mode, num = booking['booking_type'], booking['num_guests']
+
+    row = db.session.execute(inventory_decrement(Model, vehicle_id, num)).first()
+    fare = fare_from(Model, row[0], booking['travel_class']) if row else 0
+    if not fare:
+        raise _failure(Model, vehicle_id, row is not None, fare)
+
+    seat_numbers = json.dumps(labels) if labels else None
+    if seat_ids and labels is None:
+        # The write lock is held from the decrement on, so the labels read
+        # here are exactly the seats the claim below will take.
+        seat_numbers = sa.select(sa.func.json_group_array(sa.column('seat_label'))).select_from(
+            picked_labels_query(mode, vehicle_id, seat_ids).subquery()
+        ).scalar_subquery()
+    booking_id = db.session.execute(
+        sa.insert(Booking)
+        .values(**booking, total_price=fare * num, seat_numbers=seat_numbers)
+        .returning(Booking.id)
+    ).scalar_one()
+
+    if seat_ids:
+        result = db.session.execute(seat_claim(mode, vehicle_id, seat_ids, booking_id))
+        if result.rowcount != len(seat_ids):
+            raise SeatTakenError()
+    return booking_id
+
+
+# ── Group bookings ───────────────────────────────────────────────────────
+# One booking per item (vehicle or room type), all sharing a group PNR.
+# Each item costs four statements however many passengers it carries:
+# decrement, read free seats, insert, claim.
+
+GROUP_MODELS = {**TRANSPORT_MODELS, 'hotel': Room}
+
+
+def parse_group_items(data, max_items, max_passengers):
+    """Validate a group booking request body into a list of item dicts.
+
+    ``{"items": [{"type": "flight", "id": 7, "passengers": ["Asha", {"name":
+    "Ravi", "age": 67}], "travel_class": "3A", "seat_preference": "window"},
+    {"type": "hotel", "id": 3, "rooms": 10, "check_in": "2026-05-01",
+    "check_out": "2026-05-03"}]}``
+    """
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise BookingError('items must be a non-empty list', 400)
+    if len(items) > max_items:
+        raise BookingError(f'at most {max_items} items per group booking', 400)
+
+    parsed, total = [], 0
+    for index, raw in enumerate(items):
+        where = f'items[{index}]'
+        if not isinstance(raw, dict) or raw.get('type') not in GROUP_MODELS:
+            raise BookingError(f'{where}: type must be flight, train, bus or hotel', 400)
+        if not isinstance(raw.get('id'), int):
+            raise BookingError(f'{where}: id must be an integer', 400)
+        item = {'type': raw['type'], 'id': raw['id'], 'where': where}
+
+        people = raw.get('guests' if raw['type'] == 'hotel' else 'passengers') or []
+        if not isinstance(people, list):
+            raise BookingError(f'{where}: passengers must be a list', 400)
+        item['passengers'] = [_passenger(where, p) for p in people]
+
+        if raw['type'] == 'hotel':
+            item['rooms'] = raw.get('rooms', 1)
+            if not isinstance(item['rooms'], int) or item['rooms'] < 1:
+                raise BookingError(f'{where}: rooms must be a positive integer', 400)
+            try:
+                item['check_in'] = date.fromisoformat(raw.get('check_in', ''))
+                item['check_out'] = date.fromisoformat(raw.get('check_out', ''))
+            except (TypeError, ValueError):
+                raise BookingError(f'{where}: check_in and check_out must be YYYY-MM-DD', 400)
+            if item['check_out'] <= item['check_in'] or item['check_in'] < date.today():
+                raise BookingError(f'{where}: invalid stay dates', 400)
+            total += item['rooms']
+        else:
+            if not item['passengers']:
+                raise BookingError(f'{where}: passengers are required', 400)
+            item['travel_class'] = raw.get('travel_class') if raw['type'] == 'train' else None
+            item['preference'] = raw.get('seat_preference')
+            if item['preference'] not in (None, 'window', 'lower'):
+                raise BookingError(f'{where}: seat_preference must be window or lower', 400)
+            if raw['type'] == 'train' and not item['travel_class']:
+                raise BookingError(f'{where}: travel_class is required for trains', 400)
+            total += len(item['passengers'])
+        parsed.append(item)
+
+    if total > max_passengers:
+        raise BookingError(f'at most {max_passengers} passengers per group booking', 400)
+    return parsed
+
+
+def _passenger(where, value):
+    """``(name, age)`` from a name string or a ``{"name", "age"}`` object."""
+    if isinstance(value, dict):
+        name, age = value.get('name'), value.get('age')
+    else:
+        name, age = value, None
+    if not isinstance(name, str) or not name.strip():
+        raise BookingError(f'{where}: every passenger needs a name', 400)
+    if age is not None and (not isinstance(age, int) or not 0 <= age <= 120):
+        raise BookingError(f'{where}: age must be an integer', 400)
+    return name.strip(), age
+
+
+def book_group(user_id, items):
+    """Book every parsed item for ``user_id`` all-or-nothing, and commit.
+
+    Returns ``(group_pnr, booking_ids)`` with ids in item order. Raises
+    :class:`BookingError` — after rolling back — naming the item that
+    could not be booked.
+    """
+    group_pnr = _group_pnr()
+    created_at = datetime.now(timezone.utc)
+    db.session.info['wrote'] = True
+    booking_ids = {}
+    claimed = []  # (type, vehicle id, seat ids) per seated item
+    try:
+        # Lock inventory in a fixed order so concurrent groups cannot deadlock
+        for index, item in sorted(enumerate(items), key=lambda pair: (pair[1]['type'], pair[1]['id'])):
+            booking = {
+                'user_id': user_id,
+                'booking_type': item['type'],
+                'ref_id': item['id'],
+                'passenger_names': json.dumps([name for name, _age in item['passengers']]),
+                'status': 'Pending',
+                'group_pnr': group_pnr,
+                'created_at': created_at,
+            }
+            if item['type'] == 'hotel':
+                booking_ids[index] = _book_group_rooms(item, booking)
+            else:
+                booking_ids[index] = _book_group_seats(item, booking, claimed)
+    except BookingError:
+        db.session.rollback()
+        raise
+    db.session.commit()
+    for item in items:
+        BOOKINGS_CREATED.labels(item['type']).inc()
+    for mode, vehicle_id, seat_ids in claimed:
+        seat_events.publish(mode, vehicle_id, booked=seat_ids)
+    return group_pnr, [booking_ids[index] for index in range(len(items))]
+
+
+def _group_pnr():
+    """A new group PNR — ``G`` and seven characters, unused so far."""
+    while True:
+        pnr = 'G' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=7))
+        if db.session.execute(sa.select(Booking.id).where(Booking.group_pnr == pnr)).first() is None:
+            return pnr
+
+
+def _book_group_seats(item, booking, claimed):
+    Model = TRANSPORT_MODELS[item['type']]
+    mode, vehicle_id, num = item['type'], item['id'], len(item['passengers'])
+
+    row = db.session.execute(inventory_decrement(Model, vehicle_id, num)).first()
+    fare = fare_from(Model, row[0], item['travel_class']) if row else 0
+    if not fare:
+        error = _failure(Model, vehicle_id, row is not None, fare)
+        raise BookingError(f"{item['where']}: {error.message}", error.status)
+
+    # Seat the party together when the seat map can take all of it. The
+    # free seats are read fresh under lock, so the claim below cannot miss.
+    needs = seat_needs(mode, num, item['preference'], [age for _name, age in item['passengers']])
+    chosen = FreeBlockIndex(mode, load_free_seats(mode, vehicle_id, for_update=True)).allocate(needs) or []
+
+    booking_id = db.session.execute(
+        sa.insert(Booking).values(
+            **booking, num_guests=num, travel_class=item['travel_class'], total_price=fare * num,
+            seat_numbers=json.dumps([seat.seat_label for seat in chosen]) if chosen else None,
+        ).returning(Booking.id)
+    ).scalar_one()
+
+    if chosen:
+        result = db.session.execute(seat_claim(mode, vehicle_id, [seat.id for seat in chosen], booking_id))
+        if result.rowcount != len(chosen):
+            raise SeatTakenError(f"{item['where']}: Some seats were just taken.")
+        index = cached_index(mode, vehicle_id)
+        if index is not None:
+            index.take([seat.id for seat in chosen])
+        claimed.append((mode, vehicle_id, [seat.id for seat in chosen]))
+    return booking_id
+
+
+def _book_group_rooms(item, booking):
+    rooms, nights = item['rooms'], (item['check_out'] - item['check_in']).days
+    price = db.session.execute(
+        sa.update(Room)
+        .where(Room.id == item['id'], Room.rooms_available >= rooms)
+        .values(rooms_available=Room.rooms_available - rooms)
+        .returning(Room.price_per_night)
+    ).scalar()
+    if price is None:
+        error = _failure(Room, item['id'], False, 0)
+        message = 'Not enough rooms available.' if error.status == 409 else error.message
+        raise BookingError(f"{item['where']}: {message}", error.status)
+
+    return db.session.execute(
+        sa.insert(Booking).values(
+            **booking, num_guests=len(item['passengers']) or rooms, rooms=rooms,
+            check_in=item['check_in'], check_out=item['check_out'],
+            total_price=price * nights * rooms,
+        ).returning(Booking.id)
+    ).scalar_one()
+
+
+# ── Cancellation ─────────────────────────────────────────────────────────
+# Concurrent bookings keep changing the inventory row, so it is never read
+# and written back: the status flip is conditional (only one of two
+# concurrent cancels wins) and the inventory is restored with ``+ n``.
+
+def cancel_booking(booking_id):
+    """Cancel a booking, give its seats or rooms back, and commit.
+
+    Raises :class:`BookingError` (409) when it is already cancelled.
+    """
+    db.session.info['wrote'] = True
+    row = db.session.execute(
+        sa.update(Booking)
+        .where(Booking.id == booking_id, Booking.status != 'Cancelled')
+        .values(status='Cancelled')
+        .returning(Booking.booking_type, Booking.ref_id, Booking.num_guests, Booking.rooms)
+    ).one_or_none()
+    if row is None:
+        db.session.rollback()
+        raise BookingError('This booking is already cancelled.')
+
+    seats = []
+    if row.booking_type == 'hotel':
+        db.session.execute(
+            sa.update(Room).where(Room.id == row.ref_id)
+            .values(rooms_available=Room.rooms_available + (row.rooms or 1))
+        )
+    else:
+        Model = TRANSPORT_MODELS[row.booking_type]
+        db.session.execute(
+            sa.update(Model).where(Model.id == row.ref_id)
+            .values(seats_available=Model.seats_available + row.num_guests)
+        )
+        seats = db.session.execute(
+            sa.update(Seat)
+            .where(Seat.vehicle_type == row.booking_type, Seat.vehicle_id == row.ref_id,
+                   Seat.booking_id == booking_id)
+            .values(is_booked=False, booking_id=None)
+            .returning(Seat.id, Seat.row, Seat.col, Seat.seat_label)
+        ).all()
+    db.session.commit()
+
+    index = cached_index(row.booking_type, row.ref_id) if seats else None
+    if index is not None:
+        index.release(seats)
+    if seats:
+        seat_events.publish(row.booking_type, row.ref_id, released=[seat.id for seat in seats])
+    CANCELLATIONS.labels(row.booking_type).inc()
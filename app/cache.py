@@ -0,0 +1,74 @@
+"""Small in-process caches shared by the blueprints.
+
+Each gunicorn worker keeps its own copy; entries expire after ``ttl``
+seconds so inventory-backed answers never go stale for long.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+_named = {}  # name -> TTLCache, for the metrics endpoint
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, maxsize=1024, ttl=60, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        if name:
+            _named[name] = self
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key``, or ``default`` if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        """Return the cached value, computing and storing it with ``factory()`` on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._data)
+
+
+def named_caches():
+    """Caches created with a ``name``, by name."""
+    return dict(_named)
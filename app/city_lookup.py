@@ -1,8 +1,10 @@
 """City ↔ IATA code lookup for Indian airports and stations.
 
 Used by the flights blueprint and the autocomplete API to resolve
-user-friendly city names (e.g. 'Ahmedabad') to IATA codes (e.g. 'AMD').
+user-friendly city names (e.g. 'Ahmedabad') to IATA codes (e.g. 'AMD'),
+and by the chatbot to spot city names in free text.
 """
+import re
 
 # ── City → IATA code mapping ─────────────────────────────────────────────
 # Covers all cities in our seeded data plus ~20 more popular Indian cities.
@@ -75,6 +77,27 @@ STATION_ALIASES = {
 }
 
 
+# ── Free-text city matcher (longest names first so 'New Delhi' beats 'Delhi') ──
+_CITY_NAMES = {city.lower(): city for city in CITY_TO_IATA}
+_CITY_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(name) for name in sorted(_CITY_NAMES, key=len, reverse=True)) + r')\b'
+)
+
+
+def find_cities(text: str) -> list:
+    """Return the cities mentioned in free text, in order of appearance.
+
+    Each entry is a tuple: (start_offset, "Canonical City", "IATA").
+    The canonical name is the first CITY_TO_IATA entry for that code,
+    so aliases like 'Bombay' come back as 'Mumbai'.
+    """
+    found = []
+    for match in _CITY_RE.finditer(text.lower()):
+        code = CITY_TO_IATA[_CITY_NAMES[match.group(1)]]
+        found.append((match.start(), IATA_TO_CITY[code], code))
+    return found
+
+
 def resolve_city_to_iata(text: str) -> str:
     """Resolve a user input (city name or IATA code) to an IATA code.
 
@@ -96,24 +119,36 @@ def resolve_city_to_iata(text: str) -> str:
     return upper
 
 
+# Prefixes up to this long may ask for every match (the autocomplete's ``full=1``)
+FULL_LIST_MAX_PREFIX = 2
+
+
+def city_candidates(prefix: str) -> tuple:
+    """Every (city, code) whose name or code starts with ``prefix``, in suggestion order.
+
+    Aliases sharing a code are all kept, so a client holding this list can
+    filter it for any longer prefix exactly as ``search_cities`` would.
+    """
+    q = prefix.lower()
+    return tuple((city, code) for city, code in CITY_TO_IATA.items()
+                 if city.lower().startswith(q) or code.lower().startswith(q))
+
+
 def search_cities(query: str, limit: int = 8) -> list:
-    """Return a list of matching cities for autocomplete.
+    """Return a list of matching cities for autocomplete, one per code.
 
-    Each entry is a dict: {"city": "Ahmedabad", "code": "AMD"}
+    Each entry is a dict: {"city": "Ahmedabad", "code": "AMD"}. The list is
+    built fresh on every call; the autocomplete endpoint memoizes its
+    serialized answer instead.
     """
-    if not query or len(query) < 1:
+    if not query:
         return []
-
-    q = query.lower()
     results = []
     seen_codes = set()
-
-    for city, code in CITY_TO_IATA.items():
-        if city.lower().startswith(q) or code.lower().startswith(q):
-            if code not in seen_codes:
-                results.append({'city': city, 'code': code})
-                seen_codes.add(code)
+    for city, code in city_candidates(query):
+        if code not in seen_codes:
+            results.append({'city': city, 'code': code})
+            seen_codes.add(code)
         if len(results) >= limit:
             break
-
     return results
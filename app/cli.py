@@ -0,0 +1,117 @@
+"""Flask CLI commands.
+
+    flask init-db              # create any missing tables
+    flask importtime --top 20  # where worker startup time goes
+    flask build-assets         # hashed, minified, precompressed static files
+    flask check-db             # open a connection on every engine, sync and async
+"""
+import os
+import subprocess
+import sys
+
+import click
+
+STARTUP = 'from app import create_app; create_app()'
+
+
+def summarize_importtime(stderr, top=15):
+    """Digest ``python -X importtime`` output.
+
+    Returns ``(total_us, by_package, slowest)``: total import time, self time
+    summed per top-level package, and the ``top`` modules with the largest
+    cumulative time.
+    """
+    by_package, modules = {}, []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|', 2)
+        self_us, cumulative, name = int(self_us), int(cumulative), name.strip()
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+        modules.append((cumulative, name))
+    total = sum(by_package.values())
+    packages = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    slowest = sorted(modules, reverse=True)[:top]
+    return total, packages, slowest
+
+
+def register_commands(app):
+    from app.extensions import db
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any missing tables (no migrations)."""
+        db.create_all()
+        click.echo('Database tables created.')
+
+    @app.cli.command('importtime')
+    @click.option('--top', default=15, show_default=True, help='rows to show per table')
+    def importtime(top):
+        """Profile imports of a fresh worker (python -X importtime)."""
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise click.ClickException(result.stderr.strip().splitlines()[-1])
+        total, packages, slowest = summarize_importtime(result.stderr, top)
+
+        click.echo(f'Total import time: {total / 1000:.1f} ms\n')
+        click.echo('Self time by package:')
+        for package, self_us in packages:
+            click.echo(f'  {self_us / 1000:8.1f} ms  {package}')
+        click.echo('\nSlowest modules (cumulative):')
+        for cumulative, name in slowest:
+            click.echo(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+    @app.cli.command('check-db')
+    def check_db():
+        """Connect with every engine the workers use, to catch bad connect options on deploy."""
+        import asyncio
+        import sqlalchemy as sa
+
+        for bind, engine in db.engines.items():
+            with engine.connect() as conn:
+                conn.execute(sa.text('SELECT 1'))
+                timeout = (conn.execute(sa.text('SHOW statement_timeout')).scalar()
+                           if engine.dialect.name == 'postgresql' else None)
+            click.echo(f'{bind or "primary"}: {engine.dialect.name} ok'
+                       + (f', statement_timeout {timeout}' if timeout else ''))
+
+        try:
+            from app.async_api import AsyncAPI
+            import sqlalchemy.ext.asyncio  # noqa: F401 — needs the async extras
+        except ImportError as exc:
+            click.echo(f'async: skipped ({exc})')
+            return
+
+        async def check_async():
+            api = AsyncAPI(app)
+            try:
+                return await api.check()
+            finally:
+                await api.stop()
+
+        dialect, timeout = asyncio.run(check_async())
+        click.echo(f'async: {dialect} ok' + (f', statement_timeout {timeout}' if timeout else ''))
+
+    @app.cli.command('build-assets')
+    @click.option('--clean', is_flag=True, help='remove earlier builds first')
+    def build_assets(clean):
+        """Minify, fingerprint and precompress app/static into app/static/dist."""
+        from app.assets import build
+
+        manifest = build(app.static_folder, clean=clean)
+        for source, name in sorted(manifest['files'].items()):
+            original = os.path.getsize(os.path.join(app.static_folder, source))
+            sizes = [f'{os.path.getsize(os.path.join(app.static_folder, name)) / 1024:.1f} KB']
+            for encoding in manifest['encodings'].get(name, ()):
+                suffix = '.br' if encoding == 'br' else '.gz'
+                sizes.append(f'{encoding} {os.path.getsize(os.path.join(app.static_folder, name + suffix)) / 1024:.1f} KB')
+            image = manifest['images'].get(source, {})
+            for fmt in ('avif', 'webp'):
+                if image.get(fmt):
+                    path, _width = image[fmt][-1]
+                    sizes.append(f'{fmt} {os.path.getsize(os.path.join(app.static_folder, path)) / 1024:.1f} KB')
+            click.echo(f'  {source:32} {original / 1024:8.1f} KB -> {", ".join(sizes)}')
+        click.echo(f'Wrote {len(manifest["files"])} files and their variants to '
+                   f'{os.path.join(app.static_folder, "dist")}')
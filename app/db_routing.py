@@ -0,0 +1,118 @@
+"""Read-replica routing for ``db.session``.
+
+Set ``REPLICA_DATABASE_URL`` and views decorated with ``@read_replica`` run
+their queries against the replica (the ``replica`` entry in
+``SQLALCHEMY_BINDS``), while everything else — and every write — goes to
+the primary. Without a replica configured the decorator is a no-op.
+
+Consistency rules:
+
+* A session that has written (flush or Core INSERT/UPDATE/DELETE) stays on
+  the primary for the rest of the request.
+* A client that wrote stays on the primary for ``REPLICA_STICKY_SECONDS``
+  afterwards (tracked in the Flask session), so it reads its own writes.
+* If the replica is further behind than the view's ``max_lag`` seconds,
+  the view is served from the primary. Seat maps use the tighter
+  ``SEAT_MAP_MAX_LAG`` and are only advisory — bookings always claim seats
+  on the primary.
+
+Two local SQLite files work for testing; refresh the replica with
+``sqlite3 app.db ".backup replica.db"``.
+"""
+import functools
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, g, session as flask_session
+from flask_sqlalchemy.session import Session
+
+REPLICA = 'replica'
+
+_lag_lock = threading.Lock()
+_lag_cache = {}  # engine url -> (checked_at, lag_seconds)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica when the current view asks for it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._route_to_replica(clause):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _route_to_replica(self, clause):
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if isinstance(clause, sa.sql.dml.UpdateBase):
+            self.info['wrote'] = True
+            return False
+        return g.get('db_route') == REPLICA
+
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, _flush_context):
+    session.info['wrote'] = True
+
+
+def replica_lag():
+    """Seconds the replica is behind the primary (0 when it can't be measured).
+
+    On PostgreSQL a replica that has replayed all the WAL it received is
+    current; otherwise the lag is the age of the last replayed transaction.
+    (That age alone keeps growing while the primary is idle.) SQLite file
+    copies have no replication stream, so they are treated as current.
+    Cached for a second per process.
+    """
+    from app.extensions import db
+
+    engine = db.engines[REPLICA]
+    key = str(engine.url)
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _lag_cache.get(key)
+        if cached and now - cached[0] < 1.0:
+            return cached[1]
+
+    lag = 0.0
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            lag = conn.execute(sa.text(
+                'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0'
+                ' ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+            )).scalar() or 0.0
+    with _lag_lock:
+        _lag_cache[key] = (now, float(lag))
+    return float(lag)
+
+
+def read_replica(view=None, *, max_lag_key='REPLICA_MAX_LAG'):
+    """Run a read-only view against the replica when it is safe to.
+
+    ``max_lag_key`` names the config value (seconds) above which the view
+    falls back to the primary.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            from app.extensions import db
+
+            if (REPLICA in db.engines
+                    and flask_session.get('_primary_until', 0) < time.time()
+                    and replica_lag() <= current_app.config[max_lag_key]):
+                g.db_route = REPLICA
+            return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator(view) if view is not None else decorator
+
+
+def init_app(app):
+    """Keep clients that just wrote on the primary for a few seconds."""
+    from app.extensions import db
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if REPLICA in db.engines and db.session.registry.has() and db.session.info.get('wrote'):
+            flask_session['_primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
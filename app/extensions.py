@@ -1,10 +1,31 @@
-"""Flask extension instances — initialized without app binding (for factory pattern)."""
+"""Flask extension instances — initialized without app binding (for factory pattern).
+
+Flask-Migrate is not created here: it imports Alembic and Mako, which only
+the ``flask db`` commands need, so ``create_app`` sets it up for the CLI.
+"""
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
+from sqlalchemy import event
+from app.db_routing import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
+
+
+def apply_sqlite_pragmas(engine, busy_timeout_ms):
+    """Tune every new SQLite connection for concurrent web traffic.
+
+    WAL lets readers run alongside the single writer, ``busy_timeout``
+    makes writers wait for the lock instead of failing with "database is
+    locked", and ``synchronous=NORMAL`` is safe under WAL while skipping an
+    fsync per commit.
+    """
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
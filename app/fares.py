@@ -0,0 +1,90 @@
+"""Fare lookups shared by the fare calendar API and the chatbot.
+
+Flights store IATA codes; trains and buses store full station/city names,
+so those are matched with a case-insensitive substring test. Trains have
+no single price column — their fare is the cheapest class in ``classes``.
+"""
+from datetime import datetime, time, timedelta
+from sqlalchemy import func
+from app.city_lookup import resolve_city_to_iata
+from app.extensions import db
+from app.models import Flight, Train, Bus, Hotel, Room
+
+TRANSPORT_MODELS = {'flight': Flight, 'train': Train, 'bus': Bus}
+
+
+def route_filters(mode, origin_raw, dest_raw):
+    """SQL filters matching a route; either end may be empty to leave it open."""
+    Model = TRANSPORT_MODELS[mode]
+    filters = []
+    for column, raw in ((Model.origin, origin_raw), (Model.destination, dest_raw)):
+        if not raw:
+            continue
+        if mode == 'flight':
+            filters.append(func.upper(column) == resolve_city_to_iata(raw))
+        else:
+            filters.append(func.lower(column).contains(raw.strip().lower()))
+    return filters
+
+
+def departure_window(Model, date_from, date_to):
+    """Index-friendly filters for departures on ``date_from``..``date_to`` inclusive."""
+    return [
+        Model.departure >= datetime.combine(date_from, time.min),
+        Model.departure < datetime.combine(date_to + timedelta(days=1), time.min),
+    ]
+
+
+def fare_of(item):
+    """Lowest bookable fare for a flight, train or bus."""
+    if isinstance(item, Train):
+        classes = item.get_classes()
+        return min(classes.values()) if classes else 0
+    return item.price
+
+
+def fare_calendar(mode, origin_raw, dest_raw, date_from, date_to):
+    """Cheapest fare and departure count per day, sorted by date.
+
+    Returns ``[{'date': 'YYYY-MM-DD', 'min_price': ..., 'count': ...}, ...]``.
+    """
+    Model = TRANSPORT_MODELS[mode]
+    filters = route_filters(mode, origin_raw, dest_raw) + departure_window(Model, date_from, date_to)
+
+    if mode != 'train':
+        day = func.date(Model.departure)
+        rows = db.session.query(day, func.min(Model.price), func.count(Model.id))\
+            .filter(*filters).group_by(day).order_by(day).all()
+        return [{'date': str(d), 'min_price': price, 'count': count} for d, price, count in rows]
+
+    days = {}
+    for train in Train.query.filter(*filters):
+        key = train.departure.date().isoformat()
+        entry = days.setdefault(key, {'date': key, 'min_price': fare_of(train), 'count': 0})
+        entry['min_price'] = min(entry['min_price'], fare_of(train))
+        entry['count'] += 1
+    return sorted(days.values(), key=lambda d: d['date'])
+
+
+def cheapest_departures(mode, origin_raw, dest_raw, date_from, date_to, limit=3):
+    """The cheapest departures with seats left on a route and date range."""
+    Model = TRANSPORT_MODELS[mode]
+    query = Model.query.filter(
+        *route_filters(mode, origin_raw, dest_raw),
+        *departure_window(Model, date_from, date_to),
+        Model.seats_available > 0,
+    )
+    if mode == 'train':
+        return sorted(query.all(), key=fare_of)[:limit]
+    return query.order_by(Model.price.asc(), Model.departure.asc()).limit(limit).all()
+
+
+def cheapest_hotels(city, limit=3):
+    """Hotels in a city with rooms left, cheapest first, as ``(hotel, min_price)``."""
+    min_price = func.min(Room.price_per_night)
+    return db.session.query(Hotel, min_price)\
+        .join(Room, Room.hotel_id == Hotel.id)\
+        .filter(func.lower(Hotel.city).contains(city.strip().lower()), Room.rooms_available > 0)\
+        .group_by(Hotel.id)\
+        .order_by(min_price.asc())\
+        .limit(limit).all()
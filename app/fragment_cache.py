@@ -0,0 +1,91 @@
+"""Rendered template fragments, cached by entity and inventory version.
+
+Templates wrap the parts of a page that only change when the listing
+itself changes in a call block::
+
+    {% call fragment_cache('flight-summary', flight) %}
+        ... airline, route, fare ...
+    {% endcall %}
+
+The first render stores the HTML; later renders with the same key reuse it.
+The key is the fragment name plus one part per argument:
+
+* a model instance stands for its *inventory version* — its class, id and
+  every column except the availability counters (``LIVE_COLUMNS``). Editing
+  a fare, a timetable or a rating gives the fragment a new key, while a
+  booking does not;
+* anything else (a number, a string, a query value) is used as it is.
+  Result cards pass the availability explicitly, so booking a seat only
+  re-renders that one card.
+
+Old keys are never invalidated; they age out of the LRU, or after
+``FRAGMENT_CACHE_TTL`` seconds. Nothing per-user or per-session (the CSRF
+token, ``current_user``) may go inside a cached fragment, and neither may
+the availability widget on detail pages, which is rendered live.
+
+Each worker keeps its own cache (``fragments`` in ``/metrics``). Hits,
+misses and time spent in fragments are added to the request's
+instrumentation and its ``Server-Timing`` header.
+"""
+import time
+
+import sqlalchemy as sa
+from markupsafe import Markup
+
+from app.cache import TTLCache
+from app.instrumentation import current_stats
+
+# Changed by every booking and cancellation — rendered live, not part of a version
+LIVE_COLUMNS = frozenset({'seats_available', 'rooms_available'})
+
+_fragments = TTLCache(maxsize=4096, ttl=600, name='fragments')
+_versioned = {}  # mapped class -> column attribute names in its version
+
+
+def inventory_version(obj):
+    """A hashable stand-in for everything about ``obj`` except its availability."""
+    cls = type(obj)
+    names = _versioned.get(cls)
+    if names is None:
+        names = _versioned[cls] = tuple(
+            attr.key for attr in sa.inspect(cls).column_attrs if attr.key not in LIVE_COLUMNS)
+    return (cls.__name__, *(getattr(obj, name) for name in names))
+
+
+def _key_part(value):
+    if hasattr(type(value), '__mapper__'):
+        return inventory_version(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_key_part, value))
+    return value
+
+
+def fragment_cache(name, *parts, caller):
+    """Jinja call block: the cached HTML for this key, rendering it on a miss."""
+    started = time.perf_counter()
+    key = (name, *map(_key_part, parts))
+    html = _fragments.get(key)
+    hit = html is not None
+    if not hit:
+        html = Markup(caller())
+        _fragments.set(key, html)
+
+    stats = current_stats()
+    if stats is not None:
+        stats.fragment_time += time.perf_counter() - started
+        if hit:
+            stats.fragment_hits += 1
+        else:
+            stats.fragment_misses += 1
+    return html
+
+
+def _render_live(name, *parts, caller):
+    return caller()
+
+
+def init_app(app):
+    """Expose ``fragment_cache`` to templates (rendering every time when ``FRAGMENT_CACHE`` is off)."""
+    _fragments.ttl = app.config['FRAGMENT_CACHE_TTL']
+    _fragments.maxsize = app.config['FRAGMENT_CACHE_SIZE']
+    app.jinja_env.globals['fragment_cache'] = fragment_cache if app.config['FRAGMENT_CACHE'] else _render_live
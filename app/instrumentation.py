@@ -0,0 +1,169 @@
+"""Per-request performance instrumentation — latency, queries, templates, size.
+
+Registered by ``create_app`` when ``REQUEST_STATS`` is on (the default).
+For every request it records the endpoint, latency, number of DB queries
+and time spent in them, template render time and response size. It logs
+a summary line on the ``app.perf`` logger and adds a ``Server-Timing``
+header, so the numbers also show up in the browser's dev tools. Pages
+built from cached fragments (``app.fragment_cache``) also report fragment
+hits, misses and the time spent in them, part of the template time.
+
+* Queries slower than ``SLOW_QUERY_MS`` are logged with their parameters
+  and query plan (``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on
+  PostgreSQL; SELECTs only).
+* Requests slower than ``SLOW_REQUEST_MS`` are logged as warnings.
+* A statement run more than ``N_PLUS_ONE_THRESHOLD`` times in one request
+  is flagged as a likely N+1 — a query issued per row of another.
+
+Other modules read the finished numbers from ``g.request_stats``.
+"""
+import contextvars
+import logging
+import time
+from collections import Counter
+
+import sqlalchemy as sa
+from flask import before_render_template, g, request, template_rendered
+
+log = logging.getLogger('app.perf')
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Numbers collected while one request runs."""
+
+    def __init__(self, config):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self.fragment_time = 0.0
+        self.statements = Counter()
+        self.slow_queries = 0
+        self.n_plus_one = []   # (statement, count)
+        self.latency = None
+        self.response_size = None
+        self.slow_query_ms = config['SLOW_QUERY_MS']
+        self.explain = config['SLOW_QUERY_EXPLAIN']
+        self._template_started = None
+
+
+def current_stats():
+    """Stats of the request running in this context, or ``None``."""
+    return _current.get()
+
+
+# ── SQLAlchemy events ────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._perf_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, '_perf_started', None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.queries += 1
+    stats.db_time += elapsed
+    stats.statements[statement] += 1
+    if elapsed * 1000 >= stats.slow_query_ms:
+        stats.slow_queries += 1
+        plan = _explain(conn, statement, parameters) if stats.explain and not executemany else None
+        log.warning('slow query %.1f ms in %s: %s\n  params: %r%s', elapsed * 1000, request.endpoint,
+                    statement, parameters, f'\n  plan:\n    {plan}' if plan else '')
+
+
+def _explain(conn, statement, parameters):
+    """The query plan for a slow SELECT, run on a raw cursor so it isn't counted."""
+    if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    sqlite = conn.dialect.name == 'sqlite'
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(('EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN ') + statement, parameters)
+        rows = cursor.fetchall()
+    except Exception as exc:  # a plan is a nice-to-have; never fail the request
+        return f'(unavailable: {exc})'
+    finally:
+        cursor.close()
+    return '\n    '.join(str(row[-1] if sqlite else row[0]) for row in rows)
+
+
+# ── Template signals ─────────────────────────────────────────────────────
+
+def _before_render(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None:
+        stats._template_started = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None and stats._template_started is not None:
+        stats.template_time += time.perf_counter() - stats._template_started
+        stats._template_started = None
+
+
+# ── Flask hooks ──────────────────────────────────────────────────────────
+
+def init_app(app):
+    """Instrument every request of ``app`` (no-op when ``REQUEST_STATS`` is off)."""
+    if not app.config['REQUEST_STATS']:
+        return
+
+    from sqlalchemy.engine import Engine
+
+    if not sa.event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        sa.event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        sa.event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def _start_stats():
+        stats = RequestStats(app.config)
+        g.request_stats = stats
+        g._request_stats_token = _current.set(stats)
+
+    @app.after_request
+    def _finish_stats(response):
+        stats = g.get('request_stats')
+        if stats is None:
+            return response
+        stats.latency = time.perf_counter() - stats.started
+        stats.response_size = response.calculate_content_length()
+        stats.n_plus_one = [(statement, count) for statement, count in stats.statements.most_common()
+                            if count > app.config['N_PLUS_ONE_THRESHOLD']]
+
+        response.headers['Server-Timing'] = (
+            f'app;dur={stats.latency * 1000:.1f}, '
+            f'db;desc="{stats.queries} queries";dur={stats.db_time * 1000:.1f}, '
+            f'tpl;dur={stats.template_time * 1000:.1f}'
+        )
+        fragments = stats.fragment_hits + stats.fragment_misses
+        if fragments:
+            response.headers['Server-Timing'] += (
+                f', frag;desc="{stats.fragment_hits}/{fragments} cached";dur={stats.fragment_time * 1000:.1f}')
+        latency_ms = stats.latency * 1000
+        level = logging.WARNING if latency_ms >= app.config['SLOW_REQUEST_MS'] else logging.INFO
+        log.log(level, '%s %s %s %d %.1f ms | db %d queries %.1f ms | templates %.1f ms%s | %s bytes',
+                request.method, request.path, request.endpoint, response.status_code, latency_ms,
+                stats.queries, stats.db_time * 1000, stats.template_time * 1000,
+                f' (fragments {stats.fragment_hits}/{fragments} cached)' if fragments else '',
+                stats.response_size if stats.response_size is not None else '-')
+        for statement, count in stats.n_plus_one:
+            log.warning('possible N+1 in %s: statement ran %d times in one request: %s',
+                        request.endpoint, count, ' '.join(statement.split())[:300])
+        return response
+
+    @app.teardown_request
+    def _clear_stats(exc):
+        token = g.pop('_request_stats_token', None)
+        if token is not None:
+            _current.reset(token)
@@ -0,0 +1,147 @@
+"""Prometheus metrics — ``GET /metrics`` in the text exposition format.
+
+Registered by ``create_app`` when ``METRICS_ENABLED`` is on (the default).
+Exposes:
+
+* ``http_request_duration_seconds`` — latency histogram per endpoint,
+  and ``http_requests_total`` by endpoint and status;
+* ``db_pool_connections`` — checked-out / idle / overflow connections per
+  engine (primary, replica);
+* ``cache_hits`` / ``cache_misses`` / ``cache_hit_ratio`` for the named
+  in-process caches (``app.cache``) and the ticket QR cache;
+* the booking funnel — ``searches_total`` by mode,
+  ``bookings_created_total``, ``booking_confirmations_total``,
+  ``booking_cancellations_total`` and ``seat_hold_expiries_total`` by type.
+
+Under gunicorn every worker writes its samples to memory-mapped files in
+``PROMETHEUS_MULTIPROC_DIR`` (``gunicorn.conf.py`` sets one up), and the
+worker that answers a scrape merges them, so one scrape covers the whole
+server. Updating a metric is a write to this process's own file, with no
+cross-process locking. Without that directory (the dev server, uvicorn)
+metrics stay in process. Pool and cache gauges are refreshed at most once a
+second per worker, after a request.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on scrapes.
+"""
+import hmac
+import os
+import threading
+import time
+
+from flask import Response, abort, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Seconds between pool/cache gauge refreshes in one worker
+SAMPLE_SECONDS = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# ── Metrics ──────────────────────────────────────────────────────────────
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by endpoint.',
+                            ['endpoint', 'method'], buckets=LATENCY_BUCKETS)
+REQUESTS = Counter('http_requests', 'Requests by endpoint and status.', ['endpoint', 'status'])
+
+DB_POOL = Gauge('db_pool_connections', 'Database pool connections by engine and state.',
+                ['engine', 'state'], multiprocess_mode='livesum')
+CACHE_HITS = Gauge('cache_hits', 'Cache hits since the worker started.', ['cache'],
+                   multiprocess_mode='livesum')
+CACHE_MISSES = Gauge('cache_misses', 'Cache misses since the worker started.', ['cache'],
+                     multiprocess_mode='livesum')
+CACHE_HIT_RATIO = Gauge('cache_hit_ratio', 'Cache hit ratio per worker.', ['cache'],
+                        multiprocess_mode='liveall')
+
+SEARCHES = Counter('searches', 'Searches run, by mode.', ['mode'])
+BOOKINGS_CREATED = Counter('bookings_created', 'Bookings created, by type.', ['type'])
+CONFIRMATIONS = Counter('booking_confirmations', 'Bookings confirmed by payment, by type.', ['type'])
+CANCELLATIONS = Counter('booking_cancellations', 'Bookings cancelled, by type.', ['type'])
+SEAT_HOLD_EXPIRIES = Counter('seat_hold_expiries', 'Seat holds released unpaid, by type.', ['type'])
+
+_sampled_at = 0.0
+_sample_lock = threading.Lock()
+
+
+# ── Gauges sampled from the process ──────────────────────────────────────
+
+def _sample_pools():
+    from app.db_routing import REPLICA
+    from app.extensions import db
+
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):  # StaticPool / NullPool keep no counts
+            continue
+        name = 'replica' if key == REPLICA else 'primary'
+        DB_POOL.labels(name, 'checked_out').set(pool.checkedout())
+        DB_POOL.labels(name, 'idle').set(pool.checkedin())
+        DB_POOL.labels(name, 'overflow').set(max(pool.overflow(), 0))
+
+
+def _sample_caches():
+    from app.cache import named_caches
+    from app.ticket_render import qr_png
+
+    counts = {name: (cache.hits, cache.misses) for name, cache in named_caches().items()}
+    info = qr_png.cache_info()
+    counts['ticket_qr'] = (info.hits, info.misses)
+    for name, (hits, misses) in counts.items():
+        CACHE_HITS.labels(name).set(hits)
+        CACHE_MISSES.labels(name).set(misses)
+        CACHE_HIT_RATIO.labels(name).set(hits / (hits + misses) if hits + misses else 0.0)
+
+
+def _sample(force=False):
+    global _sampled_at
+    now = time.monotonic()
+    if not force and now - _sampled_at < SAMPLE_SECONDS:
+        return
+    with _sample_lock:
+        _sampled_at = now
+        _sample_pools()
+        _sample_caches()
+
+
+# ── Flask hooks ──────────────────────────────────────────────────────────
+
+def metrics_view():
+    """Every metric, merged across workers in multiprocess mode."""
+    from flask import current_app
+
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    _sample(force=True)
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
+def init_app(app):
+    """Record request metrics and serve ``/metrics`` (no-op when ``METRICS_ENABLED`` is off)."""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint, response.status_code).inc()
+            _sample()
+        return response
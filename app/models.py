@@ -6,9 +6,12 @@ Models:
   Flight     — flight inventory
   Train      — train inventory
   Bus        — bus inventory
+  Archived*  — departed flights/trains/buses and their seats (app/archive.py)
   Hotel      — hotel properties
   Room       — room types within a hotel
   Booking    — unified booking ledger for all transport/hotel types
+  Review         — user reviews of booked items
+  RatingSummary  — per-item rating count, sum and histogram
 """
 from datetime import datetime, timezone
 import json
@@ -40,6 +43,12 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def is_admin(self):
+        """Listed in the ``ADMIN_USERS`` setting (usernames)."""
+        from flask import current_app
+        return self.username in current_app.config['ADMIN_USERS']
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -76,20 +85,40 @@ class Passenger(db.Model):
         return f'<Passenger {self.name}>'
 
 
+# ---------------------------------------------------------------------------
+# Ratings (denormalized onto reviewable inventory)
+# ---------------------------------------------------------------------------
+
+class RatedMixin:
+    """Review count and rating sum kept on the row, so search results can
+    show and sort by average rating without touching the reviews table."""
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def avg_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @classmethod
+    def rating_order(cls):
+        """ORDER BY clauses for best-rated first, unrated last."""
+        return (cls.rating_count == 0, (cls.rating_sum * 1.0 / db.func.nullif(cls.rating_count, 0)).desc())
+
+
 # ---------------------------------------------------------------------------
 # Transport Models
 # ---------------------------------------------------------------------------
 
-class Flight(db.Model):
-    """Flight inventory entry."""
-    __tablename__ = 'flights'
+class FlightColumns(RatedMixin):
+    """Columns and helpers shared by live and archived flights."""
 
     id = db.Column(db.Integer, primary_key=True)
     flight_number = db.Column(db.String(10), nullable=False, index=True)
     airline = db.Column(db.String(80), nullable=False)
     origin = db.Column(db.String(10), nullable=False, index=True)       # Airport code
     destination = db.Column(db.String(10), nullable=False, index=True)   # Airport code
-    departure = db.Column(db.DateTime, nullable=False)
+    departure = db.Column(db.DateTime, nullable=False, index=True)
     arrival = db.Column(db.DateTime, nullable=False)
     price = db.Column(db.Float, nullable=False)
     seats_available = db.Column(db.Integer, nullable=False, default=60)
@@ -111,23 +140,40 @@ class Flight(db.Model):
             'arrival': self.arrival.isoformat(),
             'duration': self.duration_str(),
             'price': self.price,
-            'seats_available': self.seats_available
+            'seats_available': self.seats_available,
+            'avg_rating': self.avg_rating(),
+            'rating_count': self.rating_count,
         }
 
     def __repr__(self):
         return f'<Flight {self.flight_number} {self.origin}→{self.destination}>'
 
 
-class Train(db.Model):
-    """Train inventory entry."""
-    __tablename__ = 'trains'
+class Flight(FlightColumns, db.Model):
+    """Flight inventory entry."""
+    __tablename__ = 'flights'
+    __table_args__ = (
+        # One departure per flight number and time — keeps schedule rolls idempotent
+        db.Index('uq_flight_departure', 'flight_number', 'departure', unique=True),
+        # Never reuse ids of archived rows — bookings still point at them
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ArchivedFlight(FlightColumns, db.Model):
+    """Departed flight moved out of the hot table (see app/archive.py)."""
+    __tablename__ = 'flights_archive'
+
+
+class TrainColumns(RatedMixin):
+    """Columns and helpers shared by live and archived trains."""
 
     id = db.Column(db.Integer, primary_key=True)
     train_number = db.Column(db.String(10), nullable=False, index=True)
     name = db.Column(db.String(120), nullable=False)
     origin = db.Column(db.String(80), nullable=False, index=True)       # Station name
     destination = db.Column(db.String(80), nullable=False, index=True)   # Station name
-    departure = db.Column(db.DateTime, nullable=False)
+    departure = db.Column(db.DateTime, nullable=False, index=True)
     arrival = db.Column(db.DateTime, nullable=False)
     classes = db.Column(db.Text, nullable=False, default='{}')
     seats_available = db.Column(db.Integer, nullable=False, default=120)
@@ -155,22 +201,37 @@ class Train(db.Model):
             'arrival': self.arrival.isoformat(),
             'duration': self.duration_str(),
             'classes': self.get_classes(),
-            'seats_available': self.seats_available
+            'seats_available': self.seats_available,
+            'avg_rating': self.avg_rating(),
+            'rating_count': self.rating_count,
         }
 
     def __repr__(self):
         return f'<Train {self.train_number} {self.name}>'
 
 
-class Bus(db.Model):
-    """Bus inventory entry."""
-    __tablename__ = 'buses'
+class Train(TrainColumns, db.Model):
+    """Train inventory entry."""
+    __tablename__ = 'trains'
+    __table_args__ = (
+        db.Index('uq_train_departure', 'train_number', 'departure', unique=True),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ArchivedTrain(TrainColumns, db.Model):
+    """Departed train moved out of the hot table."""
+    __tablename__ = 'trains_archive'
+
+
+class BusColumns(RatedMixin):
+    """Columns and helpers shared by live and archived buses."""
 
     id = db.Column(db.Integer, primary_key=True)
     operator = db.Column(db.String(120), nullable=False)
     origin = db.Column(db.String(80), nullable=False, index=True)
     destination = db.Column(db.String(80), nullable=False, index=True)
-    departure = db.Column(db.DateTime, nullable=False)
+    departure = db.Column(db.DateTime, nullable=False, index=True)
     arrival = db.Column(db.DateTime, nullable=False)
     bus_type = db.Column(db.String(30), nullable=False)  # Sleeper / Seater / Semi-Sleeper
     price = db.Column(db.Float, nullable=False)
@@ -193,18 +254,34 @@ class Bus(db.Model):
             'duration': self.duration_str(),
             'bus_type': self.bus_type,
             'price': self.price,
-            'seats_available': self.seats_available
+            'seats_available': self.seats_available,
+            'avg_rating': self.avg_rating(),
+            'rating_count': self.rating_count,
         }
 
     def __repr__(self):
         return f'<Bus {self.operator} {self.origin}→{self.destination}>'
 
 
+class Bus(BusColumns, db.Model):
+    """Bus inventory entry."""
+    __tablename__ = 'buses'
+    __table_args__ = (
+        db.Index('uq_bus_departure', 'operator', 'origin', 'destination', 'departure', unique=True),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ArchivedBus(BusColumns, db.Model):
+    """Departed bus moved out of the hot table."""
+    __tablename__ = 'buses_archive'
+
+
 # ---------------------------------------------------------------------------
 # Hotel & Room
 # ---------------------------------------------------------------------------
 
-class Hotel(db.Model):
+class Hotel(RatedMixin, db.Model):
     """Hotel property listing."""
     __tablename__ = 'hotels'
 
@@ -231,6 +308,8 @@ class Hotel(db.Model):
             'star_rating': self.star_rating,
             'description': self.description,
             'min_price': self.min_price(),
+            'avg_rating': self.avg_rating(),
+            'rating_count': self.rating_count,
             'rooms': [r.to_dict() for r in self.rooms]
         }
 
@@ -264,9 +343,8 @@ class Room(db.Model):
 # Seat Map
 # ---------------------------------------------------------------------------
 
-class Seat(db.Model):
-    """Individual seat within a flight, bus, or train."""
-    __tablename__ = 'seats'
+class SeatColumns:
+    """Columns and helpers shared by live and archived seats."""
 
     id = db.Column(db.Integer, primary_key=True)
     vehicle_type = db.Column(db.String(10), nullable=False, index=True)  # flight / bus / train
@@ -278,10 +356,6 @@ class Seat(db.Model):
     is_booked = db.Column(db.Boolean, default=False)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=True)
 
-    __table_args__ = (
-        db.Index('ix_seat_vehicle', 'vehicle_type', 'vehicle_id'),
-    )
-
     def to_dict(self):
         return {
             'id': self.id,
@@ -296,6 +370,23 @@ class Seat(db.Model):
         return f'<Seat {self.seat_label} {self.vehicle_type}:{self.vehicle_id}>'
 
 
+class Seat(SeatColumns, db.Model):
+    """Individual seat within a flight, bus, or train."""
+    __tablename__ = 'seats'
+    __table_args__ = (
+        db.Index('ix_seat_vehicle', 'vehicle_type', 'vehicle_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ArchivedSeat(SeatColumns, db.Model):
+    """Seat of a departed vehicle, kept for booking history."""
+    __tablename__ = 'seats_archive'
+    __table_args__ = (
+        db.Index('ix_seat_archive_vehicle', 'vehicle_type', 'vehicle_id'),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Unified Booking Ledger
 # ---------------------------------------------------------------------------
@@ -310,6 +401,7 @@ class Booking(db.Model):
     ref_id = db.Column(db.Integer, nullable=False)            # FK to the specific item
     passenger_names = db.Column(db.Text)                      # JSON list of passenger names
     num_guests = db.Column(db.Integer, default=1)
+    rooms = db.Column(db.Integer, default=1)                  # For hotels: rooms held
     travel_class = db.Column(db.String(20))                   # For trains: SL/3A/2A/1A
     check_in = db.Column(db.Date)                             # For hotels
     check_out = db.Column(db.Date)                            # For hotels
@@ -317,6 +409,7 @@ class Booking(db.Model):
     total_price = db.Column(db.Float, nullable=False)
     pnr = db.Column(db.String(10), unique=True, index=True)   # Generated on confirmation
     seat_numbers = db.Column(db.Text)                        # JSON list of assigned seat labels
+    group_pnr = db.Column(db.String(10), index=True)         # Shared by a group booking's items
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
     seats = db.relationship('Seat', backref='booking', lazy=True)
@@ -347,6 +440,7 @@ class Booking(db.Model):
             'status': self.status,
             'total_price': self.total_price,
             'pnr': self.pnr,
+            'group_pnr': self.group_pnr,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -370,13 +464,17 @@ class Review(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'booking_type', 'ref_id', name='uq_user_review'),
+        db.Index('ix_review_item_recent', 'booking_type', 'ref_id', 'created_at', 'id'),
     )
 
-    def to_dict(self):
+    def to_dict(self, username=None):
+        """Serialize; pass ``username`` when it was already joined to skip the lazy user load."""
+        if username is None:
+            username = self.user.username if self.user else 'Unknown'
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'username': self.user.username if self.user else 'Unknown',
+            'username': username,
             'booking_type': self.booking_type,
             'ref_id': self.ref_id,
             'rating': self.rating,
@@ -386,3 +484,43 @@ class Review(db.Model):
 
     def __repr__(self):
         return f'<Review #{self.id} {self.booking_type}:{self.ref_id} ★{self.rating}>'
+
+
+class RatingSummary(db.Model):
+    """Running rating aggregate for one reviewed item, updated on every new review."""
+    __tablename__ = 'rating_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_type = db.Column(db.String(10), nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('booking_type', 'ref_id', name='uq_rating_summary_item'),
+    )
+
+    def avg_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def histogram(self):
+        return {star: getattr(self, f'stars_{star}') for star in range(1, 6)}
+
+    def to_dict(self):
+        return {
+            'booking_type': self.booking_type,
+            'ref_id': self.ref_id,
+            'count': self.rating_count,
+            'avg_rating': self.avg_rating(),
+            'histogram': self.histogram(),
+        }
+
+    def __repr__(self):
+        return f'<RatingSummary {self.booking_type}:{self.ref_id} ({self.rating_count})>'
@@ -0,0 +1,264 @@
+"""Opt-in sampling profiler — flame graphs for single requests.
+
+A request is profiled when an admin (``ADMIN_USERS``) sends an
+``X-Profile: 1`` header or a ``?_profile=1`` query flag, or at random for
+``PROFILE_SAMPLE_RATE`` of all requests. Profiling is off for everyone
+else and costs nothing then.
+
+While a profiled request runs, one background thread per worker reads the
+request thread's Python stack every ``PROFILE_INTERVAL_MS``. Each sample is
+weighted by the time since the previous one, so the totals stay right even
+when the GIL delays a sample. While any capture runs, the interpreter's
+thread switch interval is lowered to the sampling interval, so the sampler
+is not starved. The finished profile is written under
+``PROFILE_DIR/<endpoint>/`` in three files:
+
+* ``<id>.collapsed`` — one ``frame;frame;frame count`` line per stack, for
+  ``flamegraph.pl`` / inferno / speedscope;
+* ``<id>.speedscope.json`` — a sampled profile for https://www.speedscope.app;
+* ``<id>.json`` — metadata (path, status, duration, trigger).
+
+Only the ``PROFILE_KEEP`` slowest captures per endpoint are kept. The
+admin page (``/admin/profiles``) lists the slowest captures across every
+worker, since they all write to the same directory.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import g, request
+
+_labels = {}  # code object -> frame label
+
+
+# ── Sampling ─────────────────────────────────────────────────────────────
+
+class Capture:
+    """Stack samples of one request."""
+
+    def __init__(self, thread_id, trigger):
+        self.thread_id = thread_id
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.samples = []   # (stack, seconds) — stack is root-first
+        self._last = self.started
+
+    def add(self, stack, now):
+        self.samples.append((stack, now - self._last))
+        self._last = now
+
+    @property
+    def duration(self):
+        return self._last - self.started
+
+
+class Sampler:
+    """One daemon thread sampling every thread with a running capture."""
+
+    def __init__(self):
+        self.interval = 0.001
+        self._captures = {}  # thread id -> Capture
+        self._lock = threading.Lock()
+        self._thread = None
+        self._switch_interval = None
+
+    def start(self, trigger):
+        capture = Capture(threading.get_ident(), trigger)
+        with self._lock:
+            self._captures[capture.thread_id] = capture
+            if self._thread is None:
+                self._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self._switch_interval, self.interval))
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+        return capture
+
+    def stop(self, capture):
+        with self._lock:
+            self._captures.pop(capture.thread_id, None)
+        capture.add(capture.samples[-1][0] if capture.samples else (), time.perf_counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._captures:
+                    sys.setswitchinterval(self._switch_interval)
+                    self._thread = None
+                    return
+                captures = list(self._captures.values())
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for capture in captures:
+                frame = frames.get(capture.thread_id)
+                if frame is not None:
+                    capture.add(_stack(frame), now)
+            del frames
+            time.sleep(self.interval)
+
+
+def _stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        label = _labels.get(code)
+        if label is None:
+            label = _labels[code] = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+        stack.append(label)
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _short_path(filename):
+    """Paths relative to the project or to site-packages — shorter flame graph labels."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(root + os.sep):
+        return os.path.relpath(filename, root)
+    _, sep, rest = filename.rpartition('site-packages' + os.sep)
+    return rest if sep else filename
+
+
+sampler = Sampler()
+
+
+# ── Output ───────────────────────────────────────────────────────────────
+
+def collapsed(capture):
+    """Brendan Gregg's collapsed-stack format, counts in samples."""
+    counts = Counter(stack for stack, _weight in capture.samples if stack)
+    return ''.join(f'{";".join(stack)} {count}\n' for stack, count in counts.most_common())
+
+
+def speedscope(capture, name):
+    """A speedscope "sampled" profile, weights in milliseconds."""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, weight in capture.samples:
+        if not stack:
+            continue
+        row = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                func, _, where = label.rpartition(' (')
+                file, _, line = where.rstrip(')').rpartition(':')
+                frames.append({'name': func, 'file': file, 'line': int(line)})
+            row.append(index[label])
+        samples.append(row)
+        weights.append(round(weight * 1000, 3))
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'py-booking profiler',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+            'startValue': 0, 'endValue': round(sum(weights), 3),
+            'samples': samples, 'weights': weights,
+        }],
+    }
+
+
+def save(capture, directory, keep, meta):
+    """Write a capture's files and prune the endpoint down to its ``keep`` slowest."""
+    folder = os.path.join(directory, meta['endpoint'])
+    os.makedirs(folder, exist_ok=True)
+    capture_id = f'{int(time.time() * 1000)}-{os.getpid()}-{capture.thread_id % 100000}'
+    stem = os.path.join(folder, capture_id)
+    meta = {**meta, 'id': capture_id, 'samples': len(capture.samples)}
+    with open(stem + '.collapsed', 'w') as f:
+        f.write(collapsed(capture))
+    with open(stem + '.speedscope.json', 'w') as f:
+        json.dump(speedscope(capture, f"{meta['method']} {meta['path']}"), f)
+    with open(stem + '.json', 'w') as f:
+        json.dump(meta, f)
+
+    captures = list_captures(directory, endpoint=meta['endpoint'])
+    for old in captures[keep:]:
+        for suffix in ('.json', '.collapsed', '.speedscope.json'):
+            try:
+                os.remove(os.path.join(folder, old['id'] + suffix))
+            except FileNotFoundError:
+                pass  # pruned by another worker
+    return capture_id
+
+
+def list_captures(directory, endpoint=None, limit=None):
+    """Capture metadata, slowest first."""
+    if not os.path.isdir(directory):
+        return []
+    endpoints = [endpoint] if endpoint else os.listdir(directory)
+    captures = []
+    for name in endpoints:
+        folder = os.path.join(directory, name)
+        if not os.path.isdir(folder):
+            continue
+        for filename in os.listdir(folder):
+            if not filename.endswith('.json') or filename.endswith('.speedscope.json'):
+                continue
+            try:
+                with open(os.path.join(folder, filename)) as f:
+                    captures.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being written or pruned by another worker
+    captures.sort(key=lambda c: c['duration_ms'], reverse=True)
+    return captures[:limit] if limit else captures
+
+
+# ── Flask hooks ──────────────────────────────────────────────────────────
+
+def _trigger(app):
+    """Why this request should be profiled, or ``None``."""
+    flag = request.headers.get('X-Profile') or request.args.get('_profile')
+    if flag and flag != '0':
+        from flask_login import current_user
+        if current_user.is_authenticated and current_user.is_admin:
+            return 'admin'
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+def init_app(app):
+    """Profile requests on demand or at ``PROFILE_SAMPLE_RATE``."""
+    sampler.interval = app.config['PROFILE_INTERVAL_MS'] / 1000
+
+    @app.before_request
+    def _start_profile():
+        if request.endpoint in (None, 'static'):
+            return
+        trigger = _trigger(app)
+        if trigger:
+            g.profile = sampler.start(trigger)
+
+    @app.after_request
+    def _stop_profile(response):
+        capture = g.pop('profile', None)
+        if capture is None:
+            return response
+        sampler.stop(capture)
+        from flask_login import current_user
+        capture_id = save(capture, app.config['PROFILE_DIR'], app.config['PROFILE_KEEP'], {
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'duration_ms': round(capture.duration * 1000, 2),
+            'trigger': capture.trigger,
+            'user': current_user.username if current_user.is_authenticated else None,
+            'captured_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        })
+        response.headers['X-Profile-Id'] = f'{request.endpoint}/{capture_id}'
+        return response
+
+    @app.teardown_request
+    def _drop_profile(exc):
+        capture = g.pop('profile', None)  # left behind by an unhandled error
+        if capture is not None:
+            sampler.stop(capture)
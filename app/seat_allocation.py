@@ -0,0 +1,243 @@
+"""Seat assignment over a vehicle's seat grid (``Seat.row`` / ``Seat.col``).
+
+Used when the booking picks the seats: bookings made without a seat
+selection, group bookings, and the seat map's "seat us together" button.
+
+Free seats are grouped into *runs* — neighbouring columns in one row (a
+train compartment's eight berths are one row). ``FreeBlockIndex`` keeps a
+vehicle's runs bucketed by length, so a party that fits in one row is
+placed by looking at a bounded number of runs, whatever the vehicle's
+size. Parties wider than any run get the fewest consecutive rows.
+
+Preferences are per passenger: ``'window'``, or ``'lower'`` for a lower
+berth (LB/SL) on trains — given to seniors automatically. A block that
+satisfies more of them wins over a tighter fit; the chosen seats are
+returned in passenger order.
+
+Each worker caches one index per vehicle (``seat_index``) and updates it
+as it hands seats out. Another worker's bookings make it stale; a stale
+pick fails the conditional seat claim and the caller retries with
+``refresh=True``.
+"""
+import threading
+
+from app.cache import TTLCache
+
+# Grid columns by vehicle type — matches the layouts in seed_data.py
+WINDOW_COLS = {'flight': {0, 5}, 'bus': {0, 3}, 'train': {0, 3, 6, 7}}
+AISLE_AFTER = {'flight': 2, 'bus': 1, 'train': 5}  # a party split by the aisle is less together
+LOWER_BERTHS = ('LB', 'SL')
+SENIOR_AGE = 60
+
+# Runs looked at per length bucket — keeps allocation O(1) per request
+SCAN_LIMIT = 8
+
+_indexes = TTLCache(maxsize=4096, ttl=300, name='seat_index')
+
+
+def seat_needs(vehicle_type, count, preference=None, ages=()):
+    """Per-passenger preferences for a party of ``count``.
+
+    ``preference`` (``'window'`` or ``'lower'``) applies to everyone; on
+    trains, passengers aged ``SENIOR_AGE`` or over always ask for a lower
+    berth.
+    """
+    if preference == 'lower' and vehicle_type != 'train':
+        preference = None
+    ages = list(ages) + [None] * (count - len(ages))
+    needs = []
+    for age in ages[:count]:
+        if vehicle_type == 'train' and age is not None and age >= SENIOR_AGE:
+            needs.append('lower')
+        else:
+            needs.append(preference if preference in ('window', 'lower') else None)
+    return needs
+
+
+class FreeBlockIndex:
+    """Free seats of one vehicle, as runs bucketed by length."""
+
+    def __init__(self, vehicle_type, seats):
+        self.vehicle_type = vehicle_type
+        self.lock = threading.Lock()
+        self._rows = {}      # row -> {col: seat}
+        self._runs = {}      # row -> [run, ...]
+        self._buckets = {}   # length -> {(row, first col): run}
+        self._by_id = {}     # seat id -> seat
+        self._free = 0
+        self._add(seats)
+
+    def __len__(self):
+        return self._free
+
+    # ── Allocation ──
+
+    def allocate(self, needs, reserve=True):
+        """Seats for a party with per-passenger ``needs``, in passenger order.
+
+        Returns ``None`` when the vehicle has fewer free seats than the
+        party. With ``reserve`` the seats leave the index until released.
+        """
+        count = len(needs)
+        with self.lock:
+            if count == 0:
+                return []
+            if count > len(self):
+                return None
+            block = self._best_run_block(needs) or self._best_row_span(count)
+            if reserve:
+                self._remove(block)
+        return self._assign(block, needs)
+
+    def take(self, seat_ids):
+        """Drop seats booked elsewhere (e.g. picked on the seat map)."""
+        with self.lock:
+            self._remove([self._by_id[sid] for sid in seat_ids if sid in self._by_id])
+
+    def release(self, seats):
+        """Put reserved seats back after a booking that did not go through."""
+        with self.lock:
+            self._add(seats)
+
+    def _best_run_block(self, needs):
+        count = len(needs)
+        want_window = sum(1 for n in needs if n == 'window')
+        want_lower = sum(1 for n in needs if n == 'lower')
+        windows = WINDOW_COLS.get(self.vehicle_type, set())
+        aisle = AISLE_AFTER.get(self.vehicle_type)
+
+        best, best_score = None, None
+        for length in sorted(l for l in self._buckets if l >= count):
+            for index, run in enumerate(self._buckets[length].values()):
+                if index == SCAN_LIMIT:
+                    break
+                for start in range(length - count + 1):
+                    block = run[start:start + count]
+                    missing = (max(0, want_lower - sum(1 for s in block if _is_lower(s)))
+                               + max(0, want_window - sum(1 for s in block if s.col in windows)))
+                    split = any(s.col == aisle for s in block[:-1])
+                    score = (missing, split, length - count, block[0].row, block[0].col)
+                    if best_score is None or score < best_score:
+                        best, best_score = block, score
+            if best_score is not None and best_score[:3] == (0, False, 0):
+                break  # a perfect fit — wider buckets cannot beat it
+        return best
+
+    def _best_row_span(self, count):
+        """Fewest consecutive rows holding ``count`` free seats, filled row by row."""
+        rows = sorted(self._rows)
+        best, lo, held = None, 0, 0
+        for hi, row in enumerate(rows):
+            held += len(self._rows[row])
+            while held - len(self._rows[rows[lo]]) >= count:
+                held -= len(self._rows[rows[lo]])
+                lo += 1
+            if held >= count and (best is None or row - rows[lo] < best[0]):
+                best = (row - rows[lo], lo, hi)
+        _, lo, hi = best
+        seats = [self._rows[row][col] for row in rows[lo:hi + 1] for col in sorted(self._rows[row])]
+        return seats[:count]
+
+    def _assign(self, block, needs):
+        """Order ``block`` so passenger ``i`` gets a seat matching ``needs[i]``."""
+        windows = WINDOW_COLS.get(self.vehicle_type, set())
+        matches = {'lower': _is_lower, 'window': lambda seat: seat.col in windows}
+        left = list(block)
+        chosen = [None] * len(needs)
+        for kind in ('lower', 'window'):  # scarcest first
+            for i, need in enumerate(needs):
+                seat = next((s for s in left if matches[kind](s)), None) if need == kind else None
+                if seat is not None:
+                    chosen[i] = seat
+                    left.remove(seat)
+        for i, seat in enumerate(chosen):
+            if seat is None:
+                chosen[i] = left.pop(0)
+        return chosen
+
+    # ── Bookkeeping ──
+
+    def _add(self, seats):
+        for seat in seats:
+            cols = self._rows.setdefault(seat.row, {})
+            self._free += seat.col not in cols
+            cols[seat.col] = seat
+            self._by_id[seat.id] = seat
+        for row in {seat.row for seat in seats}:
+            self._index_row(row)
+
+    def _remove(self, seats):
+        for seat in seats:
+            self._free -= self._rows[seat.row].pop(seat.col, None) is not None
+            self._by_id.pop(seat.id, None)
+        for row in {seat.row for seat in seats}:
+            self._index_row(row)
+            if not self._rows[row]:
+                del self._rows[row]
+
+    def _index_row(self, row):
+        for run in self._runs.pop(row, []):
+            self._buckets[len(run)].pop((row, run[0].col), None)
+        cols = self._rows.get(row) or {}
+        runs = []
+        for col in sorted(cols):
+            if runs and runs[-1][-1].col + 1 == col:
+                runs[-1].append(cols[col])
+            else:
+                runs.append([cols[col]])
+        if runs:
+            self._runs[row] = runs
+        for run in runs:
+            self._buckets.setdefault(len(run), {})[(row, run[0].col)] = run
+
+
+def _is_lower(seat):
+    return seat.seat_label.startswith(LOWER_BERTHS)
+
+
+# ── Per-vehicle cache ────────────────────────────────────────────────────
+
+def seat_index(vehicle_type, vehicle_id, refresh=False):
+    """This worker's free-block index for a vehicle, loading it on a miss."""
+    index = None if refresh else cached_index(vehicle_type, vehicle_id)
+    if index is None:
+        index = store_index(vehicle_type, vehicle_id, load_free_seats(vehicle_type, vehicle_id))
+    return index
+
+
+def cached_index(vehicle_type, vehicle_id):
+    """The cached index, or ``None`` — for keeping it current without loading it."""
+    return _indexes.get((vehicle_type, vehicle_id))
+
+
+def store_index(vehicle_type, vehicle_id, seats):
+    """Build and cache a vehicle's index from its free seats (e.g. loaded by the async API).
+
+    An index with no free seats is not cached: it may belong to a vehicle
+    that doesn't exist, and a sold-out one has nothing to keep current.
+    """
+    index = FreeBlockIndex(vehicle_type, seats)
+    if seats:
+        _indexes.set((vehicle_type, vehicle_id), index)
+    return index
+
+
+def free_seats_query(vehicle_type, vehicle_id, for_update=False):
+    """Select a vehicle's free seats as ``(id, row, col, seat_label)`` rows."""
+    import sqlalchemy as sa
+    from app.models import Seat
+
+    query = sa.select(Seat.id, Seat.row, Seat.col, Seat.seat_label).where(
+        Seat.vehicle_type == vehicle_type, Seat.vehicle_id == vehicle_id,
+        Seat.is_booked == False,  # noqa: E712
+    )
+    if for_update:
+        query = query.with_for_update()
+    return query
+
+
+def load_free_seats(vehicle_type, vehicle_id, for_update=False):
+    """Free seats of a vehicle as ``(id, row, col, seat_label)`` rows."""
+    from app.extensions import db
+
+    return db.session.execute(free_seats_query(vehicle_type, vehicle_id, for_update)).all()
@@ -0,0 +1,281 @@
+"""Live seat availability — booked/released deltas pushed to open seat maps.
+
+The booking paths call :func:`publish` after they commit: a booking with
+seats (``booking_service``, group bookings, the async API) and a
+cancellation that frees seats. Seat maps subscribe with server-sent
+events on the async API (``GET /api/v2/seats/<type>/<id>/events``) and
+apply each delta to the map they loaded, instead of polling it again.
+The stream needs the ASGI server (``asgi.py``). It has no WSGI version,
+since every open map would pin a gthread worker thread, so under
+gunicorn alone seat maps stay static.
+
+Every worker keeps a :class:`Hub` with one channel per watched vehicle.
+A published delta is encoded once into an SSE frame and kept in a short
+ring buffer (``REPLAY``). Waiting subscribers on an event loop share one
+future per channel, so a delta costs one wake-up per loop plus one socket
+write per subscriber, and never a database query. Thousands of
+subscribers can watch one vehicle. A subscriber that reconnects with
+``Last-Event-ID`` gets the deltas it missed from the ring. If they have
+already been dropped, or it reconnects to another worker or to a
+channel that emptied and started over in between, it gets a
+``resync`` event and reloads the map.
+
+Deltas reach other workers through the bus named by ``SEAT_EVENTS_BUS``:
+
+* unset — none; fine when one process serves the site;
+* ``unix:///tmp/py-booking-seats`` — Unix datagram sockets in that
+  directory, one per worker, reaching every worker on the host. It stands
+  in for a broker locally and on single-host deploys;
+* ``redis://host:6379/0`` — Redis pub/sub, reaching every host. Needs the
+  ``redis`` package.
+
+Sends go through a background thread, so publishing never blocks a
+request or the event loop. A worker whose socket buffer is full drops
+the delta. Its subscribers see the seat change on their next reload.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from collections import deque
+from itertools import count, islice
+
+log = logging.getLogger(__name__)
+
+REPLAY = 512          # deltas kept per channel for reconnecting subscribers
+BUS_CHANNEL = 'py-booking:seat-events'
+
+
+def frame(event, data, event_id=None):
+    """One server-sent event, encoded."""
+    head = f'id: {event_id}\n' if event_id else ''
+    return f'{head}event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+
+# ── In-process pub/sub ──────────────────────────────────────────────────
+
+class _Channel:
+    __slots__ = ('epoch', 'seq', 'frames', 'subscribers', 'waiters')
+
+    def __init__(self, epoch):
+        self.epoch = epoch                   # tells this channel's event ids from an earlier one's
+        self.seq = 0
+        self.frames = deque(maxlen=REPLAY)   # SSE frames of the last deltas, oldest first
+        self.subscribers = 0
+        self.waiters = {}                    # event loop -> future resolved by the next delta
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Hub:
+    """Channels of one worker, keyed by ``(vehicle_type, vehicle_id)``."""
+
+    def __init__(self):
+        self.token = uuid.uuid4().hex[:8]  # tells this worker's event ids from another's
+        self._channels = {}
+        self._epochs = count(1)
+        self._lock = threading.Lock()
+
+    def deliver(self, key, delta):
+        """Hand a delta to this worker's subscribers of ``key``; thread-safe."""
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                return  # nobody here is watching this vehicle
+            channel.seq += 1
+            channel.frames.append(frame('seats', delta, f'{self.token}-{channel.epoch}-{channel.seq}'))
+            waiters, channel.waiters = channel.waiters, {}
+        for loop, future in waiters.items():
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def join(self, key):
+        """Register a subscriber; returns the channel's current sequence number."""
+        with self._lock:
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = _Channel(next(self._epochs))
+            channel.subscribers += 1
+            return channel.seq
+
+    def leave(self, key):
+        with self._lock:
+            channel = self._channels[key]
+            channel.subscribers -= 1
+            if not channel.subscribers:
+                del self._channels[key]
+
+    def since(self, key, seq):
+        """``(frames after seq, current seq)``; frames is ``None`` when some are gone."""
+        with self._lock:
+            channel = self._channels[key]
+            missing = channel.seq - seq
+            if missing < 0 or missing > len(channel.frames):
+                return None, channel.seq
+            return list(islice(reversed(channel.frames), missing))[::-1], channel.seq
+
+    def wait(self, key, seq, loop):
+        """A future on ``loop`` resolved by the next delta, or ``None`` if one came after ``seq``."""
+        with self._lock:
+            channel = self._channels[key]
+            if channel.seq != seq:
+                return None
+            future = channel.waiters.get(loop)
+            if future is None:
+                future = channel.waiters[loop] = loop.create_future()
+            return future
+
+    def parse_id(self, key, event_id):
+        """The sequence number in an event id from ``key``'s current channel, else ``None``."""
+        token, epoch, seq = (event_id.split('-') + ['', ''])[:3]
+        with self._lock:
+            channel = self._channels[key]
+            if token != self.token or epoch != str(channel.epoch) or not seq.isdigit():
+                return None
+        return int(seq)
+
+
+hub = Hub()
+
+
+# ── Cross-worker bus ────────────────────────────────────────────────────
+
+class SocketBus:
+    """Unix datagram sockets in one directory, one per process: every worker on this host."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f'{os.getpid()}.sock')
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left by a dead process with our pid
+        self._inbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._inbox.bind(self.path)
+        self._outbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._outbox.setblocking(False)
+        atexit.register(self.close)
+
+    def listen(self, on_message):
+        while True:
+            on_message(self._inbox.recv(65536))
+
+    def send(self, data):
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith('.sock'):
+                continue
+            try:
+                self._outbox.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)  # that worker has exited
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                pass  # its buffer is full; it misses this delta
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class RedisBus:
+    """Redis pub/sub: every worker on every host."""
+
+    def __init__(self, url):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    def listen(self, on_message):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(BUS_CHANNEL)
+        for message in pubsub.listen():
+            on_message(message['data'])
+
+    def send(self, data):
+        self._redis.publish(BUS_CHANNEL, data)
+
+
+_bus_url = ''
+_bus = None
+_bus_pid = None
+_bus_lock = threading.Lock()
+_outgoing = queue.SimpleQueue()
+
+
+def _on_bus_message(data):
+    message = json.loads(data)
+    if message.pop('origin') != hub.token:
+        hub.deliver((message.pop('type'), message.pop('id')), message)
+
+
+def _run(target, *args):
+    def loop():
+        while True:
+            try:
+                target(*args)
+            except Exception:  # keep the worker's bus alive through a bad message or a broker blip
+                log.exception('seat event bus error')
+
+    threading.Thread(target=loop, name=f'seat-bus-{target.__name__}', daemon=True).start()
+
+
+def _sender(bus):
+    bus.send(_outgoing.get())
+
+
+def _ensure_process():
+    """Per-process setup, after gunicorn/uvicorn forks: a fresh hub token and the bus threads."""
+    global _bus, _bus_pid
+    if _bus_pid == os.getpid():
+        return
+    with _bus_lock:
+        if _bus_pid == os.getpid():
+            return
+        hub.token = uuid.uuid4().hex[:8]
+        _bus = None
+        if _bus_url.startswith('unix://'):
+            _bus = SocketBus(_bus_url[len('unix://'):])
+        elif _bus_url.startswith(('redis://', 'rediss://')):
+            _bus = RedisBus(_bus_url)
+        if _bus is not None:
+            _run(_bus.listen, _on_bus_message)
+            _run(_sender, _bus)
+        _bus_pid = os.getpid()
+
+
+# ── API ─────────────────────────────────────────────────────────────────
+
+def publish(vehicle_type, vehicle_id, booked=(), released=()):
+    """Announce seats booked and/or released on a vehicle; call after the commit."""
+    if not booked and not released:
+        return
+    _ensure_process()
+    delta = {'booked': sorted(booked), 'released': sorted(released)}
+    hub.deliver((vehicle_type, vehicle_id), delta)
+    if _bus is not None:
+        _outgoing.put(json.dumps({'origin': hub.token, 'type': vehicle_type, 'id': vehicle_id, **delta}).encode())
+
+
+def subscribe(vehicle_type, vehicle_id):
+    """Join a vehicle's channel for this process; returns ``(key, current seq)``."""
+    _ensure_process()
+    key = (vehicle_type, vehicle_id)
+    return key, hub.join(key)
+
+
+def init_app(app):
+    """Pick the cross-worker bus from ``SEAT_EVENTS_BUS``."""
+    global _bus_url, _bus_pid
+    if app.config['SEAT_EVENTS_BUS'] != _bus_url:
+        _bus_url = app.config['SEAT_EVENTS_BUS']
+        _bus_pid = None
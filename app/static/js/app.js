@@ -70,9 +70,47 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   // ── City Autocomplete ──
+  // The first letter fetches every city starting with it (`full=1`, which
+  // the browser caches for a day). Longer prefixes are filtered from that
+  // list locally, with the server's rules: name or code prefix, one city per
+  // code, at most AC_LIMIT.
+  const AC_LIMIT = 8;
+  const cityLists = new Map(); // first letter -> full candidate list
+  let pendingCities = null; // { letter, controller, promise } of the fetch in flight
   let debounceTimer = null;
   const autocompleteInputs = document.querySelectorAll(".city-autocomplete");
 
+  function matchCities(candidates, q) {
+    const seen = new Set();
+    const matches = [];
+    for (const c of candidates) {
+      if (matches.length >= AC_LIMIT) break;
+      if (seen.has(c.code)) continue;
+      if (c.city.toLowerCase().startsWith(q) || c.code.toLowerCase().startsWith(q)) {
+        seen.add(c.code);
+        matches.push(c);
+      }
+    }
+    return matches;
+  }
+
+  function loadCities(letter) {
+    if (pendingCities && pendingCities.letter === letter) return pendingCities.promise;
+    if (pendingCities) pendingCities.controller.abort(); // the user moved on to another letter
+    const controller = new AbortController();
+    const promise = fetch(`/api/cities?q=${encodeURIComponent(letter)}&full=1`, { signal: controller.signal })
+      .then((r) => (r.ok ? r.json() : Promise.reject(new Error(r.statusText))))
+      .then((candidates) => {
+        cityLists.set(letter, candidates);
+        return candidates;
+      })
+      .finally(() => {
+        if (pendingCities && pendingCities.controller === controller) pendingCities = null;
+      });
+    pendingCities = { letter, controller, promise };
+    return promise;
+  }
+
   autocompleteInputs.forEach((input) => {
     // Create dropdown container
     const wrapper = input.parentElement;
@@ -82,44 +120,54 @@ document.addEventListener("DOMContentLoaded", () => {
     dropdown.className = "autocomplete-dropdown";
     wrapper.appendChild(dropdown);
 
+    function showCities(cities) {
+      if (!cities.length) {
+        dropdown.style.display = "none";
+        return;
+      }
+      dropdown.innerHTML = cities
+        .map(
+          (c) => `
+        <div class="ac-item" data-city="${c.city}" data-code="${c.code}">
+          <span class="ac-item-city">${c.city}</span>
+          <span class="ac-item-code">${c.code}</span>
+        </div>`,
+        )
+        .join("");
+      dropdown.style.display = "block";
+
+      // Click handler for items
+      dropdown.querySelectorAll(".ac-item").forEach((item) => {
+        item.addEventListener("mousedown", (e) => {
+          e.preventDefault();
+          input.value = item.dataset.city;
+          dropdown.style.display = "none";
+        });
+      });
+    }
+
     input.addEventListener("input", () => {
-      const q = input.value.trim();
+      const q = input.value.trim().toLowerCase();
+      clearTimeout(debounceTimer);
       if (q.length < 1) {
         dropdown.style.display = "none";
         return;
       }
 
-      clearTimeout(debounceTimer);
+      const cached = cityLists.get(q[0]);
+      if (cached) {
+        showCities(matchCities(cached, q));
+        return;
+      }
       debounceTimer = setTimeout(() => {
-        fetch(`/api/cities?q=${encodeURIComponent(q)}`)
-          .then((r) => r.json())
-          .then((cities) => {
-            if (!cities.length) {
-              dropdown.style.display = "none";
-              return;
-            }
-            dropdown.innerHTML = cities
-              .map(
-                (c) => `
-              <div class="ac-item" data-city="${c.city}" data-code="${c.code}">
-                <span class="ac-item-city">${c.city}</span>
-                <span class="ac-item-code">${c.code}</span>
-              </div>`,
-              )
-              .join("");
-            dropdown.style.display = "block";
-
-            // Click handler for items
-            dropdown.querySelectorAll(".ac-item").forEach((item) => {
-              item.addEventListener("mousedown", (e) => {
-                e.preventDefault();
-                input.value = item.dataset.city;
-                dropdown.style.display = "none";
-              });
-            });
+        loadCities(q[0])
+          .then((candidates) => {
+            // Filter for what the input says now — typing went on while we waited
+            const current = input.value.trim().toLowerCase();
+            if (current && current[0] === q[0]) showCities(matchCities(candidates, current));
           })
-          .catch(() => {
-            dropdown.style.display = "none";
+          .catch((err) => {
+            if (err.name !== "AbortError") dropdown.style.display = "none";
           });
       }, 200);
     });
@@ -211,7 +259,7 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   // ── Global Loading State for Forms and Actions ──
-  const searchForms = document.querySelectorAll("form:not(.cancel-form)");
+  const searchForms = document.querySelectorAll("form:not(.cancel-form):not([data-no-loader])");
   const loader = document.getElementById("global-loader");
   const loaderText = document.getElementById("loader-text");
 
@@ -279,23 +327,75 @@ document.addEventListener("DOMContentLoaded", () => {
       chatMessages.scrollTop = chatMessages.scrollHeight;
     };
 
+    const addCards = (results) => {
+      if (!results.length) return;
+      const list = document.createElement("div");
+      list.className = "chat-cards";
+      results.forEach((r) => {
+        const card = document.createElement("a");
+        card.className = "chat-card";
+        card.href = r.url;
+        card.innerHTML = `
+          <span class="chat-card-title"></span>
+          <span class="chat-card-sub"></span>
+          <span class="chat-card-price">₹${Math.round(r.price).toLocaleString("en-IN")}</span>`;
+        card.querySelector(".chat-card-title").textContent = r.title;
+        card.querySelector(".chat-card-sub").textContent = r.subtitle;
+        list.appendChild(card);
+      });
+      chatMessages.appendChild(list);
+      chatMessages.scrollTop = chatMessages.scrollHeight;
+    };
+
+    // Replies stream in as Server-Sent Events: intent → chunk* → results → done
     const sendChat = () => {
       const msg = chatInput.value.trim();
       if (!msg) return;
       addMsg(msg, "user");
       chatInput.value = "";
 
-      fetch("/api/chat", {
+      const div = document.createElement("div");
+      div.className = "chat-msg chat-msg--bot chat-msg--typing";
+      div.textContent = "…";
+      chatMessages.appendChild(div);
+      let text = "";
+
+      const handleEvent = (block) => {
+        const event = (block.match(/^event: (.*)$/m) || [])[1];
+        const data = JSON.parse((block.match(/^data: (.*)$/m) || [, "{}"])[1]);
+        if (event === "chunk") {
+          text += data.text;
+          div.classList.remove("chat-msg--typing");
+          div.innerHTML = formatBotReply(text);
+        } else if (event === "results") {
+          addCards(data);
+        }
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+      };
+
+      fetch("/api/chat/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ message: msg }),
       })
-        .then((r) => r.json())
-        .then((data) => {
-          addMsg(data.reply || "Sorry, something went wrong!", "bot");
+        .then(async (r) => {
+          if (!r.ok || !r.body) throw new Error("stream unavailable");
+          const reader = r.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = "";
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const blocks = buffer.split("\n\n");
+            buffer = blocks.pop();
+            blocks.forEach(handleEvent);
+          }
+          if (!text) div.innerHTML = formatBotReply("Sorry, something went wrong!");
         })
         .catch(() => {
-          addMsg("Oops! Couldn't reach the assistant. Try again.", "bot");
+          div.classList.remove("chat-msg--typing");
+          div.textContent = "Oops! Couldn't reach the assistant. Try again.";
         });
     };
 
@@ -3,17 +3,27 @@
  *
  * Usage:
  *   SeatMap.init({ vehicleType, vehicleId, containerId, maxSeats, onSelectionChange })
+ *   SeatMap.suggest(preference)   // select maxSeats free seats next to each other
+ *
+ * While the map is open, seats booked or released by others arrive as
+ * server-sent events (/api/v2/seats/<type>/<id>/events, served by the ASGI
+ * app) and are applied in place. Without that endpoint the map stays as loaded.
  */
 const SeatMap = (() => {
     let _config = {};
     let _selectedSeats = [];
     let _seatData = [];
+    let _events = null;     // EventSource of live seat deltas
+    let _early = [];        // deltas that arrived before the map loaded
 
     /* ────────── PUBLIC ────────── */
 
     function init(config) {
+        const sameVehicle = _events && _config.vehicleType === config.vehicleType
+            && _config.vehicleId === config.vehicleId;
         _config = config;
         _selectedSeats = [];
+        if (!sameVehicle) subscribe();
         fetchSeats();
     }
 
@@ -21,22 +31,106 @@ const SeatMap = (() => {
         return _selectedSeats.map(s => ({ id: s.id, label: s.seat_label }));
     }
 
+    async function suggest(preference = '') {
+        const params = new URLSearchParams({ count: _config.maxSeats, preference });
+        try {
+            const res = await fetch(`/api/seats/${_config.vehicleType}/${_config.vehicleId}/suggest?${params}`);
+            const data = await res.json();
+            if (!data.seats || data.seats.length === 0) {
+                showToast('Not enough free seats together');
+                return;
+            }
+            const ids = new Set(data.seats.map(s => s.id));
+            _selectedSeats = _seatData.filter(s => ids.has(s.id));
+            document.querySelectorAll(`#${_config.containerId} .seat[data-seat-id]`).forEach(el => {
+                const selected = ids.has(Number(el.dataset.seatId));
+                el.classList.toggle('selected', selected);
+                if (!el.classList.contains('booked')) el.classList.toggle('available', !selected);
+            });
+            syncHiddenInputs();
+            if (_config.onSelectionChange) _config.onSelectionChange(_selectedSeats);
+        } catch (e) {
+            showToast('Could not suggest seats');
+        }
+    }
+
     /* ────────── DATA ────────── */
 
     async function fetchSeats() {
         const container = document.getElementById(_config.containerId);
         container.innerHTML = '<div class="seat-loading"><div class="seat-loading-spinner"></div>Loading seat map…</div>';
+        _seatData = [];
 
         try {
             const res = await fetch(`/api/seats/${_config.vehicleType}/${_config.vehicleId}`);
             const data = await res.json();
             _seatData = data.seats;
             render();
+            _early.splice(0).forEach(applyDelta);
         } catch (e) {
             container.innerHTML = '<p style="color:var(--text);text-align:center;padding:24px;">Could not load seat map.</p>';
         }
     }
 
+    /* ────────── LIVE UPDATES ────────── */
+
+    function subscribe() {
+        if (_events) _events.close();
+        _events = null;
+        _early = [];
+        if (!window.EventSource) return;
+        _events = new EventSource(`/api/v2/seats/${_config.vehicleType}/${_config.vehicleId}/events`);
+        _events.addEventListener('seats', e => applyDelta(JSON.parse(e.data)));
+        _events.addEventListener('resync', () => {
+            // Deltas were missed while disconnected — reload, keeping the selection if still free
+            const kept = new Set(_selectedSeats.map(s => s.id));
+            fetchSeats().then(() => reselect(kept));
+        });
+        _events.onerror = () => {
+            // The browser retries by itself; a refusal (no live endpoint) closes the source for good
+            if (_events && _events.readyState === EventSource.CLOSED) _events = null;
+        };
+    }
+
+    function applyDelta(delta) {
+        if (!_seatData.length) {
+            _early.push(delta);
+            return;
+        }
+        const booked = new Set(delta.booked);
+        const released = new Set(delta.released);
+        let lost = 0;
+        _seatData.forEach(seat => {
+            if (booked.has(seat.id)) seat.is_booked = true;
+            else if (released.has(seat.id)) seat.is_booked = false;
+            else return;
+
+            const idx = _selectedSeats.findIndex(s => s.id === seat.id);
+            if (seat.is_booked && idx !== -1) {
+                _selectedSeats.splice(idx, 1);
+                lost++;
+            }
+            const el = document.querySelector(`#${_config.containerId} .seat[data-seat-id="${seat.id}"]`);
+            if (el) setSeatState(el, seat, false);
+        });
+        if (lost) {
+            syncHiddenInputs();
+            if (_config.onSelectionChange) _config.onSelectionChange(_selectedSeats);
+            showToast(lost === 1 ? 'A seat you picked was just booked by someone else'
+                                 : `${lost} seats you picked were just booked by someone else`);
+        }
+    }
+
+    function reselect(ids) {
+        _selectedSeats = _seatData.filter(s => ids.has(s.id) && !s.is_booked).slice(0, _config.maxSeats);
+        _selectedSeats.forEach(seat => {
+            const el = document.querySelector(`#${_config.containerId} .seat[data-seat-id="${seat.id}"]`);
+            if (el) setSeatState(el, seat, true);
+        });
+        syncHiddenInputs();
+        if (_config.onSelectionChange) _config.onSelectionChange(_selectedSeats);
+    }
+
     /* ────────── RENDER ROUTER ────────── */
 
     function render() {
@@ -313,25 +407,29 @@ const SeatMap = (() => {
 
     function createSeatEl(seat, isBerth = false) {
         const el = document.createElement('div');
-        el.className = `seat ${seat.is_booked ? 'booked' : 'available'}${isBerth ? ' berth' : ''}`;
+        el.className = `seat${isBerth ? ' berth' : ''}`;
         el.dataset.seatId = seat.id;
         el.dataset.seatLabel = seat.seat_label;
 
         el.innerHTML = `<span class="seat-label">${seat.seat_label}</span>`;
-
-        if (!seat.is_booked) {
-            el.addEventListener('click', () => toggleSeat(el, seat));
-            el.title = `Seat ${seat.seat_label} — Click to select`;
-        } else {
-            el.title = `Seat ${seat.seat_label} — Booked`;
-        }
+        // Bound even when booked — a live update may free the seat later
+        el.addEventListener('click', () => toggleSeat(el, seat));
+        setSeatState(el, seat, false);
 
         return el;
     }
 
+    function setSeatState(el, seat, selected) {
+        el.classList.toggle('booked', seat.is_booked);
+        el.classList.toggle('selected', !seat.is_booked && selected);
+        el.classList.toggle('available', !seat.is_booked && !selected);
+        el.title = seat.is_booked ? `Seat ${seat.seat_label} — Booked` : `Seat ${seat.seat_label} — Click to select`;
+    }
+
     /* ────────── SELECTION LOGIC ────────── */
 
     function toggleSeat(el, seat) {
+        if (seat.is_booked) return;
         const idx = _selectedSeats.findIndex(s => s.id === seat.id);
 
         if (idx !== -1) {
@@ -401,5 +499,5 @@ const SeatMap = (() => {
 
     /* ────────── PUBLIC API ────────── */
 
-    return { init, getSelectedSeats };
+    return { init, getSelectedSeats, suggest };
 })();
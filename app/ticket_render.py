@@ -0,0 +1,235 @@
+"""Server-side ticket rendering — QR codes, booking details, PDF and batch export.
+
+Used by the ticket blueprint for the on-screen ticket, the single-ticket
+PDF download, and the batch export that corporate travel desks use to
+pull hundreds of tickets at once.
+
+PDF conversion uses WeasyPrint when it is installed (it is optional, not
+in requirements.txt). Without it, ``/ticket/<id>/pdf`` downloads the
+print-ready HTML ticket (QR code inlined) and ``/tickets/batch`` zips those
+HTML files, so export still works on a bare install; no pool is started.
+
+PDFs are rendered in a small process pool per worker
+(``TICKET_RENDER_WORKERS``, default 2). Its processes come from a
+forkserver, never forked from the multithreaded worker with its open
+database connections.
+
+qrcode/PIL, WeasyPrint and the process pool are imported on first use, so
+workers that never serve a ticket don't pay for them at startup.
+"""
+import base64
+import io
+import json
+import os
+import zipfile
+from functools import lru_cache
+
+from flask import current_app, url_for
+
+from app.archive import load_items
+
+DEFAULT_RENDER_WORKERS = 2  # per gunicorn worker — there are 2 × CPUs + 1 of those
+
+_executor = None
+
+
+# ── QR codes ─────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=2048)
+def qr_png(data):
+    """Return the PNG bytes of a QR code encoding ``data``.
+
+    Cached: a ticket's verification URL never changes once the PNR is set.
+    """
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_M,
+                       box_size=8, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color='#1e1b4b', back_color='white')
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+# ── Booking details ──────────────────────────────────────────────────────
+
+def load_booking_details(bookings):
+    """Build ticket detail dicts for many bookings at once.
+
+    Referenced items (live or archived) are fetched with one query per
+    booking type instead of one query per booking. Returns
+    ``{booking.id: detail}``.
+    """
+    items = load_items(bookings)
+    return {
+        b.id: _build_detail(b, items.get((b.booking_type, b.ref_id)))
+        for b in bookings
+    }
+
+
+def _build_detail(booking, item):
+    """Build a detail dict for the ticket template from a booking and its item."""
+    detail = {
+        'type': booking.booking_type.capitalize(),
+        'pnr': booking.pnr,
+        'passengers': json.loads(booking.passenger_names) if booking.passenger_names else [],
+        'num_guests': booking.num_guests,
+        'total_price': booking.total_price,
+        'seats': json.loads(booking.seat_numbers) if booking.seat_numbers else [],
+        'travel_class': booking.travel_class or '',
+        'status': booking.status,
+        'booked_at': booking.created_at,
+    }
+    if item is None:
+        return detail
+
+    if booking.booking_type == 'flight':
+        detail.update({
+            'label': f'{item.airline} {item.flight_number}',
+            'origin': item.origin,
+            'destination': item.destination,
+            'departure': item.departure,
+            'arrival': item.arrival,
+            'duration': item.duration_str(),
+            'icon': 'fa-plane',
+        })
+    elif booking.booking_type == 'train':
+        detail.update({
+            'label': f'{item.name} #{item.train_number}',
+            'origin': item.origin,
+            'destination': item.destination,
+            'departure': item.departure,
+            'arrival': item.arrival,
+            'duration': item.duration_str(),
+            'icon': 'fa-train',
+        })
+    elif booking.booking_type == 'bus':
+        detail.update({
+            'label': f'{item.operator} ({item.bus_type})',
+            'origin': item.origin,
+            'destination': item.destination,
+            'departure': item.departure,
+            'arrival': item.arrival,
+            'duration': item.duration_str(),
+            'icon': 'fa-bus',
+        })
+    elif booking.booking_type == 'hotel':
+        detail.update({
+            'label': f'{item.hotel.name} — {item.room_type}',
+            'origin': item.hotel.city,
+            'destination': '',
+            'departure': booking.check_in,
+            'arrival': booking.check_out,
+            'duration': '',
+            'icon': 'fa-hotel',
+        })
+    return detail
+
+
+# ── Rendering ────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def _weasy_html():
+    """WeasyPrint's ``HTML`` class, or None when it (or pango/cairo) is missing."""
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError):
+        return None
+    return HTML
+
+
+def pdf_available():
+    return _weasy_html() is not None
+
+
+def ticket_format():
+    """``(extension, mimetype)`` of exported tickets — PDF, or HTML without WeasyPrint."""
+    return ('pdf', 'application/pdf') if pdf_available() else ('html', 'text/html')
+
+
+def ticket_filename(booking):
+    """Download name for a rendered ticket, e.g. ``ticket_AB12CD34.pdf``."""
+    return f'ticket_{booking.pnr}.{ticket_format()[0]}'
+
+
+def render_ticket_html(booking, detail, user, template=None):
+    """Render the print-ready ticket page with the QR code inlined.
+
+    Pass a pre-fetched ``template`` when rendering many tickets so the
+    compiled template is looked up once. Requires a request context.
+    """
+    if template is None:
+        template = current_app.jinja_env.get_template('ticket/ticket.html')
+    verify_url = url_for('ticket.verify', pnr=booking.pnr, _external=True)
+    qr_src = 'data:image/png;base64,' + base64.b64encode(qr_png(verify_url)).decode()
+    return template.render(booking=booking, detail=detail, qr_url=qr_src, user=user)
+
+
+def html_to_ticket(html):
+    """Convert rendered ticket HTML into the export format (PDF or HTML bytes)."""
+    HTML = _weasy_html()
+    if HTML is None:
+        return html.encode('utf-8')
+    return HTML(string=html).write_pdf()
+
+
+def render_tickets(htmls):
+    """Convert many rendered tickets, in order, using the render process pool."""
+    if not pdf_available():
+        return (html.encode('utf-8') for html in htmls)
+    return _get_executor().map(html_to_ticket, htmls, chunksize=4)
+
+
+def _get_executor():
+    """Return the shared render pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = current_app.config.get('TICKET_RENDER_WORKERS') or min(DEFAULT_RENDER_WORKERS, os.cpu_count())
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    return _executor
+
+
+# ── Zip streaming ────────────────────────────────────────────────────────
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files):
+    """Yield a zip archive chunk by chunk from ``(name, bytes)`` pairs.
+
+    Each file is flushed to the client as soon as it is added, so the
+    archive never has to be held in memory as a whole.
+    """
+    buf = _ChunkBuffer()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+            chunk = buf.drain()
+            if chunk:
+                yield chunk
+    yield buf.drain()
@@ -0,0 +1,12 @@
+"""ASGI entry point — the Flask app plus the async ``/api/v2`` API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 2
+
+See app/async_api.py. Defaults to the production config, like wsgi.py.
+"""
+import os
+from app import create_app
+from app.async_api import make_asgi_app
+
+flask_app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+app = make_asgi_app(flask_app)
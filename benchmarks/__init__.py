@@ -0,0 +1 @@
+"""Benchmark and load-test scripts — run from the repo root, e.g. ``python -m benchmarks.ticket_render``."""
@@ -0,0 +1,158 @@
+"""Compare the sync (gunicorn gthread) and async (uvicorn) APIs at high concurrency.
+
+    python -m benchmarks.async_load --concurrency 50,200,1000 --duration 5
+
+Starts one gunicorn worker (``wsgi:app``, ``--threads`` threads) and one
+uvicorn worker (``asgi:app``) on the same seeded SQLite file, then holds
+``concurrency`` keep-alive connections open against each for ``duration``
+seconds:
+
+* seat map reads — ``/api/seats/...`` vs ``/api/v2/seats/...`` (same JSON)
+* bookings — the form POST ``/flights/<id>/book`` vs ``/api/v2/flights/<id>/book``
+
+Needs gunicorn and the async extras (``sqlalchemy[asyncio]``, aiosqlite,
+uvicorn, asgiref).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from benchmarks.common import make_app, percentiles, report, seed_bookings, seed_inventory
+from benchmarks.serve_load import _free_port, _wait_ready
+
+
+async def _request(reader, writer, method, path, headers, body=b''):
+    head = [f'{method} {path} HTTP/1.1', 'Host: 127.0.0.1', 'Connection: keep-alive',
+            f'Content-Length: {len(body)}', *headers]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _connection(port, make_request, deadline, latencies, errors, ok_status):
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        errors.append(1)
+        return
+    try:
+        while time.monotonic() < deadline:
+            method, path, headers, body = make_request()
+            start = time.perf_counter()
+            status = await asyncio.wait_for(_request(reader, writer, method, path, headers, body), 60)
+            latencies.append(time.perf_counter() - start)
+            if status not in ok_status:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+        errors.append(1)
+    finally:
+        writer.close()
+
+
+async def _drive(port, make_request, concurrency, duration, ok_status=(200,)):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_connection(port, make_request, deadline, latencies, errors, ok_status)
+                           for _ in range(concurrency)))
+    return latencies, len(errors), time.perf_counter() - started
+
+
+def _start(cmd, env, port):
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _wait_ready(port, proc)
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', default='50,200,1000', help='comma-separated open connections')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per measurement')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads (sync side)')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+    os.close(fd)
+    os.remove(db_path)
+    app = make_app(db_path)
+    seed_inventory(app)
+    with app.app_context():
+        from app.models import Flight
+        user, _ = seed_bookings(0)
+        user_id = user.id
+        flight = Flight.query.filter(Flight.flight_number == 'AI-101').order_by(Flight.id.desc()).first()
+        flight_id, seat_flight = flight.id, Flight.query.first().id
+        # Both sides sign the same Flask session: logged in, with a CSRF token
+        cookie_value = app.session_interface.get_signing_serializer(app).dumps(
+            {'_user_id': str(user_id), '_fresh': True, '_csrf_token': 'bench'})
+    cookie = f'Cookie: {app.config["SESSION_COOKIE_NAME"]}={cookie_value}'
+
+    sync_port, async_port = _free_port(), _free_port()
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{db_path}', 'FLASK_CONFIG': 'production',
+           'SECRET_KEY': app.config['SECRET_KEY'], 'GUNICORN_ACCESS_LOG': '',
+           'DB_POOL_SIZE': str(args.threads)}
+    servers = [
+        _start([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+               {**env, 'BIND': f'127.0.0.1:{sync_port}', 'WEB_CONCURRENCY': '1',
+                'GUNICORN_THREADS': str(args.threads)}, sync_port),
+        _start([sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(async_port),
+                '--no-access-log', '--log-level', 'warning', '--backlog', '4096'], env, async_port),
+    ]
+
+    form = urlencode({'passenger_names[]': 'Bench Passenger', '_csrf_token': 'bench'}).encode()
+    payload = json.dumps({'passengers': ['Bench Passenger']}).encode()
+    cases = [
+        ('seat map', sync_port, lambda: ('GET', f'/api/seats/flight/{seat_flight}', [], b''), (200,)),
+        ('seat map', async_port, lambda: ('GET', f'/api/v2/seats/flight/{seat_flight}', [], b''), (200,)),
+        ('booking', sync_port, lambda: ('POST', f'/flights/{flight_id}/book',
+                                        [cookie, 'Content-Type: application/x-www-form-urlencoded'],
+                                        form), (302,)),
+        ('booking', async_port, lambda: ('POST', f'/api/v2/flights/{flight_id}/book',
+                                         [cookie, 'Content-Type: application/json'], payload), (201, 409)),
+    ]
+
+    rows = []
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            for name, port, make_request, ok_status in cases:
+                if name == 'booking':
+                    with app.app_context():  # plenty of inventory for every run
+                        from app.extensions import db
+                        db.session.execute(db.update(Flight).where(Flight.id == flight_id)
+                                           .values(seats_available=10_000_000))
+                        db.session.commit()
+                latencies, errors, elapsed = asyncio.run(
+                    _drive(port, make_request, concurrency, args.duration, ok_status))
+                pct = percentiles(latencies)
+                side = 'sync ' if port == sync_port else 'async'
+                rows.append((f'{name:<8} {side} c={concurrency:<5}',
+                             f'{len(latencies) / elapsed:7,.0f} req/s   p50 {pct["p50"]:7.1f} ms   '
+                             f'p99 {pct["p99"]:8.1f} ms   errors {errors}'))
+    finally:
+        for proc in servers:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report(f'Sync vs async — {args.duration:.0f}s per run, '
+           f'gunicorn 1×{args.threads} threads vs uvicorn 1 worker', rows)
+
+
+if __name__ == '__main__':
+    main()
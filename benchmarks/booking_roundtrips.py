@@ -0,0 +1,128 @@
+"""Benchmark transport bookings — database round trips and latency per booking.
+
+    python -m benchmarks.booking_roundtrips --bookings 300
+
+Books flights, trains and buses on a seeded SQLite file, with and without
+a picked seat, two ways:
+
+* ``legacy``  — the per-blueprint flow the booking views used before
+  ``app.booking_service`` (load the vehicle, decrement, read the seats,
+  insert, claim), kept here for comparison;
+* ``service`` — ``book_transport``.
+
+Without a picked seat the service assigns one itself (``app.seat_allocation``)
+while the vehicle has free seats; trains also look up saved passengers'
+ages. Round trips are counted with a cursor-execute listener on the
+engine, plus the commit. On PostgreSQL the service path is a single
+statement.
+"""
+import argparse
+import json
+import time
+
+import sqlalchemy as sa
+
+from benchmarks.common import make_app, percentiles, report, seed_bookings, seed_inventory
+
+
+def _legacy_book(Model, mode, vehicle_id, user_id, passenger_names, seat_ids, travel_class):
+    """The booking flow as it was written out in each blueprint."""
+    from app.extensions import db
+    from app.models import Booking, Seat, Train
+
+    vehicle = db.session.get(Model, vehicle_id)
+    num = len(passenger_names) or 1
+    price = vehicle.get_classes().get(travel_class, 0) if Model is Train else vehicle.price
+    result = db.session.execute(
+        db.update(Model)
+        .where(Model.id == vehicle_id, Model.seats_available >= num)
+        .values(seats_available=Model.seats_available - num)
+    )
+    assert result.rowcount == 1
+    labels = []
+    if seat_ids:
+        labels = [s.seat_label for s in Seat.query.filter(
+            Seat.id.in_(seat_ids), Seat.vehicle_type == mode,
+            Seat.vehicle_id == vehicle_id, Seat.is_booked == False,  # noqa: E712
+        ).all()]
+    booking = Booking(user_id=user_id, booking_type=mode, ref_id=vehicle_id,
+                      passenger_names=json.dumps(passenger_names), num_guests=num,
+                      travel_class=travel_class if Model is Train else None,
+                      total_price=price * num, status='Pending',
+                      seat_numbers=json.dumps(labels) if labels else None)
+    db.session.add(booking)
+    db.session.flush()
+    if seat_ids:
+        Seat.query.filter(Seat.id.in_(seat_ids), Seat.vehicle_type == mode, Seat.vehicle_id == vehicle_id)\
+            .update({Seat.is_booked: True, Seat.booking_id: booking.id}, synchronize_session=False)
+    db.session.commit()
+    return booking.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=300, help='bookings timed per measurement')
+    args = parser.parse_args()
+
+    app = make_app()
+    seed_inventory(app)
+
+    from app.booking_service import book_transport
+    from app.extensions import db
+    from app.fares import TRANSPORT_MODELS
+    from app.models import Seat
+
+    counts = {'statements': 0, 'commits': 0}
+    rows = []
+    with app.app_context():
+        user, _ = seed_bookings(0)
+        user_id = user.id
+        engine = db.engine
+        sa.event.listen(engine, 'before_cursor_execute',
+                        lambda *a: counts.__setitem__('statements', counts['statements'] + 1))
+        sa.event.listen(engine, 'commit', lambda *a: counts.__setitem__('commits', counts['commits'] + 1))
+
+        for mode, Model in TRANSPORT_MODELS.items():
+            db.session.execute(sa.update(Model).values(seats_available=1_000_000))
+            db.session.commit()
+            # Free seats to pick from, two bookings' worth per measurement
+            free = db.session.execute(
+                sa.select(Seat.id, Seat.vehicle_id)
+                .where(Seat.vehicle_type == mode, Seat.is_booked == False)  # noqa: E712
+                .limit(args.bookings * 2)
+            ).all()
+            vehicle_id = free[0].vehicle_id
+            # Trains don't all sell the same classes — book each one's first
+            first_class = {}
+            if mode == 'train':
+                first_class = {t.id: next(iter(t.get_classes())) for t in Model.query.all()}
+
+            for with_seat in (False, True):
+                for name in ('legacy', 'service'):
+                    picks = iter(free[:args.bookings] if name == 'legacy' else free[args.bookings:])
+                    samples = []
+                    counts.update(statements=0, commits=0)
+                    for _ in range(args.bookings):
+                        seat_ids, ref = [], vehicle_id
+                        if with_seat:
+                            seat_id, ref = next(picks)
+                            seat_ids = [seat_id]
+                        travel_class = first_class.get(ref)
+                        db.session.expire_all()
+                        start = time.perf_counter()
+                        if name == 'legacy':
+                            _legacy_book(Model, mode, ref, user_id, ['Bench Passenger'], seat_ids, travel_class)
+                        else:
+                            book_transport(mode, ref, user_id, ['Bench Passenger'], seat_ids, travel_class)
+                        samples.append(time.perf_counter() - start)
+                    pct = percentiles(samples)
+                    rows.append((f'{mode:<6} {"seat" if with_seat else "no seat":<7} {name}',
+                                 f'{counts["statements"] / args.bookings:4.1f} statements + '
+                                 f'{counts["commits"] / args.bookings:.0f} commit   '
+                                 f'p50 {pct["p50"]:6.3f} ms   p99 {pct["p99"]:6.3f} ms'))
+
+    report(f'Transport booking — {args.bookings} bookings per row (SQLite)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark chatbot intent matching as the knowledge base grows.
+
+    python -m benchmarks.chat_intents
+
+Compares the compiled keyword trie against the old per-keyword substring
+scan. The trie's cost per message should stay flat from the shipped table
+up to thousands of keywords; the substring scan grows linearly.
+"""
+import argparse
+import random
+import string
+import time
+
+from benchmarks.common import make_app, report
+
+MESSAGES = [
+    'hi there, can you help me plan a trip to goa next week?',
+    'what is the cheapest way to get from delhi to mumbai',
+    'best time to visit jaipur and what food should I try',
+    'I need to cancel my booking and get a refund',
+    'thanks, that was really helpful!',
+    'is it safe to travel to kolkata during the monsoon',
+]
+
+
+def _naive_match(message, table):
+    """The original matcher — substring test for every keyword in every category."""
+    msg = message.lower().strip()
+    scores = {}
+    for category, config in table.items():
+        count = sum(1 for kw in config['keywords'] if kw in msg)
+        if count:
+            scores[category] = (config['weight'] * count, count)
+    if not scores:
+        return 'fallback'
+    return max(scores.items(), key=lambda x: (x[1][0], x[1][1]))[0]
+
+
+def _grow(table, total_keywords, rng):
+    """Pad a KEYWORDS table with synthetic categories up to ``total_keywords``."""
+    grown = dict(table)
+    have = sum(len(c['keywords']) for c in table.values())
+    i = 0
+    while have < total_keywords:
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+                 for _ in range(20)]
+        grown[f'synthetic_{i}'] = {'weight': rng.choice([1, 5, 10]), 'keywords': words}
+        have += len(words)
+        i += 1
+    return grown
+
+
+def _time(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for msg in MESSAGES:
+            fn(msg)
+    return (time.perf_counter() - start) / (rounds * len(MESSAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    make_app()
+    from app.blueprints.chatbot import KEYWORDS, _compile_keywords, _match_intent
+
+    rng = random.Random(42)
+    rows = []
+    for size in (0, 500, 1000, 2500, 5000, 10000):
+        table = _grow(KEYWORDS, size, rng)
+        trie = _compile_keywords(table)
+        n_kw = sum(len(c['keywords']) for c in table.values())
+        compiled = _time(lambda m: _match_intent(m, table, trie), args.rounds)
+        naive = _time(lambda m: _naive_match(m, table), args.rounds)
+        rows.append((f'{n_kw:>6} keywords',
+                     f'compiled {compiled * 1e6:8.1f} µs/msg   substring {naive * 1e6:8.1f} µs/msg'))
+    report('Chatbot intent matching', rows)
+
+
+if __name__ == '__main__':
+    main()
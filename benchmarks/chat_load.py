@@ -0,0 +1,92 @@
+"""Load test for the chatbot's live inventory answers.
+
+    python -m benchmarks.chat_load --workers 4 --requests 4000 --budget-ms 20
+
+Drives /api/chat from several worker processes, each with its own app
+instance against one shared SQLite file, with a mix of popular questions
+(served from the per-query memo after the first hit) and long-tail ones
+that go to the database. Exits non-zero if p99 latency exceeds the budget.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import make_app, seed_inventory, percentiles, report
+
+POPULAR = [
+    'cheapest flight to Goa this weekend',
+    'flights from delhi to mumbai tomorrow',
+    'train from delhi to bangalore next week',
+    'hotel in jaipur',
+    'bus from bangalore to chennai',
+]
+CITIES = ['Delhi', 'Mumbai', 'Bangalore', 'Kolkata', 'Hyderabad', 'Chennai', 'Goa', 'Jaipur', 'Agra', 'Pune']
+MODES = ['flight', 'train', 'bus']
+WHEN = ['today', 'tomorrow', 'this weekend', 'next week', 'on friday', 'on monday', '']
+
+
+def _long_tail(rng):
+    a, b = rng.sample(CITIES, 2)
+    return f'{rng.choice(MODES)} from {a} to {b} {rng.choice(WHEN)}'.strip()
+
+
+def _worker(db_path, seed, count, popular_share):
+    """One load-generator process with its own app (and memo), like a gunicorn worker."""
+    app = make_app(db_path)
+    rng = random.Random(seed)
+    client = app.test_client()
+    latencies, live = [], 0
+    for _ in range(count):
+        msg = rng.choice(POPULAR) if rng.random() < popular_share else _long_tail(rng)
+        start = time.perf_counter()
+        resp = client.post('/api/chat', json={'message': msg})
+        latencies.append(time.perf_counter() - start)
+        live += resp.get_json()['intent'].startswith('live_')
+
+    from app.blueprints.chatbot import _LIVE_MEMO
+    return latencies, live, _LIVE_MEMO.hits, _LIVE_MEMO.misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--popular-share', type=float, default=0.8)
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+    os.close(fd)
+    os.remove(db_path)
+    seed_inventory(make_app(db_path))
+
+    per_worker = args.requests // args.workers
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(_worker, db_path, i, per_worker, args.popular_share)
+                   for i in range(args.workers)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = [x for r in results for x in r[0]]
+    live = sum(r[1] for r in results)
+    hits, misses = sum(r[2] for r in results), sum(r[3] for r in results)
+    pct = percentiles(latencies)
+    report(f'Chatbot load — {len(latencies)} requests, {args.workers} worker processes', [
+        ('throughput', f'{len(latencies) / elapsed:,.0f} req/s (incl. worker start-up)'),
+        ('live answers', f'{live} ({live / len(latencies):.0%})'),
+        ('memo hit ratio', f'{hits / max(1, hits + misses):.0%}'),
+        ('latency ms', f"p50 {pct['p50']}  p95 {pct['p95']}  p99 {pct['p99']}"),
+        ('budget', f'p99 < {args.budget_ms} ms'),
+    ])
+    if pct['p99'] > args.budget_ms:
+        print(f'FAIL: p99 {pct["p99"]} ms exceeds {args.budget_ms} ms budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
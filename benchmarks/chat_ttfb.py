@@ -0,0 +1,83 @@
+"""Measure time-to-first-byte of the streaming chat endpoint.
+
+    python -m benchmarks.chat_ttfb --delays 0,100,500
+
+Serves the app over real HTTP and injects an artificial delay into the
+live-inventory lookup. The first SSE event (the intent) should arrive in
+the same time whatever the delay; only the total time should grow. The
+buffered /api/chat endpoint is measured alongside for comparison.
+"""
+import argparse
+import http.client
+import json
+import logging
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from benchmarks.common import make_app, seed_inventory, percentiles, report
+
+MESSAGE = 'cheapest flight from delhi to mumbai tomorrow'
+
+
+def _measure(port, path, rounds):
+    """Return (ttfb samples, total samples) in seconds."""
+    ttfb, total = [], []
+    body = json.dumps({'message': MESSAGE})
+    for _ in range(rounds):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        start = time.perf_counter()
+        conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+        resp = conn.getresponse()
+        resp.read(1)
+        ttfb.append(time.perf_counter() - start)
+        resp.read()
+        total.append(time.perf_counter() - start)
+        conn.close()
+    return ttfb, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delays', default='0,100,500', help='comma-separated lookup delays in ms')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    seed_inventory(app)
+
+    from app.blueprints import chatbot
+    real_lookup = chatbot._live_results
+    delay = [0.0]
+
+    def slow_lookup(query):
+        time.sleep(delay[0])
+        return real_lookup(query)
+
+    chatbot._live_results = slow_lookup
+    chatbot._LIVE_MEMO.ttl = 0  # every request pays the lookup
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    rows = []
+    try:
+        for ms in (int(d) for d in args.delays.split(',')):
+            delay[0] = ms / 1000
+            s_ttfb, s_total = _measure(port, '/api/chat/stream', args.rounds)
+            b_ttfb, _ = _measure(port, '/api/chat', args.rounds)
+            rows.append((f'lookup +{ms} ms',
+                         f"stream ttfb p50 {percentiles(s_ttfb)['p50']:7.2f} ms  "
+                         f"total p50 {percentiles(s_total)['p50']:7.2f} ms  |  "
+                         f"buffered ttfb p50 {percentiles(b_ttfb)['p50']:7.2f} ms"))
+    finally:
+        server.shutdown()
+        chatbot._live_results = real_lookup
+    report('Chat time-to-first-byte', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark worker cold start — a fresh interpreter importing and creating the app.
+
+    python -m benchmarks.cold_start --runs 10 [--create-schema]
+
+Each run is a new process, as a freshly forked gunicorn worker without
+``--preload`` would be. It reports the time spent importing ``app``, in
+``create_app()``, and on the first request to ``/`` and to a ticket QR code
+(which pulls in the imaging stack on first use). Workers start the way
+production runs them, without ``db.create_all()``; pass ``--create-schema``
+to measure the development default.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import report
+
+PROBE = r'''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get('/')
+t3 = time.perf_counter()
+from app.ticket_render import qr_png
+qr_png('cold-start')
+t4 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first request': t3 - t2,
+                  'first qr code': t4 - t3, 'total': t4 - t0}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--create-schema', action='store_true', help='run db.create_all() at startup')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+    os.close(fd)
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{db_path}',
+           'AUTO_CREATE_SCHEMA': '1' if args.create_schema else '0'}
+    # Create the schema once so every run measures the same steady state
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'init-db'],
+                   env=env, check=True, capture_output=True)
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    os.remove(db_path)
+
+    rows = []
+    for stage in samples[0]:
+        values = sorted(s[stage] for s in samples)
+        rows.append((stage, f'median {values[len(values) // 2] * 1000:7.1f} ms   '
+                            f'min {values[0] * 1000:7.1f} ms'))
+    report(f'Worker cold start — {args.runs} fresh processes', rows)
+
+
+if __name__ == '__main__':
+    main()
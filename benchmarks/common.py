@@ -0,0 +1,108 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway SQLite database so it never
+touches ``app.db``. ``make_app`` must be called before anything imports
+``config`` — the database URL is read from the environment at import.
+"""
+import os
+import statistics
+import tempfile
+
+
+def make_app(db_path=None, config_name='development'):
+    """Create an app bound to a fresh (or given) SQLite file."""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+        os.close(fd)
+        os.remove(db_path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import create_app
+    app = create_app(config_name)
+    app.config['TESTING'] = True
+    return app
+
+
+def percentiles(samples):
+    """Return p50/p95/p99 (milliseconds) for a list of durations in seconds."""
+    if not samples:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    ordered = sorted(samples)
+
+    def pick(pct):
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[idx] * 1000, 3)
+
+    return {'p50': pick(50), 'p95': pick(95), 'p99': pick(99),
+            'mean': round(statistics.fmean(ordered) * 1000, 3)}
+
+
+def report(title, rows):
+    """Print a small aligned table: ``rows`` is a list of (label, value) pairs."""
+    print(f'\n── {title} ' + '─' * max(0, 60 - len(title)))
+    width = max((len(label) for label, _ in rows), default=0)
+    for label, value in rows:
+        print(f'  {label:<{width}}  {value}')
+
+
+def seed_bookings(num_bookings, username='bench'):
+    """Insert one user, a handful of vehicles/rooms and ``num_bookings`` confirmed bookings.
+
+    Must run inside an app context. Returns ``(user, bookings)``.
+    """
+    import json
+    import random
+    from datetime import datetime, timedelta
+    from app.extensions import db
+    from app.models import User, Flight, Train, Bus, Hotel, Room, Booking
+
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('benchmark')
+    db.session.add(user)
+
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    hotel = Hotel(name='Bench Hotel', city='Goa', address='Beach Road', star_rating=4)
+    items = [
+        Flight(flight_number='AI-101', airline='Air India', origin='DEL', destination='BOM',
+               departure=start, arrival=start + timedelta(hours=2), price=4500, seats_available=10_000),
+        Train(train_number='12952', name='Mumbai Rajdhani', origin='New Delhi', destination='Mumbai Central',
+              departure=start, arrival=start + timedelta(hours=16), classes=json.dumps({'3A': 1250}),
+              seats_available=10_000),
+        Bus(operator='VRL Travels', origin='Bangalore', destination='Goa', departure=start,
+            arrival=start + timedelta(hours=10), bus_type='Sleeper', price=1200, seats_available=10_000),
+        Room(hotel=hotel, room_type='Deluxe', price_per_night=4500, rooms_available=10_000),
+    ]
+    db.session.add(hotel)
+    db.session.add_all(items)
+    db.session.flush()
+
+    kinds = ['flight', 'train', 'bus', 'hotel']
+    bookings = []
+    for i in range(num_bookings):
+        kind = kinds[i % len(kinds)]
+        bookings.append(Booking(
+            user_id=user.id, booking_type=kind, ref_id=items[i % len(items)].id,
+            passenger_names=json.dumps([f'Passenger {i}']), num_guests=1,
+            travel_class='3A' if kind == 'train' else None,
+            check_in=start.date() if kind == 'hotel' else None,
+            check_out=(start + timedelta(days=2)).date() if kind == 'hotel' else None,
+            status='Confirmed', total_price=random.randint(500, 9000),
+            pnr=f'B{i:07d}', seat_numbers=json.dumps([f'{i % 30 + 1}A']),
+        ))
+    db.session.add_all(bookings)
+    db.session.commit()
+    return user, bookings
+
+
+def seed_inventory(app, **options):
+    """Seed the standard 30-day timetable into the app's database.
+
+    ``options`` go to ``seed_data.seed`` (``days``, ``route_factor``,
+    ``seat_density``, ``users``, ...) to scale the dataset.
+    """
+    import contextlib
+    import io
+    import seed_data
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed_data.seed(app, **options)
@@ -0,0 +1,270 @@
+"""Stress one popular vehicle with concurrent bookings and cancellations, then check its inventory.
+
+    python -m benchmarks.contention --ops 4000 --processes 4 --threads 4
+    python -m benchmarks.contention --database-url postgresql://localhost/bench
+    python -m benchmarks.contention --legacy-cancel     # the old read-modify-write cancel
+
+Seeds a single flight (``--seats`` seats on its seat map) and ``--users``
+users. ``--processes`` × ``--threads`` workers then split ``--ops``
+operations among themselves, all against that one flight:
+
+* book 1-4 passengers through ``book_transport``, half with seats picked
+  from a stale copy of the seat map (so seat conflicts happen), half seated
+  by the allocator. One pick in ten sends more seats than passengers,
+  which must be rejected;
+* cancel one of the worker's own bookings through ``cancel_booking``.
+
+A lock timeout, serialization failure or deadlock is retried with backoff
+and counted. Afterwards the harness checks the invariants:
+
+* ``seats_available`` + passengers on live bookings == capacity, and
+  ``seats_available`` >= 0;
+* every booked seat belongs to a live booking;
+* no seat is held by two live bookings, and no booking holds more seats
+  than passengers.
+
+It exits with status 1 if any invariant fails. Defaults to a throwaway
+SQLite file. Pass a PostgreSQL URL to run there; that database's tables are
+wiped.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import make_app, percentiles, report
+
+MAX_RETRIES = 8
+
+
+def _make_app(database_url):
+    if database_url.startswith('sqlite:///'):
+        return make_app(database_url[len('sqlite:///'):])
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    return create_app('development')
+
+
+def _legacy_cancel(booking_id):
+    """Cancellation as ``auth.cancel_booking`` used to do it, kept for comparison."""
+    from app.extensions import db
+    from app.models import Booking, Flight
+
+    booking = db.session.get(Booking, booking_id)
+    if booking.status == 'Cancelled':
+        return
+    booking.status = 'Cancelled'
+    flight = db.session.get(Flight, booking.ref_id)
+    flight.seats_available += booking.num_guests
+    db.session.commit()
+
+
+def _retryable(exc):
+    message = str(exc.orig).lower()
+    return any(text in message for text in ('locked', 'busy', 'deadlock', 'could not serialize'))
+
+
+def _worker(app, flight_id, user_ids, seat_ids, ops, seed, legacy_cancel):
+    """One thread: ``ops`` random books and cancels. Returns its counters and latencies."""
+    from app.booking_service import BookingError, SeatTakenError, book_transport, cancel_booking
+    from app.extensions import db
+
+    rng = random.Random(seed)
+    mine = []
+    counts = dict.fromkeys(('booked', 'cancelled', 'sold_out', 'seat_taken', 'over_picked',
+                            'retries', 'failed'), 0)
+    latencies = []
+    for _ in range(ops):
+        cancel = mine and rng.random() < 0.4
+        if cancel:
+            booking_id = mine.pop(rng.randrange(len(mine)))
+        else:
+            party = rng.randint(1, 4)
+            picked = rng.sample(seat_ids, party) if rng.random() < 0.5 else []
+            if picked and rng.random() < 0.1:
+                picked = rng.sample(seat_ids, party + rng.randint(1, 3))  # hoarding attempt
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                with app.app_context():
+                    if cancel:
+                        (_legacy_cancel if legacy_cancel else cancel_booking)(booking_id)
+                        counts['cancelled'] += 1
+                    else:
+                        mine.append(book_transport('flight', flight_id, rng.choice(user_ids),
+                                                   [f'P{i}' for i in range(party)], picked))
+                        counts['booked'] += 1
+                break
+            except SeatTakenError:
+                counts['seat_taken'] += 1
+                break
+            except BookingError as exc:
+                counts['over_picked' if exc.status == 400 else 'sold_out'] += 1
+                break
+            except OperationalError as exc:
+                with app.app_context():
+                    db.session.rollback()
+                if not _retryable(exc) or attempt == MAX_RETRIES:
+                    counts['failed'] += 1
+                    break
+                counts['retries'] += 1
+                time.sleep(rng.uniform(0, 0.002 * 2 ** attempt))
+        latencies.append(time.perf_counter() - started)
+    return counts, latencies
+
+
+def _process(database_url, flight_id, user_ids, seat_ids, ops, threads, seed, legacy_cancel):
+    app = _make_app(database_url)
+    results = [None] * threads
+    per_thread = [ops // threads + (i < ops % threads) for i in range(threads)]
+
+    def run(i):
+        results[i] = _worker(app, flight_id, user_ids, seat_ids, per_thread[i],
+                             seed * 1000 + i, legacy_cancel)
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+def _seed(app, seats, users):
+    """One flight with ``seats`` seats, and ``users`` users. Returns (flight id, user ids, seat ids)."""
+    from datetime import datetime, timedelta
+    from seed_data import generate_flight_seats
+    from app.extensions import db
+    from app.models import Booking, Flight, Seat, User
+
+    with app.app_context():
+        db.create_all()
+        for Model in (Seat, Booking, Flight, User):
+            db.session.execute(sa.delete(Model))
+        departure = datetime.now() + timedelta(days=7)
+        flight = Flight(flight_number='AI-999', airline='Air India', origin='DEL', destination='BOM',
+                        departure=departure, arrival=departure + timedelta(hours=2),
+                        price=5000, seats_available=seats)
+        db.session.add(flight)
+        db.session.flush()
+        db.session.add_all(Seat(vehicle_type='flight', vehicle_id=flight.id, seat_label=label, row=row, col=col)
+                           for label, row, col in generate_flight_seats(seats))
+        user_list = [User(username=f'contender{i}', email=f'contender{i}@example.com', password_hash='-')
+                     for i in range(users)]
+        db.session.add_all(user_list)
+        db.session.commit()
+        seat_ids = db.session.execute(sa.select(Seat.id).where(Seat.vehicle_id == flight.id)).scalars().all()
+        return flight.id, [u.id for u in user_list], seat_ids
+
+
+def check_invariants(app, flight_id, capacity):
+    """Broken invariants of the flight's inventory, as printable lines."""
+    from app.extensions import db
+    from app.models import Booking, Flight, Seat
+
+    problems = []
+    with app.app_context():
+        available = db.session.execute(
+            sa.select(Flight.seats_available).where(Flight.id == flight_id)).scalar_one()
+        live = db.session.execute(
+            sa.select(Booking.id, Booking.num_guests, Booking.seat_numbers)
+            .where(Booking.booking_type == 'flight', Booking.ref_id == flight_id,
+                   Booking.status != 'Cancelled')
+        ).all()
+        booked = db.session.execute(
+            sa.select(Seat.seat_label, Seat.booking_id)
+            .where(Seat.vehicle_type == 'flight', Seat.vehicle_id == flight_id, Seat.is_booked == True)  # noqa: E712
+        ).all()
+
+    passengers = sum(b.num_guests for b in live)
+    if available + passengers != capacity:
+        problems.append(f'seats_available {available} + live passengers {passengers} != capacity {capacity}')
+    if available < 0:
+        problems.append(f'seats_available is negative ({available})')
+
+    live_ids = {b.id for b in live}
+    orphaned = [s.seat_label for s in booked if s.booking_id not in live_ids]
+    if orphaned:
+        problems.append(f'{len(orphaned)} booked seats belong to no live booking (e.g. {orphaned[:3]})')
+
+    holders = {}
+    for b in live:
+        labels = json.loads(b.seat_numbers) if b.seat_numbers else []
+        if len(labels) > b.num_guests:
+            problems.append(f'booking {b.id} holds {len(labels)} seats for {b.num_guests} passengers')
+        for label in labels:
+            holders.setdefault(label, []).append(b.id)
+    doubled = {label: ids for label, ids in holders.items() if len(ids) > 1}
+    if doubled:
+        problems.append(f'{len(doubled)} seats held by two live bookings (e.g. {next(iter(doubled.items()))})')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=4000, help='book/cancel operations in total')
+    parser.add_argument('--processes', type=int, default=4, help='worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per process')
+    parser.add_argument('--seats', type=int, default=180, help='seats on the flight')
+    parser.add_argument('--users', type=int, default=50, help='users booking')
+    parser.add_argument('--database-url', help='database to stress (default: a throwaway SQLite file)')
+    parser.add_argument('--legacy-cancel', action='store_true', help='cancel with the old read-modify-write')
+    parser.add_argument('--seed', type=int, default=7, help='random seed')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        import tempfile
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+        os.close(fd)
+        os.remove(path)
+        database_url = f'sqlite:///{path}'
+    app = _make_app(database_url)
+    flight_id, user_ids, seat_ids = _seed(app, args.seats, args.users)
+
+    per_process = [args.ops // args.processes + (i < args.ops % args.processes) for i in range(args.processes)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = [pool.submit(_process, database_url, flight_id, user_ids, seat_ids, per_process[i],
+                               args.threads, args.seed + i, args.legacy_cancel)
+                   for i in range(args.processes)]
+        results = [r for f in futures for r in f.result()]
+    elapsed = time.perf_counter() - started
+
+    counts = {key: sum(c[key] for c, _ in results) for key in results[0][0]}
+    latencies = [x for _, samples in results for x in samples]
+    pct = percentiles(latencies)
+    problems = check_invariants(app, flight_id, args.seats)
+
+    dialect = database_url.split(':', 1)[0]
+    report(f'Contention — {args.ops} ops, {args.processes}×{args.threads} workers, '
+           f'{args.seats} seats ({dialect}{", legacy cancel" if args.legacy_cancel else ""})', [
+        ('throughput', f'{len(latencies) / elapsed:,.0f} ops/s   p50 {pct["p50"]:.1f} ms   p99 {pct["p99"]:.1f} ms'),
+        ('booked / cancelled', f'{counts["booked"]} / {counts["cancelled"]}'),
+        ('sold out / seat taken', f'{counts["sold_out"]} / {counts["seat_taken"]}'),
+        ('extra seats rejected', f'{counts["over_picked"]}'),
+        ('retries', f'{counts["retries"]} ({counts["retries"] / max(len(latencies), 1):.1%} of ops), '
+                    f'{counts["failed"]} gave up'),
+        ('invariants', 'ok' if not problems else 'BROKEN'),
+        *(('  !', problem) for problem in problems),
+    ])
+
+    if database_url.startswith('sqlite:///') and args.database_url is None:
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(database_url[len('sqlite:///'):] + suffix)
+            except OSError:
+                pass
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+"""End-to-end load test — realistic booking traffic, per-endpoint percentiles, regression gate.
+
+    python -m benchmarks.e2e --journeys 300                      # in process (Flask test client)
+    python -m benchmarks.e2e --http --clients 8 --duration 20    # gunicorn + client processes
+    python -m benchmarks.e2e --save results.json
+    python -m benchmarks.e2e --baseline results.json --max-regression 25
+
+Seeds a scaled dataset on a throwaway SQLite file. ``--days``,
+``--route-factor``, ``--seat-density`` and ``--users`` are passed to
+``seed_data.seed``. It then replays user journeys:
+
+1. autocomplete for the origin and destination — one ``/api/cities?full=1``
+   request each, as the browser filters later keystrokes locally;
+2. a flight, train or bus search for that route and day;
+3. for ``--book-share`` of journeys, a logged-in user continues through the
+   seat map, the booking form, payment and the ticket page;
+4. for ``--verify-share`` of journeys, a ticket check of a seeded
+   confirmed booking (``/verify/<pnr>``), as gate staff scanning QR codes.
+
+By default journeys run one after another through the test client, which
+measures per-request cost without the network. With ``--http`` the suite
+starts gunicorn (``gunicorn.conf.py``, production settings) and drives it
+from ``--clients`` load-generator processes over keep-alive connections.
+
+The report gives requests/s and p50/p95/p99 per endpoint. ``--save`` writes
+the results as JSON. ``--baseline`` compares this run with a saved one and
+exits with status 1 when an endpoint regressed:
+
+- its p95 grew by more than ``--max-regression`` percent, and by more than
+  ``--min-delta-ms``;
+- or, between runs of the same kind, its throughput fell by more than
+  ``--max-regression`` percent.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+from benchmarks.common import make_app, percentiles, report, seed_inventory
+
+PLURALS = {'flight': 'flights', 'train': 'trains', 'bus': 'buses'}
+CSRF_TOKEN = 'e2e'
+
+
+# ── Drivers — one request API over the test client and over HTTP ─────────
+
+class _ClientDriver:
+    def __init__(self, app):
+        self.client = app.test_client(use_cookies=False)
+        self.cookie_name = app.config['SESSION_COOKIE_NAME']
+
+    def request(self, method, path, form=None, session=None):
+        headers = {'Cookie': f'{self.cookie_name}={session}'} if session else {}
+        response = self.client.open(path, method=method, data=form, headers=headers)
+        response.get_data()
+        return response.status_code, response.headers.get('Location', '')
+
+
+class _HTTPDriver:
+    def __init__(self, port, cookie_name):
+        self.port = port
+        self.cookie_name = cookie_name
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def request(self, method, path, form=None, session=None):
+        headers = {'Cookie': f'{self.cookie_name}={session}'} if session else {}
+        body = None
+        if form is not None:
+            body = urlencode(form, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            return 599, ''
+        return response.status, response.getheader('Location', '')
+
+
+# ── Traffic ──────────────────────────────────────────────────────────────
+
+def _call(driver, results, name, method, path, form=None, session=None):
+    start = time.perf_counter()
+    status, location = driver.request(method, path, form, session)
+    samples, errors = results.setdefault(name, ([], [0]))
+    samples.append(time.perf_counter() - start)
+    if status >= 400:
+        errors[0] += 1
+    return status, location
+
+
+def _journey(driver, rng, ctx, results):
+    """One visitor: type, search, and maybe book, pay and open the ticket."""
+    trip = rng.choice(ctx['trips'])
+    mode, plural = trip['mode'], PLURALS[trip['mode']]
+    for text in (trip['origin'], trip['destination']):
+        # The first letter fetches the full list; the browser filters the rest
+        _call(driver, results, 'autocomplete', 'GET', f'/api/cities?q={quote(text[0])}&full=1')
+    query = urlencode({'origin': trip['origin'], 'destination': trip['destination'], 'date': trip['date']})
+    _call(driver, results, f'search {mode}', 'GET', f'/{plural}/search?{query}')
+
+    if ctx['pnrs'] and rng.random() < ctx['verify_share']:
+        _call(driver, results, 'verify', 'GET', f'/verify/{rng.choice(ctx["pnrs"])}')
+    if rng.random() >= ctx['book_share']:
+        return
+
+    session = rng.choice(ctx['sessions'])
+    _call(driver, results, 'seat map', 'GET', f'/api/seats/{mode}/{trip["id"]}')
+    form = {'passenger_names[]': 'Load Tester', '_csrf_token': CSRF_TOKEN}
+    if trip['travel_class']:
+        form['travel_class'] = trip['travel_class']
+    status, location = _call(driver, results, 'book', 'POST', f'/{plural}/{trip["id"]}/book', form, session)
+    if status != 302 or '/payment/' not in location:
+        return  # sold out — the form redirects back to the detail page
+    booking_id = location.rstrip('/').rsplit('/', 1)[-1]
+    _call(driver, results, 'payment', 'POST', f'/payment/{booking_id}/confirm',
+          {'_csrf_token': CSRF_TOKEN}, session)
+    _call(driver, results, 'ticket', 'GET', f'/ticket/{booking_id}', session=session)
+
+
+def _client(port, cookie_name, ctx, seed, duration):
+    """One load-generator process, running journeys until ``duration`` is up."""
+    driver = _HTTPDriver(port, cookie_name)
+    rng = random.Random(seed)
+    results = {}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        _journey(driver, rng, ctx, results)
+    return results
+
+
+def _context(app, args):
+    """Trips, signed-in sessions and PNRs drawn from the seeded data."""
+    from datetime import datetime as dt
+    import sqlalchemy as sa
+    from app.city_lookup import IATA_TO_CITY
+    from app.extensions import db
+    from app.fares import TRANSPORT_MODELS
+    from app.models import Booking, Train, User
+
+    rng = random.Random(args.seed)
+    trips = []
+    with app.app_context():
+        for mode, Model in TRANSPORT_MODELS.items():
+            rows = db.session.execute(
+                sa.select(Model).where(Model.departure > dt.now(), Model.seats_available > 20)
+                .order_by(Model.id).limit(500)
+            ).scalars().all()
+            for row in rng.sample(rows, min(len(rows), 100)):
+                origin, destination = row.origin, row.destination
+                if mode == 'flight':
+                    origin, destination = IATA_TO_CITY.get(origin, origin), IATA_TO_CITY.get(destination, destination)
+                trips.append({
+                    'mode': mode, 'id': row.id, 'origin': origin, 'destination': destination,
+                    'date': row.departure.date().isoformat(),
+                    'travel_class': next(iter(row.get_classes())) if Model is Train else None,
+                })
+        user_ids = db.session.execute(
+            sa.select(User.id).where(User.username.like('loaduser%')).limit(500)).scalars().all()
+        pnrs = db.session.execute(
+            sa.select(Booking.pnr).where(Booking.status == 'Confirmed', Booking.pnr.isnot(None))
+            .limit(2000)).scalars().all()
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    sessions = [serializer.dumps({'_user_id': str(uid), '_fresh': True, '_csrf_token': CSRF_TOKEN})
+                for uid in user_ids]
+    if not trips or not sessions:
+        sys.exit('Seeded dataset has no upcoming trips or users — raise --days / --users')
+    return {'trips': trips, 'sessions': sessions, 'pnrs': pnrs,
+            'book_share': args.book_share, 'verify_share': args.verify_share}
+
+
+# ── Runs ─────────────────────────────────────────────────────────────────
+
+def _run_in_process(ctx, args):
+    from app import create_app
+
+    app = create_app('production')
+    driver = _ClientDriver(app)
+    rng = random.Random(args.seed)
+    results = {}
+    started = time.perf_counter()
+    for _ in range(args.journeys):
+        _journey(driver, rng, ctx, results)
+    return results, time.perf_counter() - started
+
+
+def _run_http(ctx, db_path, cookie_name, args):
+    from benchmarks.serve_load import _free_port, _wait_ready
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'FLASK_CONFIG': 'production',
+        'BIND': f'127.0.0.1:{port}',
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_ACCESS_LOG': '',
+    }
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(port, server)
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            started = time.perf_counter()
+            futures = [pool.submit(_client, port, cookie_name, ctx, args.seed + i, args.duration)
+                       for i in range(args.clients)]
+            parts = [f.result() for f in futures]
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results = {}
+    for part in parts:
+        for name, (samples, errors) in part.items():
+            merged = results.setdefault(name, ([], [0]))
+            merged[0].extend(samples)
+            merged[1][0] += errors[0]
+    return results, elapsed
+
+
+def summarize(results, elapsed):
+    endpoints = {}
+    for name, (samples, errors) in sorted(results.items()):
+        endpoints[name] = {'requests': len(samples), 'errors': errors[0],
+                           'rps': round(len(samples) / elapsed, 1), **percentiles(samples)}
+    total = sum(e['requests'] for e in endpoints.values())
+    return {'requests': total, 'errors': sum(e['errors'] for e in endpoints.values()),
+            'rps': round(total / elapsed, 1), 'seconds': round(elapsed, 2)}, endpoints
+
+
+def compare(current, baseline, max_regression, min_delta_ms):
+    """Regressions of ``current`` against ``baseline``, as printable lines."""
+    same_kind = current['meta']['kind'] == baseline['meta']['kind']
+    regressions = []
+    for name, now in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before:
+            continue
+        growth = (now['p95'] - before['p95']) / before['p95'] * 100 if before['p95'] else 0.0
+        if growth > max_regression and now['p95'] - before['p95'] > min_delta_ms:
+            regressions.append(f'{name}: p95 {before["p95"]:.1f} → {now["p95"]:.1f} ms (+{growth:.0f}%)')
+        drop = (before['rps'] - now['rps']) / before['rps'] * 100 if before['rps'] else 0.0
+        if same_kind and drop > max_regression:
+            regressions.append(f'{name}: {before["rps"]:,.0f} → {now["rps"]:,.0f} req/s (-{drop:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset = parser.add_argument_group('dataset (seed_data.seed)')
+    dataset.add_argument('--days', type=int, default=14, help='days of departures')
+    dataset.add_argument('--route-factor', type=int, default=1, help='copies of every route')
+    dataset.add_argument('--seat-density', type=float, default=1.0, help='multiplier on seats per vehicle')
+    dataset.add_argument('--users', type=int, default=200, help='users owning the pre-booked seats')
+    traffic = parser.add_argument_group('traffic')
+    traffic.add_argument('--journeys', type=int, default=300, help='journeys (in-process run)')
+    traffic.add_argument('--http', action='store_true', help='drive gunicorn over HTTP instead')
+    traffic.add_argument('--workers', type=int, default=2, help='gunicorn workers (--http)')
+    traffic.add_argument('--threads', type=int, default=4, help='threads per worker (--http)')
+    traffic.add_argument('--clients', type=int, default=8, help='load-generator processes (--http)')
+    traffic.add_argument('--duration', type=float, default=20.0, help='seconds of load (--http)')
+    traffic.add_argument('--book-share', type=float, default=0.3, help='journeys that go on to book')
+    traffic.add_argument('--verify-share', type=float, default=0.2, help='journeys with a ticket check')
+    traffic.add_argument('--seed', type=int, default=42, help='random seed')
+    results_group = parser.add_argument_group('results')
+    results_group.add_argument('--save', help='write results as JSON to this file')
+    results_group.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    results_group.add_argument('--max-regression', type=float, default=20.0, help='allowed slowdown, percent')
+    results_group.add_argument('--min-delta-ms', type=float, default=2.0,
+                               help='ignore p95 changes smaller than this')
+    args = parser.parse_args()
+
+    if args.http:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            sys.exit('gunicorn is not installed — pip install gunicorn')
+
+    # Production settings need a SECRET_KEY; sessions are signed with it below
+    os.environ.setdefault('SECRET_KEY', 'e2e-benchmark')
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+    os.close(fd)
+    os.remove(db_path)
+    app = make_app(db_path)
+    seeded_at = time.perf_counter()
+    seed_inventory(app, days=args.days, route_factor=args.route_factor,
+                   seat_density=args.seat_density, users=args.users)
+    seed_seconds = time.perf_counter() - seeded_at
+    ctx = _context(app, args)
+
+    if args.http:
+        results, elapsed = _run_http(ctx, db_path, app.config['SESSION_COOKIE_NAME'], args)
+        kind = f'http {args.workers}x{args.threads} c={args.clients}'
+    else:
+        results, elapsed = _run_in_process(ctx, args)
+        kind = 'in-process'
+    total, endpoints = summarize(results, elapsed)
+
+    rows = [(name, f'{e["requests"]:6,} req  {e["rps"]:8,.1f} req/s   p50 {e["p50"]:7.1f}   '
+                   f'p95 {e["p95"]:7.1f}   p99 {e["p99"]:7.1f} ms   errors {e["errors"]}')
+            for name, e in endpoints.items()]
+    rows.append(('total', f'{total["requests"]:6,} req  {total["rps"]:8,.1f} req/s   '
+                          f'{total["seconds"]:.1f}s   errors {total["errors"]}'))
+    report(f'End-to-end — {kind}, {args.days} days × route factor {args.route_factor} '
+           f'(seeded in {seed_seconds:.1f}s)', rows)
+
+    current = {
+        'meta': {
+            'kind': kind, 'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'cpus': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('save', 'baseline')},
+        },
+        'total': total,
+        'endpoints': endpoints,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f'\n  results saved to {args.save}')
+
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(db_path + suffix)
+        except OSError:
+            pass
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.max_regression, args.min_delta_ms)
+        report(f'Against {args.baseline} (max +{args.max_regression:.0f}%)',
+               [(line.split(':')[0], line.split(': ', 1)[1]) for line in regressions] or [('ok', 'no regressions')])
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark group bookings — latency versus party size.
+
+    python -m benchmarks.group_booking --sizes 40,200,500 --requests 20
+
+Each request books a party split into blocks of ``--block`` passengers
+over different flights, trains and buses, through
+``POST /api/bookings/group``, with seats assigned. Statements per request
+depend on the number of items, not on the number of passengers.
+"""
+import argparse
+import time
+
+import sqlalchemy as sa
+
+from benchmarks.common import make_app, percentiles, report, seed_bookings, seed_inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='40,200,500', help='comma-separated passengers per group')
+    parser.add_argument('--block', type=int, default=40, help='passengers per vehicle')
+    parser.add_argument('--requests', type=int, default=20, help='group bookings timed per size')
+    args = parser.parse_args()
+
+    app = make_app()
+    seed_inventory(app)
+
+    from app.extensions import db
+    from app.fares import TRANSPORT_MODELS
+    from app.models import Seat
+
+    with app.app_context():
+        user, _ = seed_bookings(0)
+        user_id = user.id
+        # Free every seat so each request finds room for its blocks
+        db.session.execute(sa.update(Seat).values(is_booked=False, booking_id=None))
+        vehicles = []
+        for mode, Model in TRANSPORT_MODELS.items():
+            for vehicle in Model.query.filter(Model.seats_available < 1000):
+                seats = Seat.query.filter_by(vehicle_type=mode, vehicle_id=vehicle.id).count()
+                vehicle.seats_available = seats
+                if seats >= args.block:
+                    travel_class = next(iter(vehicle.get_classes())) if mode == 'train' else None
+                    vehicles.append((mode, vehicle.id, travel_class, seats))
+        db.session.commit()
+
+        statements = [0]
+        sa.event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    # Hand out vehicles round-robin, each used until its seats run out
+    capacity = {(mode, vid): seats for mode, vid, _cls, seats in vehicles}
+    rows, cursor = [], 0
+    for size in (int(s) for s in args.sizes.split(',')):
+        samples = []
+        statements[0] = 0
+        for _ in range(args.requests):
+            items, left = [], size
+            while left:
+                mode, vid, travel_class, _seats = vehicles[cursor % len(vehicles)]
+                cursor += 1
+                block = min(left, args.block)
+                if capacity[(mode, vid)] < block:
+                    continue
+                capacity[(mode, vid)] -= block
+                left -= block
+                items.append({'type': mode, 'id': vid, 'travel_class': travel_class,
+                              'passengers': [f'Traveller {i}' for i in range(block)]})
+            start = time.perf_counter()
+            response = client.post('/api/bookings/group', json={'items': items})
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 201, response.get_json()
+        pct = percentiles(samples)
+        rows.append((f'{size:>4} passengers, {-(-size // args.block):>2} items',
+                     f'p50 {pct["p50"]:7.1f} ms   p95 {pct["p95"]:7.1f} ms   '
+                     f'{statements[0] / args.requests:5.1f} statements'))
+
+    report(f'Group booking — {args.requests} requests per size (SQLite)', rows)
+
+
+if __name__ == '__main__':
+    main()
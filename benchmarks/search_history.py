@@ -0,0 +1,81 @@
+"""Benchmark search latency as departed inventory accumulates.
+
+    python -m benchmarks.search_history --history 0,90,365 --requests 100
+
+For each history length the timetable is seeded from that many days in the
+past up to 30 days ahead, then flight/train/bus searches for a date next
+week are timed twice: with the departed rows still in the live tables, and
+after ``archive_departed`` has moved them to the archive tables. Archived
+latency should stay flat however much history there is.
+"""
+import argparse
+import contextlib
+import io
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import make_app, percentiles, report
+
+SEARCHES = [
+    '/flights/search?origin=Delhi&destination=Mumbai&date={date}',
+    '/trains/search?origin=New Delhi&destination=Mumbai&date={date}',
+    '/buses/search?origin=Delhi&destination=Jaipur&date={date}',
+]
+
+
+def _time_searches(client, requests, day):
+    samples = []
+    urls = [url.format(date=day) for url in SEARCHES]
+    for i in range(requests):
+        t0 = time.perf_counter()
+        response = client.get(urls[i % len(urls)])
+        samples.append(time.perf_counter() - t0)
+        assert response.status_code == 200, response.status_code
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history', default='0,90,365', help='comma-separated days of past departures')
+    parser.add_argument('--requests', type=int, default=100, help='searches timed per measurement')
+    parser.add_argument('--route-factor', type=int, default=1, help='copies of every route')
+    args = parser.parse_args()
+
+    app = make_app()
+    import seed_data
+    from app.archive import ARCHIVES, archive_departed
+    from app.extensions import db
+    from app.models import Flight, ArchivedSeat
+
+    client = app.test_client()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    day = (date.today() + timedelta(days=7)).isoformat()
+    rows = []
+    for history in (int(h) for h in args.history.split(',')):
+        with app.app_context():
+            for Archived in (ArchivedSeat, *ARCHIVES.values()):
+                Archived.query.delete()
+            db.session.commit()
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed_data.seed(app, days=history + 30, route_factor=args.route_factor,
+                               start=today - timedelta(days=history))
+            live_before = Flight.query.count()
+
+        client.get(SEARCHES[0].format(date=day))  # warm up
+        before = _time_searches(client, args.requests, day)
+        with app.app_context():
+            with db.engine.begin() as conn:
+                archive_departed(conn, today)
+            live_after = Flight.query.count()
+        after = _time_searches(client, args.requests, day)
+
+        rows.append((f'{history:>4} days, live ({live_before} flights)',
+                     f"p50 {before['p50']:7.2f} ms   p95 {before['p95']:7.2f} ms"))
+        rows.append((f'{history:>4} days, archived ({live_after} flights)',
+                     f"p50 {after['p50']:7.2f} ms   p95 {after['p95']:7.2f} ms"))
+
+    report(f'Search latency vs. history — {args.requests} searches each', rows)
+
+
+if __name__ == '__main__':
+    main()
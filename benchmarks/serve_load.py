@@ -0,0 +1,142 @@
+"""Load test the production serving profile — throughput versus gunicorn workers.
+
+    python -m benchmarks.serve_load --workers 1,2,4 --threads 4 --clients 8 --duration 10
+
+For each worker count, starts ``gunicorn -c gunicorn.conf.py wsgi:app`` on a
+local port against a seeded SQLite file (WAL), then drives it with
+``--clients`` keep-alive HTTP client processes for ``--duration`` seconds
+over a mix of pages and JSON endpoints. Needs gunicorn (``pip install
+gunicorn``). Client processes share the machine with the server, so on
+small machines the numbers flatten out once workers exceed the free cores.
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.common import make_app, seed_inventory, percentiles, report
+
+PATHS = [
+    '/',
+    '/flights/search?origin=Delhi&destination=Mumbai&date={day}',
+    '/trains/search?origin=New+Delhi&destination=Mumbai&date={day}',
+    '/buses/search?origin=Delhi&destination=Jaipur&date={day}',
+    '/hotels/search?city=Goa',
+    '/api/cities?q=del',
+    '/api/calendar?type=flight&origin=Delhi&destination=Mumbai&month={month}',
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port, proc, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with {proc.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def _client(port, seed, duration):
+    """One keep-alive client hammering the server until ``duration`` runs out."""
+    rng = random.Random(seed)
+    day = date.today() + timedelta(days=3)
+    paths = [p.format(day=day.isoformat(), month=day.strftime('%Y-%m')) for p in PATHS]
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', rng.choice(paths))
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated gunicorn worker counts')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per run')
+    args = parser.parse_args()
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        sys.exit('gunicorn is not installed — pip install gunicorn')
+
+    fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+    os.close(fd)
+    os.remove(db_path)
+    seed_inventory(make_app(db_path))
+
+    rows = []
+    for workers in (int(w) for w in args.workers.split(',')):
+        port = _free_port()
+        env = {
+            **os.environ,
+            'DATABASE_URL': f'sqlite:///{db_path}',
+            'FLASK_CONFIG': 'production',
+            'SECRET_KEY': 'serve-load-benchmark',
+            'BIND': f'127.0.0.1:{port}',
+            'WEB_CONCURRENCY': str(workers),
+            'GUNICORN_THREADS': str(args.threads),
+            'GUNICORN_ACCESS_LOG': '',
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_ready(port, server)
+            with ProcessPoolExecutor(max_workers=args.clients) as pool:
+                started = time.perf_counter()
+                futures = [pool.submit(_client, port, i, args.duration) for i in range(args.clients)]
+                results = [f.result() for f in futures]
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        latencies = [x for r in results for x in r[0]]
+        errors = sum(r[1] for r in results)
+        pct = percentiles(latencies)
+        rows.append((f'{workers} worker(s) × {args.threads} threads',
+                     f'{len(latencies) / elapsed:7,.0f} req/s   p50 {pct["p50"]:6.1f} ms   '
+                     f'p99 {pct["p99"]:7.1f} ms   errors {errors}'))
+
+    report(f'Serving throughput — {args.clients} clients, {args.duration:.0f}s per run '
+           f'({os.cpu_count()} CPUs)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark batch ticket export — reports tickets/second for each stage.
+
+    python -m benchmarks.ticket_render --tickets 200
+
+Stages: batched detail loading, HTML rendering from the compiled template
+(QR codes cached), conversion in the render pool (PDF when WeasyPrint is
+available, print-ready HTML otherwise), and zip streaming.
+"""
+import argparse
+import time
+
+from benchmarks.common import make_app, seed_bookings, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=0, help='render pool size (0 = CPU count)')
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config['TICKET_RENDER_WORKERS'] = args.workers or None
+
+    from app.models import Booking
+    from app.ticket_render import (ticket_format, load_booking_details, render_ticket_html,
+                                   render_tickets, stream_zip, ticket_filename)
+
+    with app.test_request_context('/'):
+        user, _ = seed_bookings(args.tickets)
+        bookings = Booking.query.filter_by(user_id=user.id).order_by(Booking.id).all()
+        template = app.jinja_env.get_template('ticket/ticket.html')
+
+        t0 = time.perf_counter()
+        details = load_booking_details(bookings)
+        t1 = time.perf_counter()
+        htmls = [render_ticket_html(b, details[b.id], user, template) for b in bookings]
+        t2 = time.perf_counter()
+        files = list(render_tickets(htmls))
+        t3 = time.perf_counter()
+        archive = b''.join(stream_zip(zip([ticket_filename(b) for b in bookings], files)))
+        t4 = time.perf_counter()
+
+    n = len(bookings)
+    rate = lambda seconds: f'{n / seconds:,.0f} tickets/s ({seconds * 1000:.1f} ms)' if seconds else 'n/a'
+    report(f'Ticket export — {n} tickets as {ticket_format()[0].upper()}', [
+        ('load details', rate(t1 - t0)),
+        ('render html', rate(t2 - t1)),
+        ('convert', rate(t3 - t2)),
+        ('zip stream', rate(t4 - t3)),
+        ('end to end', rate(t4 - t0)),
+        ('archive size', f'{len(archive) / 1024:,.0f} KiB'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,27 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 
+def engine_options(uri, pool_size, max_overflow, statement_timeout_ms):
+    """SQLAlchemy engine options for a server database (pooling, liveness, timeouts).
+
+    The pool is per worker process, so ``pool_size`` should cover the
+    worker's threads. SQLite keeps SQLAlchemy's defaults — its tuning is
+    done with pragmas on connect (see ``app.extensions.apply_sqlite_pragmas``).
+    """
+    if uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': 10,        # fail fast instead of queueing behind a stuck pool
+        'pool_recycle': 1800,      # stay under server/proxy idle-connection limits
+        'pool_pre_ping': True,     # drop connections killed by failovers or restarts
+    }
+    if uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout_ms}'}
+    return options
+
+
 class Config:
     """Base configuration shared across all environments."""
     SECRET_KEY = os.environ.get('SECRET_KEY', os.urandom(32).hex())
@@ -14,16 +35,91 @@ class Config:
         f'sqlite:///{os.path.join(BASE_DIR, "app.db")}'
     )
 
+    # Optional read replica for search and other read-only views (app/db_routing.py)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 10))       # seconds
+    SEAT_MAP_MAX_LAG = float(os.environ.get('SEAT_MAP_MAX_LAG', 2))      # seconds
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+    # Async API engine (app/async_api.py) — derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+
+    # Connection pool per worker process, and per-statement/lock timeouts
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # Request instrumentation (app/instrumentation.py) — thresholds in milliseconds
+    REQUEST_STATS = os.environ.get('REQUEST_STATS', '1') != '0'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', '1') != '0'
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+
+    # Prometheus /metrics (app/metrics.py); a token, if set, is required to scrape
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+    # Usernames allowed on the admin pages (comma-separated)
+    ADMIN_USERS = frozenset(u.strip() for u in os.environ.get('ADMIN_USERS', '').split(',') if u.strip())
+
+    # Sampling profiler (app/profiler.py) — admins opt in per request; a
+    # sample rate profiles that fraction of all requests
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 1))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 20))   # slowest captures kept per endpoint
+
+    # Cached template fragments (app/fragment_cache.py)
+    FRAGMENT_CACHE = os.environ.get('FRAGMENT_CACHE', '1') != '0'
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 600))       # seconds
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 4096))    # fragments per worker
+
+    # Bearer tokens for /api/* (app/api_auth.py) and the per-worker cache of session users
+    API_ACCESS_TOKEN_TTL = int(os.environ.get('API_ACCESS_TOKEN_TTL', 900))            # seconds
+    API_REFRESH_TOKEN_TTL = int(os.environ.get('API_REFRESH_TOKEN_TTL', 30 * 86400))   # seconds
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))                        # seconds
+
+    # Browser cache lifetime of /api/cities answers, in seconds (the gazetteer is static)
+    AUTOCOMPLETE_MAX_AGE = int(os.environ.get('AUTOCOMPLETE_MAX_AGE', 86400))
+
+    # Live seat deltas (app/seat_events.py): cross-worker bus — '', unix:///dir or redis://host:port/db
+    SEAT_EVENTS_BUS = os.environ.get('SEAT_EVENTS_BUS', '')
+    SEAT_EVENTS_KEEPALIVE = float(os.environ.get('SEAT_EVENTS_KEEPALIVE', 15))   # seconds
+
+    # Serve the hashed, precompressed files from `flask build-assets` (app/assets.py)
+    STATIC_HASHED = os.environ.get('STATIC_HASHED', '1') != '0'
+
+    # Run db.create_all() in create_app — handy locally, skipped in production
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', '1') != '0'
+
+    # Ticket export — PDF render processes per worker (default 2) and batch cap
+    TICKET_RENDER_WORKERS = int(os.environ.get('TICKET_RENDER_WORKERS', 0)) or None
+    TICKET_BATCH_LIMIT = int(os.environ.get('TICKET_BATCH_LIMIT', 500))
+
+    # Group bookings (POST /api/bookings/group) — caps per request
+    GROUP_BOOKING_MAX_ITEMS = int(os.environ.get('GROUP_BOOKING_MAX_ITEMS', 20))
+    GROUP_BOOKING_MAX_PASSENGERS = int(os.environ.get('GROUP_BOOKING_MAX_PASSENGERS', 500))
+
 
 class DevelopmentConfig(Config):
     """Development-specific settings."""
     DEBUG = True
+    # Edited CSS/JS shows up without a rebuild
+    STATIC_HASHED = os.environ.get('STATIC_HASHED', '0') != '0'
 
 
 class ProductionConfig(Config):
     """Production-specific settings — requires DATABASE_URL env var."""
     DEBUG = False
     SECRET_KEY = os.environ.get('SECRET_KEY')
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', '0') != '0'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI, Config.DB_POOL_SIZE,
+        Config.DB_MAX_OVERFLOW, Config.DB_STATEMENT_TIMEOUT_MS,
+    )
     
     def __init__(self):
         if not self.SECRET_KEY:
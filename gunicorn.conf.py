@@ -0,0 +1,73 @@
+"""Gunicorn settings for production — ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Worker/thread model: ``WEB_CONCURRENCY`` processes (default 2 × CPUs + 1),
+each running ``GUNICORN_THREADS`` threads (gthread). Processes give CPU
+parallelism for template rendering and JSON; threads keep a worker
+responsive while requests wait on the database or hold a long-lived
+stream (chat replies; live seat maps need the ASGI server, ``asgi.py``).
+Every process has its own SQLAlchemy pool, so keep ``DB_POOL_SIZE`` >=
+threads, and workers × (pool size + overflow) under the database's
+connection limit.
+
+The app is loaded once in the master and forked (``preload_app``), so
+workers share read-only memory and start instantly. ``post_fork`` throws
+away any connections inherited from the master.
+
+Workers share Prometheus metrics through files in
+``PROMETHEUS_MULTIPROC_DIR`` (a fresh temporary directory unless set), so
+``/metrics`` on any worker reports the whole server.
+"""
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks can't accumulate
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+# Set before the app (and prometheus_client) is imported. Metric files left
+# by a previous run would be counted again, so they are removed; nothing
+# else in a directory the operator chose is touched.
+_own_metrics_dir = not os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if _own_metrics_dir:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='booking-metrics-')
+else:
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+    for _path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+        os.remove(_path)
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections (primary and replica)."""
+    from app.extensions import db
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (pool and cache stats)."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
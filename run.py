@@ -1,7 +1,10 @@
-"""Entry point — run the Travel Booking Platform."""
+"""Entry point — run the Travel Booking Platform with Flask's development server.
+
+In production serve ``wsgi:app`` with gunicorn instead (see gunicorn.conf.py).
+"""
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5001)
@@ -1,11 +1,30 @@
-"""Seed the database with 30 days of flights, trains, buses, hotels, and rooms + seat maps."""
-import json, random
+"""Seed the database with 30 days of flights, trains, buses, hotels, and rooms + seat maps.
+
+    python seed_data.py                                   # the standard 30-day dataset
+    python seed_data.py --days 365 --route-factor 4 \
+        --seat-density 2 --users 50000 --occupancy 0.6    # load-test scale
+    python seed_data.py --roll                            # daily: extend the window, keep data
+
+Rows are generated in constant-memory batches with ids allocated up front
+(no flush per vehicle) and written with executemany on SQLite or COPY on
+PostgreSQL. With --users, pre-booked seats are grouped into synthetic
+bookings owned by generated users.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
 from datetime import datetime, timedelta
-from app import create_app
+from itertools import islice
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from app import archive, create_app
 from app.extensions import db
-from app.models import Flight, Train, Bus, Hotel, Room, Seat
-
-app = create_app()
+from app.models import Flight, Train, Bus, Hotel, Room, Seat, User, Booking
 
 # ── Route templates ────────────────────────────────────────────────
 FLIGHT_ROUTES = [
@@ -96,86 +115,261 @@ HOTELS_DATA = [
 ]
 
 
-# ── Seat Generation Helpers ──────────────────────────────────────────
+# ── Seat Layouts ─────────────────────────────────────────────────────
+# Each generator yields (seat_label, row, col) for a vehicle's seat map.
 
-def generate_flight_seats(flight_id, num_seats):
-    """Generate 3+3 layout seats (A-F across, 10 rows)."""
-    seats = []
+def generate_flight_seats(num_seats):
+    """3+3 layout seats (A-F across)."""
     cols = ['A', 'B', 'C', 'D', 'E', 'F']
     num_rows = max(num_seats // 6, 4)  # At least 4 rows
-    total_generated = 0
-
-    for row in range(1, num_rows + 1):
-        for col_idx, col_letter in enumerate(cols):
-            if total_generated >= num_seats:
-                break
-            seats.append(Seat(
-                vehicle_type='flight',
-                vehicle_id=flight_id,
-                seat_label=f'{row}{col_letter}',
-                row=row,
-                col=col_idx,
-                seat_class='economy',
-                is_booked=random.random() < 0.25,  # 25% pre-booked
-            ))
-            total_generated += 1
-    return seats
-
-
-def generate_bus_seats(bus_id, num_seats):
-    """Generate 2+2 layout seats (A-D across, ~10 rows)."""
-    seats = []
+    seats = ((f'{row}{letter}', row, col_idx)
+             for row in range(1, num_rows + 1) for col_idx, letter in enumerate(cols))
+    return islice(seats, num_seats)
+
+
+def generate_bus_seats(num_seats):
+    """2+2 layout seats (A-D across)."""
     cols = ['A', 'B', 'C', 'D']
     num_rows = max(num_seats // 4, 5)
-    total_generated = 0
-
-    for row in range(1, num_rows + 1):
-        for col_idx, col_letter in enumerate(cols):
-            if total_generated >= num_seats:
-                break
-            seats.append(Seat(
-                vehicle_type='bus',
-                vehicle_id=bus_id,
-                seat_label=f'{row}{col_letter}',
-                row=row,
-                col=col_idx,
-                seat_class='standard',
-                is_booked=random.random() < 0.3,  # 30% pre-booked
-            ))
-            total_generated += 1
-    return seats
-
-
-def generate_train_seats(train_id, num_seats):
-    """Generate 8-berth compartment layout.
+    seats = ((f'{row}{letter}', row, col_idx)
+             for row in range(1, num_rows + 1) for col_idx, letter in enumerate(cols))
+    return islice(seats, num_seats)
+
+
+def generate_train_seats(num_seats):
+    """8-berth compartment layout.
     Each compartment (row) has 8 berths:
       cols 0-2: Side A (LB, MB, UB)
       cols 3-5: Side B (LB, MB, UB)
       cols 6-7: Side berths (SL, SU)
     """
-    seats = []
     berth_labels = ['LB', 'MB', 'UB', 'LB', 'MB', 'UB', 'SL', 'SU']
     num_compartments = max(num_seats // 8, 5)
-    total_generated = 0
-
-    for comp in range(1, num_compartments + 1):
-        for col_idx, label in enumerate(berth_labels):
-            if total_generated >= num_seats:
-                break
-            seats.append(Seat(
-                vehicle_type='train',
-                vehicle_id=train_id,
-                seat_label=f'{label}-{comp}',
-                row=comp,
-                col=col_idx,
-                seat_class='sleeper',
-                is_booked=random.random() < 0.2,  # 20% pre-booked
-            ))
-            total_generated += 1
-    return seats
-
-
-def seed():
+    seats = ((f'{label}-{comp}', comp, col_idx)
+             for comp in range(1, num_compartments + 1) for col_idx, label in enumerate(berth_labels))
+    return islice(seats, num_seats)
+
+
+# ── Bulk Writer ──────────────────────────────────────────────────────
+
+# Tables in foreign-key order — buffers are always flushed in this order
+TABLE_ORDER = [User, Flight, Train, Bus, Hotel, Room, Booking, Seat]
+
+COLUMNS = {
+    User: ('id', 'username', 'email', 'password_hash', 'created_at'),
+    Flight: ('id', 'flight_number', 'airline', 'origin', 'destination', 'departure', 'arrival',
+             'price', 'seats_available'),
+    Train: ('id', 'train_number', 'name', 'origin', 'destination', 'departure', 'arrival',
+            'classes', 'seats_available'),
+    Bus: ('id', 'operator', 'origin', 'destination', 'departure', 'arrival', 'bus_type',
+          'price', 'seats_available'),
+    Hotel: ('id', 'name', 'city', 'address', 'star_rating', 'description'),
+    Room: ('id', 'hotel_id', 'room_type', 'price_per_night', 'rooms_available'),
+    Booking: ('id', 'user_id', 'booking_type', 'ref_id', 'passenger_names', 'num_guests',
+              'travel_class', 'status', 'total_price', 'pnr', 'seat_numbers', 'created_at'),
+    Seat: ('id', 'vehicle_type', 'vehicle_id', 'seat_label', 'row', 'col', 'seat_class',
+           'is_booked', 'booking_id'),
+}
+
+
+class BulkWriter:
+    """Buffer rows per table and write them in batches, bypassing the ORM.
+
+    Ids are handed out from ``next_id`` (seeded from MAX(id) across the live
+    and archive tables), so child rows can reference parents that have not
+    been written yet.
+    """
+
+    def __init__(self, conn, batch_size=20_000):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers = {model: [] for model in TABLE_ORDER}
+        self.counts = {model: 0 for model in TABLE_ORDER}
+        self.next_ids = {model: archive.next_id(conn, model) for model in TABLE_ORDER}
+        # Per-column bind processors, so raw rows are stored exactly as the ORM
+        # stores them (on SQLite: datetimes as 'YYYY-MM-DD HH:MM:SS.ffffff')
+        self.processors = {
+            model: [model.__table__.c[col].type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+                    for col in COLUMNS[model]]
+            for model in TABLE_ORDER
+        }
+
+    def next_id(self, model):
+        value = self.next_ids[model]
+        self.next_ids[model] += 1
+        return value
+
+    def add(self, model, row):
+        buf = self.buffers[model]
+        buf.append(row)
+        if len(buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for model in TABLE_ORDER:
+            rows = self.buffers[model]
+            if rows:
+                self._write(model, rows)
+                self.counts[model] += len(rows)
+                rows.clear()
+
+    def _write(self, model, rows):
+        table, cols = model.__tablename__, COLUMNS[model]
+        dialect = self.conn.dialect.name
+        processors = self.processors[model]
+        if any(processors):
+            rows = [
+                tuple(v if process is None or v is None else process(v) for process, v in zip(processors, row))
+                for row in rows
+            ]
+        cursor = self.conn.connection.cursor()
+        try:
+            if dialect == 'postgresql':
+                buf = io.StringIO()
+                csv.writer(buf).writerows(
+                    ['' if v is None else v for v in row] for row in rows
+                )
+                buf.seek(0)
+                cursor.copy_expert(f'COPY {table} ({", ".join(cols)}) FROM STDIN WITH CSV', buf)
+            else:
+                marks = ', '.join('?' if dialect == 'sqlite' else '%s' for _ in cols)
+                cursor.executemany(
+                    f'INSERT INTO {table} ({", ".join(cols)}) VALUES ({marks})', rows
+                )
+        finally:
+            cursor.close()
+
+    def sync_sequences(self):
+        """Move PostgreSQL id sequences past the ids we allocated ourselves."""
+        if self.conn.dialect.name != 'postgresql':
+            return
+        for model in TABLE_ORDER:
+            last_id = max(archive.next_id(self.conn, model) - 1, 1)
+            self.conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), {last_id})"
+            )
+
+
+# ── Generators ───────────────────────────────────────────────────────
+
+def _route_variants(routes, factor, dep_index):
+    """Yield each route ``factor`` times, later copies departing 3h apart."""
+    for variant in range(factor):
+        for route in routes:
+            if variant == 0:
+                yield route
+            else:
+                route = list(route)
+                route[0] = f'{route[0]}-{variant}'
+                route[dep_index] = (route[dep_index] + 3 * variant) % 24
+                yield tuple(route)
+
+
+VEHICLE_TYPES = {Flight: 'flight', Train: 'train', Bus: 'bus'}
+SEAT_CLASSES = {'flight': 'economy', 'train': 'sleeper', 'bus': 'standard'}
+
+
+def _departures(base, flight_routes, train_routes, bus_routes, seat_density=1.0):
+    """Yield one day's departures from the route timetables.
+
+    Each item is ``(model, fields, seat_layout, fare, travel_class)`` where
+    ``fields`` follows ``COLUMNS[model]`` without the leading id and the
+    trailing ``seats_available``.
+    """
+    for fn, airline, orig, dest, dep_h, dur_h, dur_m, price_base in flight_routes:
+        # Add small daily price variation (±10%)
+        price = int(price_base * random.uniform(0.9, 1.1))
+        seats = int(random.randint(20, 60) * seat_density)
+        yield Flight, (fn, airline, orig, dest,
+                       base + timedelta(hours=dep_h),
+                       base + timedelta(hours=dep_h + dur_h, minutes=dur_m),
+                       price), generate_flight_seats(seats), price, None
+
+    for tn, name, orig, dest, dep_h, dep_m, dur_h, classes in train_routes:
+        seats = int(random.randint(80, 200) * seat_density)
+        travel_class, fare = min(classes.items(), key=lambda kv: kv[1])
+        yield Train, (tn, name, orig, dest,
+                      base + timedelta(hours=dep_h, minutes=dep_m),
+                      base + timedelta(hours=dep_h + dur_h, minutes=dep_m),
+                      json.dumps(classes)), generate_train_seats(seats), fare, travel_class
+
+    for operator, orig, dest, dep_h, dur_h, bus_type, price_base in bus_routes:
+        price = int(price_base * random.uniform(0.9, 1.1))
+        seats = int(random.randint(20, 45) * seat_density)
+        yield Bus, (operator, orig, dest,
+                    base + timedelta(hours=dep_h),
+                    base + timedelta(hours=dep_h + dur_h),
+                    bus_type, price), generate_bus_seats(seats), price, None
+
+
+def _add_vehicle_seats(writer, vehicle_type, vehicle_id, layout, seat_class, occupancy,
+                       fare, travel_class, users, now):
+    """Write a vehicle's seat map; booked seats are grouped into bookings when users exist.
+
+    Returns the number of seats left unbooked.
+    """
+    free = 0
+    group = []  # (seat_id, label) of the booking being assembled
+
+    def close_group():
+        booking_id = writer.next_id(Booking)
+        labels = [label for _seat_id, label in group]
+        writer.add(Booking, (
+            booking_id, random.randint(*users), vehicle_type, vehicle_id,
+            json.dumps([f'Passenger {i + 1}' for i in range(len(group))]), len(group),
+            travel_class, 'Confirmed', fare * len(group), _pnr(booking_id),
+            json.dumps(labels), now,
+        ))
+        return booking_id
+
+    pending_seats = []
+    for label, row, col in layout:
+        seat_id = writer.next_id(Seat)
+        if random.random() >= occupancy:
+            free += 1
+            writer.add(Seat, (seat_id, vehicle_type, vehicle_id, label, row, col, seat_class, False, None))
+            continue
+        if not users:
+            writer.add(Seat, (seat_id, vehicle_type, vehicle_id, label, row, col, seat_class, True, None))
+            continue
+        group.append((seat_id, label))
+        pending_seats.append((seat_id, label, row, col))
+        if len(group) >= random.randint(1, 4):
+            booking_id = close_group()
+            for sid, lbl, r, c in pending_seats:
+                writer.add(Seat, (sid, vehicle_type, vehicle_id, lbl, r, c, seat_class, True, booking_id))
+            group, pending_seats = [], []
+    if group:
+        booking_id = close_group()
+        for sid, lbl, r, c in pending_seats:
+            writer.add(Seat, (sid, vehicle_type, vehicle_id, lbl, r, c, seat_class, True, booking_id))
+    return free
+
+
+def _pnr(booking_id):
+    """Deterministic 8-character PNR for a synthetic booking."""
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    out = ''
+    n = booking_id
+    while n:
+        n, rem = divmod(n, 36)
+        out = digits[rem] + out
+    return ('S' + out.rjust(7, '0'))[-8:]
+
+
+def seed(app=None, days=30, route_factor=1, seat_density=1.0, users=0, occupancy=None,
+         batch_size=20_000, start=None):
+    """Wipe inventory and generate ``days`` of schedules with bulk inserts.
+
+    Args:
+        days: number of departure days from ``start`` (default: today).
+        route_factor: copies of every route, each departing 3 hours later.
+        seat_density: multiplier on seats per vehicle.
+        users: synthetic users to create; pre-booked seats become their bookings.
+        occupancy: share of seats pre-booked (default: 25% flights,
+            20% trains, 30% buses, as before).
+    """
+    app = app or create_app()
     with app.app_context():
         # Drop all existing data for a clean reseed
         print('🗑️  Clearing existing data...')
@@ -187,93 +381,179 @@ def seed():
         Flight.query.delete()
         db.session.commit()
 
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        days_to_seed = 30
-        flight_count = train_count = bus_count = seat_count = 0
+        started = time.perf_counter()
+        today = (start or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        now = datetime.now()
+        occ = {'flight': 0.25, 'train': 0.2, 'bus': 0.3}
+        if occupancy is not None:
+            occ = dict.fromkeys(occ, occupancy)
 
-        # ── Flights (every route, every day for 30 days) ──
-        for day_offset in range(days_to_seed):
-            base = today + timedelta(days=day_offset)
-            for fn, airline, orig, dest, dep_h, dur_h, dur_m, price_base in FLIGHT_ROUTES:
-                # Add small daily price variation (±10%)
-                price = int(price_base * random.uniform(0.9, 1.1))
-                seats = random.randint(20, 60)
-                flight = Flight(
-                    flight_number=fn, airline=airline, origin=orig, destination=dest,
-                    departure=base + timedelta(hours=dep_h),
-                    arrival=base + timedelta(hours=dep_h + dur_h, minutes=dur_m),
-                    price=price, seats_available=seats,
-                )
-                db.session.add(flight)
-                db.session.flush()
+        with db.engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA synchronous = OFF')
+            writer = BulkWriter(conn, batch_size)
 
-                # Generate seat map
-                flight_seats = generate_flight_seats(flight.id, seats)
-                db.session.add_all(flight_seats)
-                seat_count += len(flight_seats)
-                flight_count += 1
+            # ── Users (one shared password hash — PBKDF2 per row would dominate) ──
+            user_range = None
+            if users:
+                password_hash = generate_password_hash('password123')
+                first = writer.next_ids[User]
+                for _ in range(users):
+                    uid = writer.next_id(User)
+                    writer.add(User, (uid, f'loaduser{uid}', f'loaduser{uid}@example.com',
+                                      password_hash, now))
+                user_range = (first, first + users - 1)
 
-        # ── Trains (every route, every day for 30 days) ──
-        for day_offset in range(days_to_seed):
-            base = today + timedelta(days=day_offset)
-            for tn, name, orig, dest, dep_h, dep_m, dur_h, classes in TRAIN_ROUTES:
-                seats = random.randint(80, 200)
-                train = Train(
-                    train_number=tn, name=name, origin=orig, destination=dest,
-                    departure=base + timedelta(hours=dep_h, minutes=dep_m),
-                    arrival=base + timedelta(hours=dep_h + dur_h, minutes=dep_m),
-                    classes=json.dumps(classes), seats_available=seats,
-                )
-                db.session.add(train)
-                db.session.flush()
+            flight_routes = list(_route_variants(FLIGHT_ROUTES, route_factor, 4))
+            train_routes = list(_route_variants(TRAIN_ROUTES, route_factor, 4))
+            bus_routes = list(_route_variants(BUS_ROUTES, route_factor, 3))
 
-                train_seats = generate_train_seats(train.id, seats)
-                db.session.add_all(train_seats)
-                seat_count += len(train_seats)
-                train_count += 1
+            for day_offset in range(days):
+                base = today + timedelta(days=day_offset)
+                for model, fields, layout, fare, travel_class in _departures(
+                        base, flight_routes, train_routes, bus_routes, seat_density):
+                    vtype = VEHICLE_TYPES[model]
+                    vid = writer.next_id(model)
+                    free = _add_vehicle_seats(writer, vtype, vid, layout, SEAT_CLASSES[vtype],
+                                              occ[vtype], fare, travel_class, user_range, now)
+                    writer.add(model, (vid, *fields, free))
 
-        # ── Buses (every route, every day for 30 days) ──
-        for day_offset in range(days_to_seed):
-            base = today + timedelta(days=day_offset)
-            for operator, orig, dest, dep_h, dur_h, bus_type, price_base in BUS_ROUTES:
-                price = int(price_base * random.uniform(0.9, 1.1))
-                seats = random.randint(20, 45)
-                bus = Bus(
-                    operator=operator, origin=orig, destination=dest,
-                    departure=base + timedelta(hours=dep_h),
-                    arrival=base + timedelta(hours=dep_h + dur_h),
-                    bus_type=bus_type, price=price, seats_available=seats,
-                )
-                db.session.add(bus)
-                db.session.flush()
-
-                bus_seats = generate_bus_seats(bus.id, seats)
-                db.session.add_all(bus_seats)
-                seat_count += len(bus_seats)
-                bus_count += 1
-
-        # ── Hotels & Rooms (static, not date-dependent) ──
-        hotel_count = 0
-        for name, city, address, stars, desc, rooms_list in HOTELS_DATA:
-            hotel = Hotel(name=name, city=city, address=address,
-                          star_rating=stars, description=desc)
-            db.session.add(hotel)
-            db.session.flush()
-            for room_type, ppn, avail in rooms_list:
-                db.session.add(Room(
-                    hotel_id=hotel.id, room_type=room_type,
-                    price_per_night=ppn, rooms_available=avail,
-                ))
-            hotel_count += 1
+            # ── Hotels & Rooms (static, not date-dependent) ──
+            for name, city, address, stars, desc, rooms_list in HOTELS_DATA:
+                hid = writer.next_id(Hotel)
+                writer.add(Hotel, (hid, name, city, address, stars, desc))
+                for room_type, ppn, avail in rooms_list:
+                    writer.add(Room, (writer.next_id(Room), hid, room_type, ppn, avail))
 
-        db.session.commit()
+            writer.flush()
+            writer.sync_sequences()
+
+        elapsed = time.perf_counter() - started
+        counts = writer.counts
+        total = sum(counts.values())
         print('✅ Database seeded successfully!')
-        print(f'   → {flight_count} flights ({len(FLIGHT_ROUTES)} routes × {days_to_seed} days)')
-        print(f'   → {train_count} trains ({len(TRAIN_ROUTES)} routes × {days_to_seed} days)')
-        print(f'   → {bus_count} buses ({len(BUS_ROUTES)} routes × {days_to_seed} days)')
-        print(f'   → {hotel_count} hotels with rooms')
-        print(f'   → {seat_count} individual seat records')
+        print(f'   → {counts[Flight]} flights ({len(flight_routes)} routes × {days} days)')
+        print(f'   → {counts[Train]} trains ({len(train_routes)} routes × {days} days)')
+        print(f'   → {counts[Bus]} buses ({len(bus_routes)} routes × {days} days)')
+        print(f'   → {counts[Hotel]} hotels with rooms')
+        print(f'   → {counts[Seat]} individual seat records')
+        if users:
+            print(f'   → {counts[User]} users, {counts[Booking]} bookings')
+        print(f'   ⏱️  {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)')
+        return counts
+
+
+# ── Rolling Window ───────────────────────────────────────────────────
+# Production inventory is never wiped: a daily job appends departures up
+# to the horizon and moves what has already left to the archive tables.
+
+DEPARTURE_KEYS = {
+    Flight: ('flight_number', 'departure'),
+    Train: ('train_number', 'departure'),
+    Bus: ('operator', 'origin', 'destination', 'departure'),
+}
+
+
+def _insert_departure(conn, model, values):
+    """Insert a departure unless its timetable key already exists; returns the new id or None."""
+    table = model.__table__
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite_insert if dialect == 'sqlite' else pg_insert)(table)
+        stmt = insert.values(**values).on_conflict_do_nothing().returning(table.c.id)
+        return conn.execute(stmt).scalar()
+    try:
+        with conn.begin_nested():
+            return conn.execute(table.insert().values(**values)).inserted_primary_key[0]
+    except IntegrityError:
+        return None
+
+
+def roll(app=None, horizon=30, today=None, seat_density=1.0):
+    """Extend the timetable to ``horizon`` days ahead and archive past departures.
+
+    Idempotent and safe alongside live traffic: existing departures (matched
+    on their timetable key) are left untouched, each day is its own short
+    transaction, and two concurrent runs cannot both insert the same
+    departure thanks to the unique departure indexes. Meant to run daily,
+    e.g. from cron: ``python seed_data.py --roll``.
+    """
+    app = app or create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        added = {model: 0 for model in VEHICLE_TYPES}
+        seats_added = 0
+
+        with db.engine.begin() as conn:
+            # Databases created before the departure keys existed
+            for model in VEHICLE_TYPES:
+                for index in model.__table__.indexes:
+                    if index.unique:
+                        index.create(conn, checkfirst=True)
+
+        for day_offset in range(horizon):
+            base = today + timedelta(days=day_offset)
+            with db.engine.begin() as conn:
+                existing = {
+                    model: set(conn.execute(
+                        db.select(*(getattr(model, c) for c in DEPARTURE_KEYS[model]))
+                        .where(model.departure >= base, model.departure < base + timedelta(days=1))
+                    ).all())
+                    for model in VEHICLE_TYPES
+                }
+                for model, fields, layout, _fare, _travel_class in _departures(
+                        base, FLIGHT_ROUTES, TRAIN_ROUTES, BUS_ROUTES, seat_density):
+                    values = dict(zip(COLUMNS[model][1:-1], fields))
+                    if tuple(values[c] for c in DEPARTURE_KEYS[model]) in existing[model]:
+                        continue
+                    seats = list(layout)
+                    vid = _insert_departure(conn, model, {**values, 'seats_available': len(seats)})
+                    if vid is None:
+                        continue  # a concurrent run inserted it first
+                    vtype = VEHICLE_TYPES[model]
+                    if seats:
+                        conn.execute(db.insert(Seat), [
+                            {'vehicle_type': vtype, 'vehicle_id': vid, 'seat_label': label,
+                             'row': row, 'col': col, 'seat_class': SEAT_CLASSES[vtype],
+                             'is_booked': False}
+                            for label, row, col in seats
+                        ])
+                    added[model] += 1
+                    seats_added += len(seats)
+
+        # Archive last, so the newest id always stays in the live table and
+        # SQLite never hands an archived id out again
+        with db.engine.begin() as conn:
+            archived = archive.archive_departed(conn, today)
+
+        elapsed = time.perf_counter() - started
+        print(f'🔁 Rolled schedule to {(today + timedelta(days=horizon - 1)):%Y-%m-%d} in {elapsed:.1f}s')
+        for model in VEHICLE_TYPES:
+            vehicles, seats = archived[model]
+            print(f'   → {model.__tablename__}: +{added[model]} departures, '
+                  f'{vehicles} archived ({seats} seats)')
+        print(f'   → +{seats_added} seat records')
+        return added, archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed travel inventory (bulk, batched).')
+    parser.add_argument('--roll', action='store_true',
+                        help='extend the schedule to --days ahead without wiping (daily job)')
+    parser.add_argument('--days', type=int, default=30, help='departure days to generate')
+    parser.add_argument('--route-factor', type=int, default=1, help='copies of every route')
+    parser.add_argument('--seat-density', type=float, default=1.0, help='multiplier on seats per vehicle')
+    parser.add_argument('--users', type=int, default=0, help='synthetic users owning pre-booked seats')
+    parser.add_argument('--occupancy', type=float, default=None, help='share of seats pre-booked (0-1)')
+    parser.add_argument('--batch-size', type=int, default=20_000, help='rows per insert batch')
+    args = parser.parse_args()
+    if args.roll:
+        roll(horizon=args.days, seat_density=args.seat_density)
+        return
+    seed(days=args.days, route_factor=args.route_factor, seat_density=args.seat_density,
+         users=args.users, occupancy=args.occupancy, batch_size=args.batch_size)
 
 
 if __name__ == '__main__':
-    seed()
+    main()
@@ -0,0 +1,10 @@
+"""Production WSGI entry point — ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Defaults to the production config. The app holds no open connections or
+threads after ``create_app``, so it is safe to load once in the gunicorn
+master (``preload_app``) and fork into workers.
+"""
+import os
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))